@@ -296,20 +296,45 @@ class Isotope(object):
 
 
 class ElementsDict(object):
-    """Ordered dict of Elements with lookup by number, symbol, and name."""
+    """Ordered dict of Elements with lookup by number, symbol, and name.
+
+    The elements may also be given as a single function returning them,
+    which is only called on first use (the full table is slow to build).
+    """
     def __init__(self, *elements):
-        self._list = []
-        self._dict = {}
-        for element in elements:
-            if element.number > len(self._list) + 1:
+        if len(elements) == 1 and callable(elements[0]):
+            self._elements = elements[0]
+        else:
+            self._elements = lambda: elements
+        self._list_ = None
+        self._dict_ = None
+
+    def _load(self):
+        _list = []
+        _dict = {}
+        for element in self._elements():
+            if element.number > len(_list) + 1:
                 raise ValueError("Elements must be added in order")
-            if element.number <= len(self._list):
-                self._list[element.number - 1] = element
+            if element.number <= len(_list):
+                _list[element.number - 1] = element
             else:
-                self._list.append(element)
-            self._dict[element.number] = element
-            self._dict[element.symbol] = element
-            self._dict[element.name] = element
+                _list.append(element)
+            _dict[element.number] = element
+            _dict[element.symbol] = element
+            _dict[element.name] = element
+        self._list_, self._dict_ = _list, _dict
+
+    @property
+    def _list(self):
+        if self._list_ is None:
+            self._load()
+        return self._list_
+
+    @property
+    def _dict(self):
+        if self._dict_ is None:
+            self._load()
+        return self._dict_
 
     def __str__(self):
         return "[%s]" % ", ".join(ele.symbol for ele in self._list)
@@ -334,7 +359,7 @@ class ElementsDict(object):
                 raise KeyError
 
 
-ELEMENTS = ElementsDict(
+ELEMENTS = ElementsDict(lambda: (
     Element(
         1, 'H', 'Hydrogen',
         group=1, period=1, block='s', series=1,
@@ -1699,7 +1724,7 @@ ELEMENTS = ElementsDict(
         eleconfig='[Rn] 5f14 6d7 7s2',
         oxistates='*',
         ionenergy=(),
-        isotopes={268: Isotope(268.13882, 1.0, 268)}))
+        isotopes={268: Isotope(268.13882, 1.0, 268)})))
 
 
 PERIODS = {1: 'K', 2: 'L', 3: 'M', 4: 'N', 5: 'O', 6: 'P', 7: 'Q'}
@@ -19,19 +19,87 @@ try:
 except NameError:
     basestring = str
 
+import numpy as np
+
 from linetools.abund.elements import ELEMENTS
 from linetools.abund import roman
 
+CACHE = {}  # Lookup tables (see _tables)
+
+# Ionization states in the name tables;  larger ones are converted one by one
+NION = 120
+
 ########################## ##########################
 
+def _tables():
+    """ Lookup tables for element symbols and roman numerals (built once)
+
+    Returns
+    -------
+    tables : dict
+      * symbol : ndarray;  symbol[Z] ('' for Z=0)
+      * roman : ndarray;  roman[ion] ('' for ion=0), ion < NION
+      * Z : dict;  Z of each symbol (and D)
+      * ion : dict;  ion of each roman numeral, ion < NION
+    """
+    if 'symbol' not in CACHE:
+        symbol = np.array([''] + [elm.symbol for elm in ELEMENTS])
+        numerals = np.array([''] + [roman.toRoman(ii) for ii in range(1, NION)])
+        CACHE['Z'] = dict((elm, Z) for Z, elm in enumerate(symbol) if Z > 0)
+        CACHE['Z']['D'] = 1  # Deuterium
+        CACHE['ion'] = dict((numeral, ii) for ii, numeral in enumerate(numerals) if ii > 0)
+        CACHE['symbol'], CACHE['roman'] = symbol, numerals
+    return CACHE
+
+
+def _name_table(flg, nspace):
+    """ Ion names indexed by [Z, ion] ('' where Z=0 or ion=0)
+    """
+    key = ('names', flg, nspace)
+    if key not in CACHE:
+        tables = _tables()
+        names = np.zeros((tables['symbol'].size, NION), dtype=object)
+        names[...] = ''
+        for Z, elm in enumerate(tables['symbol'][1:], start=1):
+            for ii in range(1, NION):
+                names[Z, ii] = ion_to_name((Z, ii), flg=flg, nspace=nspace)
+        CACHE[key] = names.astype(str)
+    return CACHE[key]
+
+
+def _name_lookup():
+    """ (Z, ion) of the ion names, with and without a space and
+    with up to 3 trailing '*' (encoded as Z*5000 + ion)
+    """
+    if 'name_lookup' not in CACHE:
+        lookup = {}
+        symbols = list(_tables()['symbol']) + ['D']
+        for Z, elm in enumerate(symbols):
+            if Z == 0:
+                continue
+            iZ = 1 if elm == 'D' else Z
+            for ii, numeral in enumerate(_tables()['roman']):
+                if ii == 0:
+                    continue
+                names = [elm + ' ' + numeral]
+                if len(elm) == 2 or numeral[0] in 'IVX':  # as parsed in name_to_ion()
+                    names.append(elm + numeral)
+                for name in names:
+                    for star in ('', '*', '**', '***'):
+                        lookup[name + star] = iZ*5000 + ii
+        CACHE['name_lookup'] = lookup
+    return CACHE['name_lookup']
+
+
 def ion_to_name(ion, flg=0, nspace=None):
     """ Convert ion tuple into a string
 
     Parameters
     ----------
-    ion : tuple or dict
+    ion : tuple or dict or ndarray
       Either a tuple of integers (Z, ion) or a dict with tags of `Z`
-      and `ion`. e.g. (6, 4) would return 'CIV'.
+      and `ion`. e.g. (6, 4) would return 'CIV'.  Z and ion may be
+      arrays (or ion an (N, 2) array of Z, ion), for many ions at once.
 
     flg : int, optional (0)
         * 0: Roman numeral (e.g. CIV)
@@ -42,21 +110,30 @@ def ion_to_name(ion, flg=0, nspace=None):
 
     Returns
     -------
-    name : str
+    name : str or ndarray
       e.g. SiII, {\\rm Si}^{+}
 
     """
-    if isinstance(ion,tuple):
-        elm = ELEMENTS[ion[0]]
-        str_elm = elm.symbol
-    else:
-        return ion_to_name((ion['Z'], ion['ion']))
+    if isinstance(ion, np.ndarray) and (ion.dtype.names is None):
+        return ion_to_name((ion[..., 0], ion[..., 1]), flg=flg, nspace=nspace)
+    elif not isinstance(ion, tuple):
+        return ion_to_name((ion['Z'], ion['ion']), flg=flg, nspace=nspace)
+    if nspace is None:
+        nspace = 0
+    if (np.ndim(ion[0]) > 0) or (np.ndim(ion[1]) > 0):
+        return _ion_to_name_array(ion[0], ion[1], flg, nspace)
+
+    try:
+        str_elm = _tables()['symbol'][ion[0]] if ion[0] > 0 else None
+    except (IndexError, TypeError):
+        str_elm = None
+    if str_elm is None:
+        str_elm = ELEMENTS[ion[0]].symbol
 
     # Ion state
     if flg == 0: # Roman
-        if nspace is None:
-            nspace = 0
-        str_ion = roman.toRoman(ion[1])
+        str_ion = _tables()['roman'][ion[1]] if 0 < ion[1] < NION and int(ion[1]) == ion[1] \
+            else roman.toRoman(ion[1])
         spc = ' ' * nspace
         outp = str_elm + spc + str_ion
     elif flg == 1: # LaTeX
@@ -74,7 +151,25 @@ def ion_to_name(ion, flg=0, nspace=None):
     else:
         raise ValueError('ionization.ion_name: Not ready for this flg.')
 
-    return outp
+    return str(outp)
+
+
+def _ion_to_name_array(Z, ion, flg, nspace):
+    """ ion_to_name() for arrays of Z and ion (broadcast)
+    """
+    Z, ion = np.broadcast_arrays(np.asarray(Z), np.asarray(ion))
+    names = _name_table(flg, nspace)
+    iZ, iion = Z.astype(int), ion.astype(int)
+    good = (iZ > 0) & (iZ < names.shape[0]) & (iion > 0) & (iion < NION) & (iZ == Z) & (iion == ion)
+    if np.all(good):
+        return names[iZ, iion]
+    # Others one by one (e.g. raising the errors)
+    out = names[np.where(good, iZ, 0), np.where(good, iion, 0)]
+    others = dict((Zion, ion_to_name(Zion, flg=flg, nspace=nspace))
+                  for Zion in set(zip(Z[~good].tolist(), ion[~good].tolist())))
+    out = out.astype(object)
+    out[~good] = [others[Zion] for Zion in zip(Z[~good].tolist(), ion[~good].tolist())]
+    return out.astype(str)
 
 
 ########################## ##########################
@@ -99,19 +194,25 @@ def name_to_ion(ion):
 
     Parameters
     ----------
-    ion : str
-      Name of the ion, e.g. 'SiII' or 'Si II'
+    ion : str or list or ndarray
+      Name of the ion, e.g. 'SiII' or 'Si II';  or an array of names
 
     Returns
     -------
     ion_tup : tuple
-      Z, ion -- e.g. (14,2)
+      Z, ion -- e.g. (14,2);  int arrays for an array of names
     """
+    if isinstance(ion, (list, np.ndarray)):
+        return _name_to_ion_array(ion)
     if isinstance(ion,basestring):
         pass
     else:
         raise ValueError('ionization.name_ion: Not ready for this input yet.')
 
+    code = _name_lookup().get(ion)
+    if code is not None:
+        return divmod(code, 5000)
+
     ion = ion.strip('*') # e.g. CII*
 
     if ion[1] in ['I','V', 'X', ' ']:
@@ -130,3 +231,19 @@ def name_to_ion(ion):
     ion_state = roman.fromRoman(ion[iion:].strip())
 
     return Z, ion_state
+
+
+def _name_to_ion_array(names):
+    """ name_to_ion() for an array of names
+    """
+    names = np.asarray(names)
+    lookup = _name_lookup()
+    flat = names.ravel().tolist()
+    code = np.fromiter((lookup.get(name, -1) for name in flat), dtype=int, count=len(flat))
+    # Others one by one (e.g. raising the errors)
+    bad = np.where(code < 0)[0]
+    if bad.size > 0:
+        others = dict((name, name_to_ion(name)) for name in set(flat[ii] for ii in bad))
+        code[bad] = [others[flat[ii]][0]*5000 + others[flat[ii]][1] for ii in bad]
+    Z, ion = np.divmod(code.reshape(names.shape), 5000)
+    return Z, ion
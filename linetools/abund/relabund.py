@@ -14,11 +14,13 @@ import numpy as np
 import pdb
 
 #from astropy.utils.misc import isiterable
-from astropy.table import Table
+from astropy.table import Table, Column, MaskedColumn
 
 from .solar import SolarAbund
 import linetools.abund.elements as ltae
 
+CACHE = {}  # Ionization energies (see _ionenergy)
+
 #
 class RelAbund(object):
     """Class to handle relative abundances, usually of an AbsSystem
@@ -281,3 +283,169 @@ class RelAbund(object):
 
     def __repr__(self):
         return ('<{:s}:>'.format(self.__class__.__name__))
+
+
+def _ionenergy():
+    """ Ionization energies (eV) indexed by [Z, ion-1];  NaN where undefined
+    """
+    if 'ionenergy' not in CACHE:
+        nion = max(len(elm.ionenergy) for elm in ltae.ELEMENTS)
+        ionenergy = np.full((len(ltae.ELEMENTS)+1, nion), np.nan)
+        for elm in ltae.ELEMENTS:
+            ionenergy[elm.number, :len(elm.ionenergy)] = elm.ionenergy
+        CACHE['ionenergy'] = ionenergy
+    return CACHE['ionenergy']
+
+
+def _low_ions(Z, ion):
+    """ Low-ion selection of RelAbund.from_ionclm_table() for arrays of Z, ion
+
+    An ion is kept if it is the dominant ion in HI gas, i.e.
+    IP(ion-1) < 13.6 eV < IP(ion)
+    """
+    ionenergy = _ionenergy()
+    good = (Z > 0) & (Z < ionenergy.shape[0]) & (ion >= 1) & (ion <= ionenergy.shape[1])
+    IP = np.full(Z.size, np.nan)
+    IP[good] = ionenergy[Z[good], ion[good]-1]
+    IP_low = np.full(Z.size, -np.inf)  # Neutrals
+    ions = good & (ion >= 2)
+    IP_low[ions] = ionenergy[Z[ions], ion[ions]-2]
+    return np.isfinite(IP) & ~(IP < 13.6) & ~(IP_low > 13.6)
+
+
+def _xy_flag(flagX, flagY):
+    """ Flag of [X/Y] from the flags of [X/H] and [Y/H] (see RelAbund.__getitem__)
+    """
+    flagX, flagY = np.broadcast_arrays(flagX, flagY)
+    flag = np.zeros_like(flagX)
+    flag[flagY == 1] = flagX[flagY == 1]
+    lowY = flagY == 2  # Lower limit on Y
+    flag[lowY] = np.where(np.isin(flagX[lowY], [1, 3]), 3, -1)
+    uppY = flagY == 3  # Upper limit on Y
+    flag[uppY] = np.where(np.isin(flagX[uppY], [1, 2]), 2, -1)
+    # No measurement
+    flag[(flagX == 0) | (flagY == 0)] = 0
+    return flag
+
+
+def batch_relabund(tbl, NHI=None, Y=1, low_ions=True, sys_key='system_id',
+                   solar_ref='Asplund2009'):
+    """ [X/Y] abundances of many systems at once from their ionic column densities
+
+    Applies the rules of RelAbund.from_ionclm_table() to each system,
+    without a loop over the systems
+
+    Parameters
+    ----------
+    tbl : Table
+      Ionic column densities of all systems, with columns sys_key,
+      Z, ion, flag_N, logN, sig_logN and optionally Ej (ground-state
+      only are used).  As in RelAbund, the last row of an element in
+      a system is used.
+    NHI : Table, optional
+      HI columns with columns sys_key, flag_NHI, logNHI, sig_logNHI.
+      Default is the Z=1, ion=1 rows of tbl
+    Y : int or str, optional
+      Relative abundance;  default is [X/H]
+    low_ions : bool, optional
+      Generate abundances from low-ions only.  No ionization corrections
+    sys_key : str, optional
+      Column with the system ID
+    solar_ref : str, optional
+      Reference for the underlying Solar abundances
+
+    Returns
+    -------
+    abund : Table
+      One row per system (sorted by sys_key).  For each element X,
+      [X/Y], sig([X/Y]) and flag([X/Y]), with flag 1=Value, 2=Lower limit,
+      3=Upper limit, -1=NG and 0=No measurement (values masked)
+    """
+    # Checks
+    if not low_ions:
+        raise IOError("Only coded for low-ions so far")
+    for key in [sys_key, 'Z', 'ion', 'flag_N', 'logN', 'sig_logN']:
+        if key not in tbl.keys():
+            raise IOError("Input table must include {:s}".format(key))
+    if isinstance(Y, basestring):
+        Yint = ltae.ELEMENTS[Y].number
+    elif isinstance(Y, numbers.Integral):
+        Yint = Y
+    else:
+        raise IOError("Bad Y input {}".format(Y))
+    Yc = ltae.ELEMENTS[Yint].symbol
+
+    sys_id = np.asarray(tbl[sys_key])
+    Z = np.asarray(tbl['Z'], dtype=int)
+    ion = np.asarray(tbl['ion'], dtype=int)
+    systems, isys = np.unique(sys_id, return_inverse=True)
+    isys = isys.ravel()
+
+    # NHI of each system
+    if NHI is None:
+        HI = (Z == 1) & (ion == 1)
+        NHI = Table()
+        NHI[sys_key] = sys_id[HI]
+        for key, HIkey in zip(['flag_N', 'logN', 'sig_logN'], ['flag_NHI', 'logNHI', 'sig_logNHI']):
+            NHI[HIkey] = np.asarray(tbl[key])[HI]
+    idx = np.searchsorted(systems, np.asarray(NHI[sys_key]))
+    found = idx < systems.size
+    found[found] = systems[idx[found]] == np.asarray(NHI[sys_key])[found]
+    flag_NHI = np.zeros(systems.size, dtype=int)
+    logNHI, sig_logNHI = np.full(systems.size, np.nan), np.full(systems.size, np.nan)
+    flag_NHI[idx[found]] = np.asarray(NHI['flag_NHI'])[found]
+    logNHI[idx[found]] = np.asarray(NHI['logNHI'])[found]
+    sig_logNHI[idx[found]] = np.asarray(NHI['sig_logNHI'])[found]
+    if np.any(flag_NHI != 1):
+        raise IOError("Not ready for this NHI flag (or no NHI) for systems {}".format(
+            systems[flag_NHI != 1].tolist()))
+
+    # Select
+    gd = Z != 1  # Skip Hydrogen
+    if 'Ej' in tbl.keys():
+        gd &= ~(np.asarray(tbl['Ej']) > 0.)  # ground-state only;  not expecting units
+    gd[gd] = _low_ions(Z[gd], ion[gd])
+    gd = np.where(gd)[0]
+    # Last row of each element in each system
+    Zs = np.unique(Z[gd])
+    iZ = np.searchsorted(Zs, Z[gd])
+    key = isys[gd] * Zs.size + iZ
+    last = np.ones(gd.size, dtype=bool)
+    srt = np.argsort(key, kind='stable')
+    last[srt[:-1]] = key[srt[:-1]] != key[srt[1:]]
+    gd, iZ = gd[last], iZ[last]
+
+    # [X/H]
+    solar = SolarAbund(ref=solar_ref)
+    XH = np.full((systems.size, Zs.size), np.nan)
+    sigXH, sig = XH.copy(), XH.copy()
+    flag = np.zeros((systems.size, Zs.size), dtype=int)
+    row = isys[gd]
+    XH[row, iZ] = np.asarray(tbl['logN'])[gd] - logNHI[row] + 12 - solar[Z[gd]]
+    sigXH[row, iZ] = np.sqrt(np.asarray(tbl['sig_logN'])[gd]**2 + sig_logNHI[row]**2)  # Crude but ok
+    sig[row, iZ] = np.asarray(tbl['sig_logN'])[gd]  # For relative abundances
+    flag[row, iZ] = np.asarray(tbl['flag_N'])[gd]
+
+    # [X/Y]
+    if Yint != 1:
+        jY = np.searchsorted(Zs, Yint)
+        if (jY == Zs.size) or (Zs[jY] != Yint):
+            raise IOError("No {:s} abundances to compare to".format(Yc))
+        flag = _xy_flag(flag, flag[:, jY:jY+1])
+        XH = XH - XH[:, jY:jY+1]
+        sigXH = np.sqrt(sig**2 + sig[:, jY:jY+1]**2)
+        keep = Zs != Yint
+        Zs, XH, sigXH, flag = Zs[keep], XH[:, keep], sigXH[:, keep], flag[:, keep]
+
+    # Generate the Table
+    abund = Table()
+    abund[sys_key] = systems
+    for jj, iZ in enumerate(Zs):
+        ratio = '[{:s}/{:s}]'.format(ltae.ELEMENTS[int(iZ)].symbol, Yc)
+        mask = flag[:, jj] == 0
+        abund[ratio] = MaskedColumn(XH[:, jj], mask=mask)
+        abund['sig({:s})'.format(ratio)] = MaskedColumn(sigXH[:, jj], mask=mask)
+        abund['flag({:s})'.format(ratio)] = Column(flag[:, jj],
+            meta={1:'Value', 2:'Lower limit', 3:'Upper Limit', -1:'NG', 0:'No measurement'})
+    return abund
+
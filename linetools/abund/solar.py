@@ -19,6 +19,8 @@ from astropy.utils.misc import isiterable
 #from xastropy.xutils import xdebug as xdb
 l_path = importlib.util.find_spec('linetools').submodule_search_locations[0]
 
+CACHE = {}  # Abundance tables, by ref
+
 #
 class SolarAbund(object):
     """Class to handle simple Solar Abundance calculations
@@ -48,7 +50,11 @@ class SolarAbund(object):
 
     def load_data(self):
         """Grab the Solar Abundance data (in linetools/abund)
+        The table is read once and shared through CACHE
         """
+        if self.ref in CACHE:
+            self._data = CACHE[self.ref]
+            return
         # Data file
         if self.ref == 'Asplund2009':
             dat_file = l_path + '/data/abund/solar_Asplund2009.dat'
@@ -60,7 +66,30 @@ class SolarAbund(object):
             raise ValueError('Unrecognized reference for SolarAbund: {:s}'.format(self.ref))
         # Save
         self._data = table
+        CACHE[self.ref] = table
 
+    def _lookup(self):
+        """ Abundances by atomic number and by element (built once per ref)
+        """
+        key = (self.ref, 'lookup')
+        if key not in CACHE:
+            abund = np.asarray(self._data['Abund'])
+            by_Z = np.full(np.max(self._data['Z'])+1, np.nan)
+            by_Z[self._data['Z']] = abund
+            CACHE[key] = dict(Z=dict(zip(self._data['Z'].tolist(), abund)),
+                              Elm=dict(zip(self._data['Elm'].tolist(), abund)),
+                              by_Z=by_Z)
+        return CACHE[key]
+
+    def abund_by_Z(self):
+        """ Abundances indexed by atomic number
+
+        Returns
+        -------
+        abund : ndarray
+          abund[Z] is the abundance of element Z;  NaN if not in the table
+        """
+        return self._lookup()['by_Z'].copy()
 
     def get_ratio(self, rtio):
         """ Return abundance ratio
@@ -91,8 +120,16 @@ class SolarAbund(object):
         -------
         Abund : float
         """
+        # Array of atomic numbers
+        if isinstance(k, np.ndarray) and k.dtype.kind in 'iu':
+            by_Z = self._lookup()['by_Z']
+            bad = (k < 0) | (k >= by_Z.size)
+            bad[~bad] = np.isnan(by_Z[k[~bad]])
+            if np.any(bad):
+                raise ValueError('Atomic Number not in Table: {:d}'.format(k[bad][0]))
+            return by_Z[k]
         # Iterate?
-        if isiterable(k) and not isinstance(k, basestring): 
+        if isiterable(k) and not isinstance(k, basestring):
             out_abnd = []
             for ik in k:
                 out_abnd.append(self[ik])
@@ -100,19 +137,18 @@ class SolarAbund(object):
             return out_abnd
 
         if isinstance(k, numbers.Integral): # Atomic number
-            mt = np.where(self._data['Z'] == k)[0]
-            if len(mt) != 1:
+            try:
+                return self._lookup()['Z'][k]
+            except KeyError:
                 raise ValueError('Atomic Number not in Table: {:d}'.format(k))
         elif isinstance(k, basestring): # Name
-            mt = np.where(self._data['Elm'] == k)[0]
-            if len(mt) != 1:
+            try:
+                return self._lookup()['Elm'][k]
+            except KeyError:
                 raise ValueError('Element not in Table: {:s}'.format(k))
         else:
             raise IndexError('Not prepared for this type of input', k)
 
-        # Return
-        return self._data['Abund'][mt][0]
-
     # Printing
     def __repr__(self):
         # Generate sets string
@@ -4,6 +4,7 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 
 # TEST_UNICODE_LITERALS
 
+import numpy as np
 import pytest
 from linetools.abund import ions, roman
 from linetools.abund.roman import OutOfRangeError, NotIntegerError,InvalidRomanNumeralError
@@ -41,6 +42,38 @@ def test_name_to_ion():
         aux = ions.name_to_ion(4)  # not a string
     # Deuterium
     aux = ions.name_to_ion('DI')
+    assert ions.name_to_ion('CII**') == (6,2)
+
+
+def test_ion_to_name_array():
+    Z = np.array([1, 6, 14, 26, 26])
+    ion = np.array([1, 4, 2, 2, 150])  # 150 is beyond the name table
+    names = ions.ion_to_name((Z, ion))
+    assert list(names) == [ions.ion_to_name((iZ, iion)) for iZ, iion in zip(Z, ion)]
+    names = ions.ion_to_name(np.array([Z, ion]).T, nspace=1)
+    assert names[2] == 'Si II'
+    # Broadcast
+    assert list(ions.ion_to_name((6, np.arange(1, 4)), flg=1)) == ['{\\rm C}^0', '{\\rm C}^{+}', '{\\rm C}^{++}']
+    # Bad input
+    with pytest.raises(OutOfRangeError):
+        ions.ion_to_name((Z, np.array([1, 4, 2, 2, 0])))
+    with pytest.raises(KeyError):
+        ions.ion_to_name((np.array([6, 200]), np.array([2, 2])))
+
+
+def test_name_to_ion_array():
+    Z, ion = ions.name_to_ion(['CIV', 'Si II', 'FeII*', 'DI', 'MgXXXIX'])
+    np.testing.assert_array_equal(Z, [6, 14, 26, 1, 12])
+    np.testing.assert_array_equal(ion, [4, 2, 2, 1, 39])
+    # Round trip
+    Z = np.random.RandomState(1).randint(1, 31, 1000)
+    ion = np.random.RandomState(2).randint(1, 10, 1000)
+    Z2, ion2 = ions.name_to_ion(ions.ion_to_name((Z, ion)))
+    np.testing.assert_array_equal(Z2, Z)
+    np.testing.assert_array_equal(ion2, ion)
+    # Bad input
+    with pytest.raises(KeyError):
+        ions.name_to_ion(np.array(['CIV', 'Xx II']))
 
 
 def test_roman():
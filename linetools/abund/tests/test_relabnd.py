@@ -9,7 +9,7 @@ import pytest
 from astropy.table import Table
 import numpy as np
 
-from ..relabund import RelAbund
+from ..relabund import RelAbund, batch_relabund
 
 def make_class():
     XY = RelAbund()
@@ -73,3 +73,39 @@ def test_table():
     #
     tbl = XY.table()
     assert len(tbl) == 5
+
+
+def test_batch():
+    # Two systems;  the first as in test_from_iontbl
+    tbl = Table()
+    tbl['system_id'] = [0]*6 + [1]*4
+    tbl['Z'] = [1,6,6,8,14,26] + [1,14,26,26]
+    tbl['ion'] = [1,2,4,1,2,2] + [1,2,2,3]
+    tbl['flag_N'] = [1,2,1,2,1,1] + [1,1,2,1]
+    tbl['logN'] = [20.5,15.,13.,15.5,14.,13.] + [20.,13.5,14.,13.]
+    tbl['sig_logN'] = [0.2] + [0.05]*5 + [0.1] + [0.05]*3
+    abund = batch_relabund(tbl)
+    assert len(abund) == 2
+    XY = RelAbund.from_ionclm_table((1,20.5,0.2), tbl[1:6])
+    for key, elm in zip([6, 8, 14, 26], ['C', 'O', 'Si', 'Fe']):
+        np.testing.assert_allclose(abund['[{:s}/H]'.format(elm)][0], XY[key]['val'])
+        np.testing.assert_allclose(abund['sig([{:s}/H])'.format(elm)][0], XY[key]['sig'])
+    # Missing and high ions
+    assert abund['flag([C/H])'][1] == 0
+    assert abund['[C/H]'].mask[1]
+    assert abund['flag([Fe/H])'][1] == 2
+    # [X/Fe]
+    abund = batch_relabund(tbl, Y='Fe')
+    assert '[Fe/Fe]' not in abund.keys()
+    np.testing.assert_allclose(abund['[Si/Fe]'][0], XY[14,26]['val'])
+    assert abund['flag([Si/Fe])'][1] == 3
+    assert abund['flag([O/Fe])'][0] == XY[8,26]['flag']
+    # NHI as a table
+    NHI = Table(dict(system_id=[0, 1], flag_NHI=[1, 1], logNHI=[20.5, 20.], sig_logNHI=[0.2, 0.1]))
+    abund2 = batch_relabund(tbl[tbl['Z'] > 1], NHI=NHI, Y='Fe')
+    np.testing.assert_allclose(abund2['[Si/Fe]'], abund['[Si/Fe]'])
+    # Bad input
+    with pytest.raises(IOError):
+        batch_relabund(tbl[tbl['Z'] > 1])  # No NHI
+    with pytest.raises(IOError):
+        batch_relabund(tbl, Y='Ne')
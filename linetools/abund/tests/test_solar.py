@@ -33,6 +33,12 @@ def test_elm():
 def test_Z():
     sol = solar.SolarAbund()
     np.testing.assert_allclose(sol[6],8.43)
+    abund = sol.abund_by_Z()
+    np.testing.assert_allclose(abund[[6, 26]], [8.43, 7.45])
+    assert np.isnan(abund[0])
+    np.testing.assert_allclose(sol[np.array([6, 26])], [8.43, 7.45])
+    with pytest.raises(ValueError):
+        a = sol[np.array([6, 0])]
 
 
 def test_ratio():
@@ -8,6 +8,8 @@ import pdb
 from astropy import units as u
 from astropy.convolution import convolve, Box1DKernel
 
+from linetools.analysis.utils import box_smooth
+
 
 def generate_stau(velo, flux, sig, kbin=22.*u.km/u.s, debug=False):
     """ Generate the smoothed tau array for kinematic tests
@@ -41,7 +43,8 @@ def generate_stau(velo, flux, sig, kbin=22.*u.km/u.s, debug=False):
 
         flux[badzero] = np.mean(np.array([flux[np.min(badzero)-1],
                                                     flux[np.max(badzero)+1]]))
-        pdb.set_trace() # Should add sig too
+        sig[badzero] = np.mean(np.array([sig[np.min(badzero)-1],
+                                         sig[np.max(badzero)+1]]))
 
     # Generate the tau array
     tau = np.zeros(npix)
@@ -172,3 +175,151 @@ def cgm_kin(velo, stau, per=0.05, debug=False, cov_thresh=0.5,
 
     # Return
     return kdata
+
+
+def generate_stau_batch(velo, flux, sig, kbin=22.*u.km/u.s):
+    """ Generate the smoothed tau arrays of many profiles at once
+
+    Vectorized version of generate_stau() for velocity-aligned
+    profiles stored in padded 2D arrays.
+
+    Parameters
+    ----------
+    velo : Quantity array (usually km/s)
+      Shape (nprof, npix), or (npix,) if shared by all profiles
+    flux : array, shape (nprof, npix)
+      Normalized fluxes;  pad with NaN beyond the end of each profile
+    sig : array, shape (nprof, npix)
+      Errors
+    kbin : Quantity (velocity), optional
+      Kernel size for the boxcar smoothing of the optical depth arrays
+
+    Returns
+    -------
+    stau : array, shape (nprof, npix)
+       Smoothed tau arrays;  0 in the padding
+    """
+    flux = np.array(flux, dtype=float, ndmin=2)
+    sig = np.array(sig, dtype=float, ndmin=2)
+    vel = np.broadcast_to(velo.to('km/s').value, flux.shape)
+    nprof, npix = flux.shape
+    valid = np.isfinite(flux) & np.isfinite(vel)
+    pix = np.broadcast_to(np.arange(npix), flux.shape)
+
+    # Calculate dv per profile
+    dvel = np.where(valid[:, 1:] & valid[:, :-1], np.diff(vel, axis=1), np.nan)
+    dv = np.abs(np.nanmedian(dvel, axis=1))
+
+    # Bad pixels;  replace with the mean of the bounding pixels
+    bad = valid & ((flux == 0) | (sig <= 0))
+    if np.any(bad):
+        ibad = np.where(np.any(bad, axis=1))[0]
+        bpix = np.where(bad[ibad], pix[ibad], -1)
+        imax = np.max(bpix, axis=1)
+        imin = np.min(np.where(bad[ibad], pix[ibad], npix), axis=1)
+        if np.any(imax - imin >= 5):
+            raise ValueError('generate_stau_batch: too many or too large sections of bad data in profiles {}'.format(
+                ibad[imax - imin >= 5]))
+        nvalid = np.sum(valid[ibad], axis=1)
+        lo = np.maximum(imin - 1, 0)
+        hi = np.minimum(imax + 1, nvalid - 1)
+        for arr in [flux, sig]:
+            fill = 0.5 * (arr[ibad, lo] + arr[ibad, hi])
+            arr[ibad] = np.where(bad[ibad], fill[:, None], arr[ibad])
+
+    # Generate the tau arrays
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gd = (flux > sig/2.) & (sig > 0.)
+        tau = np.where(gd, np.log(1./flux), np.log(2./sig))
+    tau[~valid] = 0.
+
+    # Smooth
+    nbin = np.round(kbin.to('km/s').value / dv).astype(int)
+    stau = box_smooth(tau, nbin)
+    stau[~valid] = 0.
+    return stau
+
+
+def batch_kin(velo, stau, per=0.05, cov_thresh=0.5, dv_zeropk=15.*u.km/u.s):
+    """ Measure the kinematics of many profiles at once
+
+    Vectorized version of pw97_kin() and cgm_kin().
+
+    Parameters
+    ----------
+    velo : Quantity array
+      Shape (nprof, npix), or (npix,) if shared by all profiles.
+      NaN (or the padding of generate_stau_batch()) marks pixels
+      beyond the end of a profile
+    stau : array, shape (nprof, npix)
+      Smoothed tau arrays, e.g. from generate_stau_batch()
+    per : float, optional
+      Percentile for Dv, e.g. 0.05 for Dv90
+    cov_thresh : float, optional
+      Parameter for the X_fcover test
+    dv_zeropk : Quantity, optional
+      Velocity window for the zero_pk test
+
+    Returns
+    -------
+    kin_tbl : Table
+      One row per profile with the pw97_kin() (Dv, fmm, fedg) and
+      cgm_kin() (delta_v, X_fcover, v_peak, zero_pk, JF_fcover) measurements
+    """
+    from astropy.table import Table
+    stau = np.array(stau, dtype=float, ndmin=2)
+    vel = np.broadcast_to(velo.to('km/s').value, stau.shape)
+    nprof, npix = stau.shape
+    rows = np.arange(nprof)
+    valid = np.isfinite(vel) & np.isfinite(stau)
+    stau = np.where(valid, stau, 0.)
+
+    # Cumulative tau
+    tottau = np.sum(stau, axis=1)
+    cumstau = np.cumsum(stau, axis=1)
+    cumtau = cumstau / tottau[:, None]
+    lft = np.argmax(cumtau > per, axis=1)
+    rgt = np.argmax(cumtau > (1.-per), axis=1) - 1
+    Dv = np.round(np.abs(vel[rows, rgt] - vel[rows, lft]))
+    vcen = (vel[rows, rgt] + vel[rows, lft]) / 2.
+    mean = Dv / 2.
+
+    # pw97
+    imn = np.argmin(np.where(valid, np.abs(cumtau - 0.5), np.inf), axis=1)
+    imx = np.argmax(np.where(valid, stau, -np.inf), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fmm = np.abs((vel[rows, imn] - vcen) / mean)
+        fedg = np.abs((vel[rows, imx] - vcen) / mean)
+
+    # CGM;  centroid
+    delta_v = np.sum(np.where(valid, vel, 0.) * stau, axis=1) / tottau
+    # X "Covering" test
+    ninpix = rgt - lft + 1
+    tau_covering = (cumstau[rows, rgt] - np.where(lft > 0, cumstau[rows, lft-1], 0.)) / ninpix
+    pix = np.arange(npix)
+    inpix = (pix >= lft[:, None]) & (pix <= rgt[:, None])
+    ncover = np.sum(inpix & (stau > cov_thresh * tau_covering[:, None]), axis=1)
+    X_fcover = ncover / ninpix
+    # Peak
+    tau_zero = stau[rows, imx]
+    v_peak = vel[rows, imx]
+    zpix = valid & (np.abs(np.where(valid, vel, np.inf)) < dv_zeropk.to('km/s').value)
+    mx_ztau = np.max(np.where(zpix, stau, -np.inf), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zero_pk = np.where(np.any(zpix, axis=1),
+                           np.maximum(0., np.minimum(mx_ztau / tau_zero, 1.)), 0.)
+    # Forbes "Covering"
+    dv = np.abs(vel[:, 1] - vel[:, 0])
+    JF_fcover = dv * tottau / tau_zero
+
+    # Table
+    kin_tbl = Table()
+    kin_tbl['Dv'] = Dv * u.km/u.s
+    kin_tbl['fmm'] = fmm
+    kin_tbl['fedg'] = fedg
+    kin_tbl['delta_v'] = delta_v * u.km/u.s
+    kin_tbl['X_fcover'] = X_fcover
+    kin_tbl['v_peak'] = v_peak * u.km/u.s
+    kin_tbl['zero_pk'] = zero_pk
+    kin_tbl['JF_fcover'] = JF_fcover * u.km/u.s
+    return kin_tbl
@@ -306,6 +306,177 @@ def sum_logN(obj1, obj2):
     return flag_N, logN, sig_logN
 
 
+def _group_by_key(key):
+    """ Unique keys, group index per element and the group starts
+    of the elements sorted (stably) by group
+    """
+    ukeys, inv = np.unique(np.asarray(key), return_inverse=True)
+    inv = inv.ravel()
+    order = np.argsort(inv, kind='stable')
+    gsort = inv[order]
+    starts = np.flatnonzero(np.diff(gsort, prepend=-1))
+    return ukeys, inv, order, starts
+
+
+def _first_in_group(inv, idx, values, ngroup):
+    """ Element of idx with the smallest value in each group (first one in ties)
+    Returns -1 for groups without any element
+    """
+    first = np.full(ngroup, -1, dtype=int)
+    if idx.size == 0:
+        return first
+    srt = idx[np.lexsort((idx, values[idx], inv[idx]))]
+    gs = inv[srt]
+    keep = np.r_[True, gs[1:] != gs[:-1]]
+    first[gs[keep]] = srt[keep]
+    return first
+
+
+def synthesize_colm_by_key(key, flag_N, N, sig_N, nsig_upper=2.):
+    """ Synthesize linear column densities of many groups of measurements
+
+    Array version of the logic in AbsComponent.synthesize_colm:
+    detections (flag_N=1) are combined with a weighted mean and
+    override any limit, else the largest lower limit (flag_N=2) is
+    adopted, else the smallest upper limit (flag_N=3), taken as
+    max(N, nsig_upper*sig_N).  Entries with flag_N=0 are ignored.
+
+    Parameters
+    ----------
+    key : ndarray
+      Group label of each measurement
+    flag_N : int ndarray
+    N : ndarray
+      Linear column densities
+    sig_N : ndarray
+      Errors, shape (n,) or (n,2);  the weights use the mean of the two
+    nsig_upper : float, optional
+
+    Returns
+    -------
+    ukeys : ndarray
+      Sorted unique keys
+    flag_N : int ndarray
+    N : ndarray
+    sig_N : ndarray
+      Same trailing shape as the input
+    """
+    flag_N = np.asarray(flag_N).astype(int)
+    N = np.asarray(N, dtype=float)
+    sig_N = np.asarray(sig_N, dtype=float)
+    sig2 = sig_N.reshape(N.size, -1)
+    sbar = np.mean(sig2, axis=1)
+    # Checks
+    if np.any(~np.isin(flag_N, [0, 1, 2, 3])):
+        raise ValueError("Bad flag_N value")
+    if np.any((flag_N != 0) & np.isclose(N, 0.)):
+        raise ValueError("Need to set N in attrib.  \n Consider linear_clm in linetools.analysis.absline")
+    ukeys, inv, _, _ = _group_by_key(key)
+    ngroup = ukeys.size
+    idx = np.arange(N.size)
+    # Detections;  weighted mean
+    det = flag_N == 1
+    ndet = np.bincount(inv, weights=det, minlength=ngroup)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(det, 1./sbar**2, 0.)
+    wsum = np.bincount(inv, weights=weight, minlength=ngroup)
+    wN = np.bincount(inv, weights=weight*np.where(det, N, 0.), minlength=ngroup)
+    idet = _first_in_group(inv, idx[det], idx, ngroup)
+    # Lower limits;  largest value
+    ilow = _first_in_group(inv, idx[flag_N == 2], -N, ngroup)
+    # Upper limits;  smallest value
+    Nupper = np.maximum(N, nsig_upper*sbar)
+    iup = _first_in_group(inv, idx[flag_N == 3], Nupper, ngroup)
+    # Fill
+    out_flag = np.select([ndet > 0, ilow >= 0, iup >= 0], [1, 2, 3], default=0)
+    isel = np.select([ndet > 0, ilow >= 0, iup >= 0], [idet, ilow, iup], default=-1)
+    out_N = np.zeros(ngroup)
+    out_sig = np.zeros((ngroup, sig2.shape[1]))
+    has = isel >= 0
+    out_N[has] = N[isel[has]]
+    out_sig[has] = sig2[isel[has]]
+    out_N[out_flag == 3] = Nupper[isel[out_flag == 3]]
+    mean = ndet > 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out_N[mean] = wN[mean] / wsum[mean]
+        out_sig[mean] = np.sqrt(1./wsum[mean])[:, np.newaxis]
+    if sig_N.ndim < 2:
+        out_sig = out_sig[:, 0]
+    return ukeys, out_flag, out_N, out_sig
+
+
+def sum_logN_by_key(key, flag_N, logN, sig_logN):
+    """ Sum log columns of many groups of measurements, with logic
+
+    Array version of folding sum_logN over each group, in input
+    order.  Detections and lower limits are summed and take
+    precedence over the upper limits, which only inflate the error.
+    Entries with flag_N=0 are ignored.
+
+    Parameters
+    ----------
+    key : ndarray
+      Group label of each measurement
+    flag_N : int ndarray
+    logN : ndarray
+    sig_logN : ndarray
+      Errors, shape (n,) or (n,2)
+
+    Returns
+    -------
+    ukeys : ndarray
+      Sorted unique keys
+    flag_N : int ndarray
+    logN : ndarray
+    sig_logN : ndarray
+      Same trailing shape as the input
+    """
+    flag_N = np.asarray(flag_N).astype(int)
+    logN = np.asarray(logN, dtype=float)
+    sig_logN = np.asarray(sig_logN, dtype=float)
+    if np.any(~np.isin(flag_N, [0, 1, 2, 3])):
+        raise ValueError("flag_N must be 0,1,2,3")
+    ukeys, inv, order, starts = _group_by_key(key)
+    # Work in grouped order
+    gg = inv[order]
+    flag = flag_N[order]
+    Nval = 10.**logN[order]
+    sig = sig_logN.reshape(logN.size, -1)[order]
+    Err = sig * Nval[:, np.newaxis]
+    pos = np.arange(gg.size)
+    # Detections (or lower limits) take over from the first one onwards
+    det = (flag == 1) | (flag == 2)
+    hasdet = np.add.reduceat(det, starts) > 0
+    first_det = np.minimum.reduceat(np.where(det, pos, gg.size), starts)
+    active = (flag > 0) & (~hasdet[gg] | (pos >= first_det[gg]))
+    # Running sum of the detections preceding each upper limit
+    Ndet = np.where(active & det, Nval, 0.)
+    Ncum = np.cumsum(Ndet)
+    Ncum -= (Ncum - Ndet)[starts][gg]
+    # Each upper limit after a detection scales the running error by (Ncum/(Ncum+N))
+    lim = active & (flag == 3) & hasdet[gg]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lnR = np.where(lim, 2*np.log(Ncum/(Ncum+Nval)), 0.)
+    cum = np.cumsum(lnR)
+    cum -= (cum - lnR)[starts][gg]
+    suffix = np.add.reduceat(lnR, starts)[gg] - cum + lnR
+    Err2 = np.where(active[:, np.newaxis], Err**2 * np.exp(suffix)[:, np.newaxis], 0.)
+    # Sums
+    Nsum = np.add.reduceat(np.where(active & (det | ~hasdet[gg]), Nval, 0.), starts)
+    Esum = np.sqrt(np.add.reduceat(Err2, starts, axis=0))
+    sat = np.add.reduceat(active & (flag == 2), starts) > 0
+    anyval = np.add.reduceat(active, starts) > 0
+    out_flag = np.where(hasdet, np.where(sat, 2, 1), np.where(anyval, 3, 0))
+    # Groups without values keep their first entry
+    out_logN = logN[order][starts]
+    out_sig = sig[starts]
+    out_logN[anyval] = np.log10(Nsum[anyval])
+    out_sig[anyval] = Esum[anyval] / Nsum[anyval, np.newaxis]
+    if sig_logN.ndim < 2:
+        out_sig = out_sig[:, 0]
+    return ukeys, out_flag, out_logN, out_sig
+
+
 def get_tau0(wrest, fosc, N, b):
     """Get the value of the optical depth at the line center,
     tau0. Taken from Draine 2011 (see Chapter 9). It neglects stimulated
@@ -6,28 +6,62 @@ import os
 import warnings
 import pdb
 
-from scipy import integrate
-from scipy.interpolate import interp1d
-
 from astropy import units as u
-from astropy.modeling import FittableModel, Parameter
-from astropy.modeling import fitting
 
 # Begin
 def _ftau_intgrnd(x,tau0=0.1):
     return 1 - np.exp(-tau0 * np.exp(-x**2))
 
-# Generate Ftau (could archive, but this is reasonably fast)
+# Grid for Ftau
 neval = 10000
 lgt = np.linspace(-3, 9, neval)
 all_tau0 = 10.**lgt
-#
-xFtau0 = np.zeros(neval)
-for jj,tau0 in enumerate(all_tau0):
-    xFtau0[jj], ferr = integrate.quad(_ftau_intgrnd, 0, np.inf, args=(tau0,))
 
-# Now interpolate
-intFtau0 = interp1d(all_tau0, xFtau0, bounds_error=False,fill_value=0.)
+# Built on first use (see _lazy):  the Ftau table takes 10,000 quad
+# integrals and astropy.modeling is slow to import
+_LAZY = ('xFtau0', 'intFtau0', '_lgFtau0', '_dlgFtau0', 'single_cog_model')
+
+
+def _ftau_table():
+    """ Tabulate Ftau on all_tau0 (10,000 quad integrals)
+    """
+    from scipy import integrate
+    from scipy.interpolate import interp1d
+    xFtau0 = np.zeros(neval)
+    for jj,tau0 in enumerate(all_tau0):
+        xFtau0[jj], ferr = integrate.quad(_ftau_intgrnd, 0, np.inf, args=(tau0,))
+    # Now interpolate
+    intFtau0 = interp1d(all_tau0, xFtau0, bounds_error=False,fill_value=0.)
+    # Log-space version of the same table for fast, vectorized evaluation
+    _lgFtau0 = np.log10(xFtau0)
+    _dlgFtau0 = np.gradient(_lgFtau0, lgt)  # dlog F / dlog tau0
+    return dict(xFtau0=xFtau0, intFtau0=intFtau0, _lgFtau0=_lgFtau0, _dlgFtau0=_dlgFtau0)
+
+
+def _lazy(name):
+    """ One of the _LAZY attributes, built on first use
+    """
+    if name not in globals():
+        if name == 'single_cog_model':
+            globals()[name] = _single_cog_model()
+        else:
+            globals().update(_ftau_table())
+    return globals()[name]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return _lazy(name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+# Speed of light (km/s) and tau0 constant, as in single_cog_model
+_c_kms = 3e5
+_tau0_cst = 1.497e-15
 
 ##############################
 def cog_plot(COG_dict):
@@ -58,7 +92,7 @@ def cog_plot(COG_dict):
     xval = np.log10(COG_dict['f']*COG_dict['wrest'].to('cm').value)
     xmod = np.linspace(np.min(xval), np.max(xval), 200)
     tau0 = 1.497e-15*(10**(xmod+8))*(10.**COG_dict['logN'])/COG_dict['b'].to('km/s').value
-    Ftau0 = intFtau0(tau0)
+    Ftau0 = _lazy('intFtau0')(tau0)
     ymod = np.log10(2*COG_dict['b'].to('km/s').value*Ftau0/3e5)
     #pdb.set_trace()
     ax.plot(xmod,ymod,'g--')
@@ -107,8 +141,9 @@ def single_cog_analysis(wrest, f, EW, sig_EW=None, guesses=None):
     # Weights
     if sig_EW is not None:
         weights = (wrest/sig_EW)**2
+    from astropy.modeling import fitting
     # COG model
-    cog_model = single_cog_model(logN=logN, b=b)
+    cog_model = _lazy('single_cog_model')(logN=logN, b=b)
     # Fitter
     fitter = fitting.LevMarLSQFitter(calc_uncertainties=True)
     # Fit
@@ -128,32 +163,240 @@ def single_cog_analysis(wrest, f, EW, sig_EW=None, guesses=None):
     # Return
     return COG_dict
 
-class single_cog_model(FittableModel):
-    """Generate a single COG model
+def _Ftau0_and_slope(tau0):
+    """ Evaluate F(tau0) and its logarithmic slope dlnF/dlntau0
+
+    Linear interpolation in log-space on the tabulated F(tau0).
+    The optically thin (series) and damped (sqrt(ln tau0)) limits
+    are used beyond the table.
+
+    Parameters
+    ----------
+    tau0 : float or ndarray
+
+    Returns
+    -------
+    Ftau : ndarray
+    slope : ndarray
+    """
+    tau0 = np.atleast_1d(np.asarray(tau0, dtype=float))
+    Ftau = np.zeros_like(tau0)
+    slope = np.ones_like(tau0)
+    gd = tau0 > 0.
+    lgtau = np.log10(tau0[gd])
+    Ftau[gd] = 10.**np.interp(lgtau, lgt, _lazy('_lgFtau0'))
+    slope[gd] = np.interp(lgtau, lgt, _lazy('_dlgFtau0'))
+    # Optically thin; F = sqrt(pi)/2 * tau0 * (1 - tau0/sqrt(2))
+    thin = gd & (tau0 < all_tau0[0])
+    Ftau[thin] = 0.5*np.sqrt(np.pi) * tau0[thin] * (1 - tau0[thin]/np.sqrt(2.))
+    slope[thin] = 1. - tau0[thin]/(np.sqrt(2.) - tau0[thin])
+    # Very optically thick;  F ~ sqrt(ln(tau0) + gamma_E), pinned to the table
+    thick = tau0 > all_tau0[-1]
+    lnt = np.log(tau0[thick]) + np.euler_gamma
+    lnt_end = np.log(all_tau0[-1]) + np.euler_gamma
+    Ftau[thick] = _lazy('xFtau0')[-1] * np.sqrt(lnt / lnt_end)
+    slope[thick] = 0.5 / lnt
+    return Ftau, slope
+
+
+def Ftau0(tau0):
+    """ Fast, vectorized evaluation of the COG integral F(tau0)
+
+    Alternative to intFtau0 that interpolates in log-space and
+    extends beyond the tabulated range with the asymptotic forms.
+
+    Parameters
+    ----------
+    tau0 : float or ndarray
+      Optical depth at line center
+
+    Returns
+    -------
+    Ftau : float or ndarray
+    """
+    Ftau, _ = _Ftau0_and_slope(tau0)
+    if np.isscalar(tau0):
+        return Ftau[0]
+    return Ftau.reshape(np.shape(tau0))
+
+
+def batch_cog_analysis(wrest, f, EW, comp_id, sig_EW=None, guesses=None,
+                       niter=50, tol=1e-6, bmin=0.1):
+    """Perform COG analysis on many components at once
+
+    All components are fitted simultaneously with vectorized
+    Levenberg-Marquardt (damped Gauss-Newton) iterations on
+    a stacked (logN, b) parameter array.
 
     Parameters
     ----------
-    logN
-    b
+    wrest : Quantity array
+      Rest wavelengths of all the lines
+    f : float array
+      f-values
+    EW : Quantity array
+      Measured rest-frame EWs
+    comp_id : array
+      Component label for each line (int or str)
+    sig_EW : Quantity array, optional
+      Measured sig_EWs.  If not given, lines are weighted equally
+      and the covariance is scaled by the reduced chi^2
+    guesses : tuple of float,float, optional
+      Guesses for logN, b (km/s); scalars or arrays with one entry
+      per unique comp_id (sorted).  The default takes the largest
+      optically thin column of the lines and b=10 km/s
+    niter : int, optional
+      Maximum number of iterations
+    tol : float, optional
+      Convergence criterion on the relative change in chi^2
+    bmin : float, optional
+      Minimum allowed b-value (km/s)
 
-    input : wrest*f
-    output : redEW
-      reduced EWs
+    Returns
+    -------
+    cog_tbl : Table
+      One row per component, with columns
+       * comp_id
+       * logN, sig_logN
+       * b, sig_b (km/s)
+       * covar : 2x2 covariance of (logN, b)
+       * chi2, nline, niter
+       * flag_conv : bool
     """
-    inputs = ('wrestxf',)
-    outputs = ('redEW',)
-
-    # Free parameters (generally)
-    logN=Parameter()
-    b=Parameter()  # Assumes km/s
-
-    # Fixed parameters
-
-    @staticmethod
-    def evaluate(wrestf,logN,b):
-        # F(tau0)
-        tau0 = 1.497e-15*(wrestf)*(10.**logN)/b
-        Ftau0 = intFtau0(tau0)
-        # Finish
-        redEW = 2*b*Ftau0/3e5
-        return redEW
+    from astropy.table import Table
+    # Flatten the inputs
+    wvf = wrest.to('AA').value * np.asarray(f, dtype=float)
+    redEW = (EW / wrest).decompose().value
+    if sig_EW is not None:
+        wgt = 1. / (sig_EW / wrest).decompose().value**2
+    else:
+        wgt = np.ones_like(redEW)
+    uid, cidx = np.unique(comp_id, return_inverse=True)
+    ncomp = uid.size
+    nline = np.bincount(cidx, minlength=ncomp)
+
+    def _sum(vals):
+        return np.bincount(cidx, weights=vals, minlength=ncomp)
+
+    def _model(logN, b):
+        tau0 = _tau0_cst * wvf * 10.**logN[cidx] / b[cidx]
+        Ftau, slope = _Ftau0_and_slope(tau0)
+        return 2*b[cidx]*Ftau/_c_kms, Ftau, slope
+
+    # Guesses
+    if guesses is None:
+        lin_N = redEW * _c_kms / (np.sqrt(np.pi) * _tau0_cst * wvf)
+        logN = np.full(ncomp, -np.inf)
+        np.maximum.at(logN, cidx, np.log10(np.maximum(lin_N, 1.)))
+        logN[~np.isfinite(logN)] = 14.
+        b = np.full(ncomp, 10.)
+    else:
+        logN = np.ones(ncomp) * np.asarray(guesses[0], dtype=float)
+        b = np.ones(ncomp) * np.asarray(guesses[1], dtype=float)
+
+    # Iterate
+    lam = np.full(ncomp, 1e-3)
+    model, Ftau, slope = _model(logN, b)
+    chi2 = _sum(wgt * (redEW - model)**2)
+    conv = np.zeros(ncomp, dtype=bool)
+    nit = np.zeros(ncomp, dtype=int)
+    for kk in range(niter):
+        # Jacobian
+        J0 = 2*b[cidx]*Ftau*slope*np.log(10.)/_c_kms
+        J1 = 2*Ftau*(1.-slope)/_c_kms
+        resid = redEW - model
+        A00, A01, A11 = _sum(wgt*J0*J0), _sum(wgt*J0*J1), _sum(wgt*J1*J1)
+        g0, g1 = _sum(wgt*J0*resid), _sum(wgt*J1*resid)
+        # Damped 2x2 solve
+        D00, D11 = A00*(1+lam), A11*(1+lam)
+        det = D00*D11 - A01**2
+        ok = (det > 0.) & ~conv
+        det[~ok] = 1.
+        dlogN = np.where(ok, (D11*g0 - A01*g1)/det, 0.)
+        db = np.where(ok, (D00*g1 - A01*g0)/det, 0.)
+        # Trial step
+        new_logN = logN + dlogN
+        new_b = np.maximum(b + db, bmin)
+        new_model, new_Ftau, new_slope = _model(new_logN, new_b)
+        new_chi2 = _sum(wgt * (redEW - new_model)**2)
+        better = ok & (new_chi2 <= chi2)
+        # Update
+        logN[better] = new_logN[better]
+        b[better] = new_b[better]
+        lam = np.where(better, lam/10., lam*10.)
+        conv |= better & ((chi2 - new_chi2) <= tol*np.maximum(chi2, 1e-30))
+        conv |= ~ok | (lam > 1e10)
+        nit[~conv] += 1
+        chi2[better] = new_chi2[better]
+        bline = better[cidx]
+        model[bline], Ftau[bline], slope[bline] = new_model[bline], new_Ftau[bline], new_slope[bline]
+        if np.all(conv):
+            break
+
+    # Covariance (undamped)
+    J0 = 2*b[cidx]*Ftau*slope*np.log(10.)/_c_kms
+    J1 = 2*Ftau*(1.-slope)/_c_kms
+    A00, A01, A11 = _sum(wgt*J0*J0), _sum(wgt*J0*J1), _sum(wgt*J1*J1)
+    det = A00*A11 - A01**2
+    covar = np.full((ncomp, 2, 2), np.nan)
+    gdc = det > 0.
+    covar[gdc, 0, 0] = A11[gdc]/det[gdc]
+    covar[gdc, 1, 1] = A00[gdc]/det[gdc]
+    covar[gdc, 0, 1] = covar[gdc, 1, 0] = -A01[gdc]/det[gdc]
+    if sig_EW is None:
+        dof = np.maximum(nline - 2, 1)
+        covar *= (chi2/dof)[:, None, None]
+
+    # Table
+    cog_tbl = Table()
+    cog_tbl['comp_id'] = uid
+    cog_tbl['logN'] = logN
+    cog_tbl['sig_logN'] = np.sqrt(covar[:, 0, 0])
+    cog_tbl['b'] = b * u.km/u.s
+    cog_tbl['sig_b'] = np.sqrt(covar[:, 1, 1]) * u.km/u.s
+    cog_tbl['covar'] = covar
+    cog_tbl['chi2'] = chi2
+    cog_tbl['nline'] = nline
+    cog_tbl['niter'] = nit
+    cog_tbl['flag_conv'] = conv & gdc
+    # Return
+    return cog_tbl
+
+
+def _single_cog_model():
+    """ Build the single_cog_model class
+    """
+    from astropy.modeling import FittableModel, Parameter
+
+    class single_cog_model(FittableModel):
+        """Generate a single COG model
+
+        Parameters
+        ----------
+        logN
+        b
+
+        input : wrest*f
+        output : redEW
+          reduced EWs
+        """
+        inputs = ('wrestxf',)
+        outputs = ('redEW',)
+
+        # Free parameters (generally)
+        logN=Parameter()
+        b=Parameter()  # Assumes km/s
+
+        # Fixed parameters
+
+        @staticmethod
+        def evaluate(wrestf,logN,b):
+            # F(tau0)
+            tau0 = 1.497e-15*(wrestf)*(10.**logN)/b
+            Ftau0 = _lazy('intFtau0')(tau0)
+            # Finish
+            redEW = 2*b*Ftau0/3e5
+            return redEW
+
+    single_cog_model.__qualname__ = 'single_cog_model'  # for pickle
+    return single_cog_model
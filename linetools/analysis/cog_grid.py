@@ -0,0 +1,272 @@
+""" Tabulated curves of growth, Wr(N, b), for fast forward and inverse lookups
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+
+from scipy.special import wofz
+from scipy.integrate import trapezoid
+
+from astropy import units as u
+from astropy import constants as const
+from astropy.units import Quantity
+
+# Grids are cached per transition and grid definition
+CACHE = {}
+
+c_kms = const.c.to('km/s').value
+# sqrt(pi) e^2/(m_e c) in cm^2 km/s / AA  [tau0 = cst * N * f * wrest / b]
+_tau0_cst = (np.sqrt(np.pi) * const.e.esu**2 / (const.m_e * const.c)).to('cm**2 km/(s AA)').value
+
+
+def _strip(val, unit):
+    """ Return a float array from a Quantity or a unitless input
+    """
+    if isinstance(val, Quantity):
+        return val.to(unit).value
+    return np.asarray(val, dtype=float)
+
+
+def exact_Wr(logN, b, wrest, fosc, gamma, nu=2000):
+    """ Exact rest-frame equivalent widths from the integral of a Voigt profile
+
+    The integral is performed on a uniform core grid joined to a
+    logarithmic wing grid, plus the analytic contribution of the
+    damping wings beyond the grid.
+
+    Parameters
+    ----------
+    logN : float or ndarray
+      log10 column densities (cm^-2)
+    b : float
+      Doppler parameter (km/s)
+    wrest : float
+      Rest wavelength (AA)
+    fosc : float
+      Oscillator strength
+    gamma : float
+      Damping constant (s^-1)
+    nu : int, optional
+      Number of points in the dimensionless frequency grid
+
+    Returns
+    -------
+    Wr : ndarray
+      Rest-frame equivalent widths (AA)
+    """
+    logN = np.atleast_1d(logN)
+    tau0 = _tau0_cst * 10.**logN * fosc * wrest / b
+    avoigt = gamma * wrest * 1e-13 / (4 * np.pi * b)  # wrest in km
+    # Frequency grid, in Doppler units, extending well into the wings
+    umax = max(20., 30.*np.sqrt(np.max(tau0) * avoigt / np.sqrt(np.pi)))
+    ucore = np.linspace(0., 10., nu//2)
+    uwing = np.logspace(1., np.log10(umax), nu - nu//2 + 1)[1:]
+    ugrid = np.concatenate([ucore, uwing])
+    Hprof = wofz(ugrid + 1j*avoigt).real
+    # Integrate
+    absorb = -np.expm1(-np.outer(tau0, Hprof))
+    integ = trapezoid(absorb, ugrid, axis=1)
+    # Optically thin damping wings beyond umax
+    integ += tau0 * avoigt / (np.sqrt(np.pi) * umax)
+    # Both sides of the line
+    Wr = 2 * (b / c_kms) * integ * wrest
+    return Wr
+
+
+class WrGrid(object):
+    """ Curve of growth for a single transition tabulated on a (logN, b) grid
+
+    Forward, Wr(logN, b), and inverse, logN(Wr, b), evaluations
+    are bilinear interpolations in (logN, log b, log Wr) and are
+    fully vectorized.
+
+    Parameters
+    ----------
+    wrest : Quantity
+      Rest wavelength
+    fosc : float
+      Oscillator strength
+    gamma : Quantity
+      Damping constant
+    logN : ndarray, optional
+      Uniform grid of log10 column densities;  default is 8 to 23 in steps of 0.02
+    b : Quantity array, optional
+      Doppler parameters, uniformly spaced in log;  default is 1 to 300 km/s
+    name : str, optional
+      Name of the transition
+    """
+
+    @classmethod
+    def from_transition(cls, transition, linelist=None, use_cache=True, **kwargs):
+        """ Generate (or grab from the CACHE) the grid for a transition
+
+        Parameters
+        ----------
+        transition : str
+          Name of the transition using linetools' naming
+          convention, e.g. 'HI 1215'.
+        linelist : LineList, optional
+          Default is LineList('ISM')
+        use_cache : bool, optional
+
+        Returns
+        -------
+        WrGrid
+        """
+        from linetools.lists.linelist import LineList
+        if linelist is None:
+            linelist = LineList('ISM')
+        transition_dict = linelist[transition]
+        if transition_dict is None:
+            raise ValueError('Transition {:s} not found within LineList {:s}'.format(transition, linelist.list))
+        return cls.from_atomic(transition_dict['wrest'], transition_dict['f'],
+                               transition_dict['gamma'], name=transition,
+                               use_cache=use_cache, **kwargs)
+
+    @classmethod
+    def from_atomic(cls, wrest, fosc, gamma, use_cache=True, **kwargs):
+        """ Generate (or grab from the CACHE) the grid for atomic data
+
+        Parameters
+        ----------
+        wrest : Quantity
+        fosc : float
+        gamma : Quantity
+        use_cache : bool, optional
+
+        Returns
+        -------
+        WrGrid
+        """
+        key = (round(float(wrest.to('AA').value), 4), float(fosc),
+               float(gamma.to('1/s').value))
+        if kwargs.get('logN') is not None:
+            key += (('logN',) + tuple(np.round(np.asarray(kwargs['logN'], dtype=float), 6)),)
+        if kwargs.get('b') is not None:
+            key += (('b',) + tuple(np.round(_strip(kwargs['b'], 'km/s'), 6)),)
+        if use_cache and key in CACHE:
+            return CACHE[key]
+        slf = cls(wrest, fosc, gamma, **kwargs)
+        if use_cache:
+            CACHE[key] = slf
+        return slf
+
+    def __init__(self, wrest, fosc, gamma, logN=None, b=None, name=None):
+        # Atomic data
+        self.wrest = wrest.to('AA')
+        self.fosc = fosc
+        self.gamma = gamma.to('1/s')
+        self.name = name
+        # Grids
+        if logN is None:
+            logN = np.arange(8., 23.+1e-6, 0.02)
+        if b is None:
+            b = np.logspace(0., np.log10(300.), 60) * u.km/u.s
+        self.logN = np.asarray(logN, dtype=float)
+        self.b = Quantity(b).to('km/s')
+        self._lgb = np.log10(self.b.value)
+        self._dlogN = self.logN[1] - self.logN[0]
+        self._dlgb = self._lgb[1] - self._lgb[0]
+        if (not np.allclose(np.diff(self.logN), self._dlogN)) or (
+                not np.allclose(np.diff(self._lgb), self._dlgb)):
+            raise ValueError('WrGrid: logN and log10(b) grids must be uniformly spaced')
+        # Tabulate
+        self.calc_grid()
+
+    def calc_grid(self):
+        """ Evaluate the exact Voigt curve of growth on the grid
+        Sets self.lgWr, log10 Wr (AA) with shape (nlogN, nb)
+        """
+        wrest = self.wrest.value
+        fosc = self.fosc
+        gamma = self.gamma.value
+        self.lgWr = np.zeros((self.logN.size, self.b.size))
+        for jj, bval in enumerate(self.b.value):
+            self.lgWr[:, jj] = np.log10(exact_Wr(self.logN, bval, wrest, fosc, gamma))
+        # Column-major flattened array, offset per b-column, for the inverse
+        self._lgWr_min = np.min(self.lgWr)
+        self._offset = np.max(self.lgWr) - self._lgWr_min + 1.
+        self._flat = (self.lgWr - self._lgWr_min +
+                      self._offset * np.arange(self.b.size)).T.ravel()
+
+    def _bindex(self, b):
+        """ Fractional index and weights along the log b axis
+        """
+        xb = (np.log10(_strip(b, 'km/s')) - self._lgb[0]) / self._dlgb
+        jb = np.clip(np.floor(xb).astype(int), 0, self.b.size-2)
+        wb = xb - jb
+        bad = (xb < -1e-9) | (xb > self.b.size - 1 + 1e-9)
+        return jb, wb, bad
+
+    def Wr(self, logN, b):
+        """ Rest-frame equivalent width for input logN and b
+
+        Parameters
+        ----------
+        logN : float or ndarray
+          log10 column density
+        b : Quantity or float or ndarray
+          Doppler parameter;  assumed km/s if unitless.
+          Broadcast against logN
+
+        Returns
+        -------
+        Wr : Quantity
+          Rest-frame EW (AA);  NaN outside the grid
+        """
+        logN, b = np.broadcast_arrays(np.asarray(logN, dtype=float), _strip(b, 'km/s'))
+        xN = (logN - self.logN[0]) / self._dlogN
+        iN = np.clip(np.floor(xN).astype(int), 0, self.logN.size-2)
+        wN = xN - iN
+        jb, wb, bad = self._bindex(b)
+        bad |= (xN < -1e-9) | (xN > self.logN.size - 1 + 1e-9)
+        lgW = ((1-wN)*(1-wb)*self.lgWr[iN, jb] + wN*(1-wb)*self.lgWr[iN+1, jb] +
+               (1-wN)*wb*self.lgWr[iN, jb+1] + wN*wb*self.lgWr[iN+1, jb+1])
+        lgW = np.where(bad, np.nan, lgW)
+        return 10.**lgW * u.AA
+
+    def _logN_at_column(self, lgW, jb):
+        """ Inverse interpolation of log Wr along fixed b-columns of the grid
+        """
+        nN = self.logN.size
+        val = lgW - self._lgWr_min + self._offset * jb
+        idx = np.searchsorted(self._flat, val) - jb*nN
+        bad = (idx <= 0) | (idx >= nN)
+        idx = np.clip(idx, 1, nN-1)
+        lo = self._flat[jb*nN + idx - 1]
+        hi = self._flat[jb*nN + idx]
+        frac = (val - lo) / (hi - lo)
+        logN = self.logN[idx-1] + frac * self._dlogN
+        return np.where(bad, np.nan, logN)
+
+    def logN_from_Wr(self, Wr, b):
+        """ Column density for input Wr and b (inverse curve of growth)
+
+        Parameters
+        ----------
+        Wr : Quantity or float or ndarray
+          Rest-frame EW;  assumed AA if unitless
+        b : Quantity or float or ndarray
+          Doppler parameter;  assumed km/s if unitless.
+          Broadcast against Wr
+
+        Returns
+        -------
+        logN : ndarray
+          log10 column density;  NaN when Wr (or b) is off the grid
+        """
+        Wr, b = np.broadcast_arrays(_strip(Wr, 'AA'), _strip(b, 'km/s'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lgW = np.log10(Wr)
+        jb, wb, bad = self._bindex(b)
+        logN = ((1-wb) * self._logN_at_column(lgW, jb) +
+                wb * self._logN_at_column(lgW, jb+1))
+        return np.where(bad | ~np.isfinite(lgW), np.nan, logN)
+
+    def __repr__(self):
+        txt = '<{:s}:'.format(self.__class__.__name__)
+        if self.name is not None:
+            txt += ' {:s},'.format(self.name)
+        txt += ' wrest={:.4f}, logN=[{:.2f},{:.2f}], b=[{:.1f},{:.1f}]>'.format(
+            self.wrest, self.logN[0], self.logN[-1], self.b[0].value, self.b[-1].value)
+        return txt
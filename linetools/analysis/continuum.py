@@ -67,7 +67,7 @@ def make_chunks_qso(wa, redshift, divmult=1, forest_divmult=1, debug=False):
     return edges[i0:i2]
 
 
-def update_knots(knots, indices, fl, masked):
+def update_knots(knots, indices, fl, masked, ichunks=None):
     """ Calculate the y position of each knot.
 
     Updates `knots` inplace.
@@ -82,10 +82,16 @@ def update_knots(knots, indices, fl, masked):
     fl, masked: arrays shape (M,)
        The flux, and boolean arrays showing which pixels are
        masked.
+    ichunks: iterable of int, optional
+       Only update the knots of these chunks (e.g. those whose
+       masked pixels changed). Default is to update all of them.
     """
 
     iy, iflag = 1, 2
-    for iknot,(i1,i2) in enumerate(indices):
+    if ichunks is None:
+        ichunks = range(len(indices))
+    for iknot in ichunks:
+        i1, i2 = indices[iknot]
         if knots[iknot][iflag]:
             continue
 
@@ -116,6 +122,104 @@ def Akima_co(wa, knots):
     return spl(wa)
 
 
+class IncrementalContinuum(object):
+    """ Linear and Akima continua through a set of knots, which are
+    only re-evaluated over the pixels affected by changed knots.
+
+    The models are identical to those of linear_co() and Akima_co().
+
+    Parameters
+    ----------
+    wa : array
+      Wavelengths;  must be sorted
+    knots : list of [xpos, ypos, bool]
+      The knots.  Their x positions cannot change.
+    """
+    def __init__(self, wa, knots):
+        self.wa = wa
+        x = np.array([k[0] for k in knots], dtype=float)
+        if len(x) < 3:
+            raise ValueError("Need at least 3 knots")
+        self.x = x
+        # Pixel boundaries of the intervals between knots
+        self._ipix = np.concatenate([[0], wa.searchsorted(x[1:-1]), [len(wa)]])
+        # First and last pixels within the knots
+        self._iend = (wa.searchsorted(x[0]), wa.searchsorted(x[-1], side='right') - 1)
+        self.y = None
+        self.linear = None
+        self.akima = None
+        self.spl = None
+
+    def _ext_knots(self, y):
+        """ Knots of linear_co(), extended at both ends """
+        x = self.x
+        extx = np.concatenate([[x[0] - (x[1] - x[0])], x, [x[-1] + (x[-1] - x[-2])]])
+        exty = np.concatenate([[y[0] - (y[1] - y[0])], y, [y[-1] + (y[-1] - y[-2])]])
+        return extx, exty
+
+    def _slices(self, changed):
+        """ Contiguous pixel slices covering the changed intervals """
+        slices = []
+        ivals = np.where(changed)[0]
+        if len(ivals) == 0:
+            return slices
+        breaks = np.where(np.diff(ivals) > 1)[0]
+        for i0, i1 in zip(np.concatenate([[ivals[0]], ivals[breaks+1]]),
+                          np.concatenate([ivals[breaks], [ivals[-1]]])):
+            if self._ipix[i1+1] > self._ipix[i0]:
+                slices.append(slice(self._ipix[i0], self._ipix[i1+1]))
+        return slices
+
+    def _extend(self, slc):
+        """ Extend a pixel slice touching the spectrum edges so that the
+        linear extrapolation of the AkimaSpline beyond the end knots
+        (which uses the two outermost interior pixels) is unchanged """
+        start, stop = slc.start, slc.stop
+        if start == 0:
+            stop = max(stop, self._iend[0] + 2)
+        if stop == len(self.wa):
+            start = min(start, self._iend[1] - 1)
+        return slice(start, stop)
+
+    def update(self, knots):
+        """ Update the models for new knot values
+
+        Parameters
+        ----------
+        knots : list of [xpos, ypos, bool]
+
+        Returns
+        -------
+        linear, akima : arrays
+          The linear and Akima continua (updated inplace;  do not modify)
+        """
+        y = np.array([k[1] for k in knots], dtype=float)
+        extx, exty = self._ext_knots(y)
+        spl = AkimaSpline(self.x, y)
+        if self.y is None:
+            self.linear = np.interp(self.wa, extx, exty)
+            self.akima = spl(self.wa)
+        else:
+            # Linear: intervals touching a changed knot (ends use 2 knots)
+            dy = y != self.y
+            dy[:2] |= np.any(dy[:2])
+            dy[-2:] |= np.any(dy[-2:])
+            lin_changed = dy[:-1] | dy[1:]
+            for slc in self._slices(lin_changed):
+                self.linear[slc] = np.interp(self.wa[slc], extx, exty)
+            # Akima: intervals whose coefficients changed
+            akm_changed = ((spl.yvals[:-1] != self.spl.yvals[:-1]) |
+                           (spl.b[:-1] != self.spl.b[:-1]) |
+                           (spl.c != self.spl.c) | (spl.d != self.spl.d))
+            for slc in self._slices(akm_changed):
+                ext = self._extend(slc)
+                vals = spl(self.wa[ext])
+                self.akima[slc] = vals[slc.start - ext.start:slc.stop - ext.start]
+        self.y = y
+        self.spl = spl
+        return self.linear, self.akima
+
+
 def remove_bad_knots(knots, indices, masked, fl, er, debug=False):
     """ Remove knots in chunks without any good pixels. Modifies
     inplace."""
@@ -229,14 +333,21 @@ def unmask(masked, indices, wa, fl, er, minpix=3):
 def estimate_continuum(s, knots, indices, masked, ax=None, maxiter=100,
                        nsig=1.5, debug=False):
     """ Iterate to estimate the continuum.
+
+    After the first iteration, only knots in chunks where the masked
+    pixels changed are updated, and the continuum models are only
+    re-evaluated around knots that moved (see IncrementalContinuum).
     """
+    model_co = IncrementalContinuum(s.wa, knots)
+    chunk_start = np.array([i for i, j in indices])
+    chunk_end = np.array([j for i, j in indices])
+    ichunks = None
     count = 0
     while True:
         if debug:
             print('iteration', count)
-        update_knots(knots, indices, s.fl, masked)
-        model = linear_co(s.wa, knots)
-        model_a = Akima_co(s.wa, knots)
+        update_knots(knots, indices, s.fl, masked, ichunks=ichunks)
+        model, model_a = model_co.update(knots)
         chisq_chunk(model_a, s.fl, s.er, masked,
                     indices, knots, chithresh=1)
         flags = list(zip(*knots))[-1]
@@ -245,22 +356,25 @@ def estimate_continuum(s, knots, indices, masked, ax=None, maxiter=100,
                 print('All regions have satisfactory fit, stopping')
             break
         # remove outliers
-        c0 = ~masked
         resid = (model - s.fl) / s.er
         oldmasked = masked.copy()
         masked[(resid > nsig) & ~masked] = True
         unmask(masked, indices, s.wa, s.fl, s.er)
-        if np.all(oldmasked == masked):
+        ipix = np.where(oldmasked != masked)[0]
+        if len(ipix) == 0:
             if debug:
                 print('No further points masked, stopping')
             break
         if count > maxiter:
             warnings.warn('Exceeded maximum iterations. Continue at your own risk..')
             break
+        # Chunks with newly masked pixels
+        ichunk = np.maximum(chunk_start.searchsorted(ipix, side='right') - 1, 0)
+        ichunks = np.unique(ichunk[ipix < chunk_end[ichunk]])
 
         count +=1
 
-    co = Akima_co(s.wa, knots)
+    co = model_co.update(knots)[1].copy()
     c0 = co <= 0
     co[c0] = 0
 
@@ -316,17 +430,25 @@ def find_continuum(spec, edges=None, ax=None, debug=False, kind='QSO',
       continuum from these knots.
     """
 
-    s = np.rec.fromarrays([spec.wavelength.value,
-                           spec.flux.value,
-                           spec.sig], names=str('wa,fl,er'))
+    if 'redshift' not in kwargs and 'redshift' in spec.meta:
+        kwargs['redshift'] = spec.meta['redshift']
+
+    return _find_continuum(spec.wavelength.value, spec.flux.value, spec.sig,
+                           edges=edges, ax=ax, debug=debug, kind=kind, **kwargs)
+
+
+def _find_continuum(wa, fl, er, edges=None, ax=None, debug=False, kind='QSO',
+                    **kwargs):
+    """ Estimate a continuum from wavelength, flux and error arrays.
+    See find_continuum() for the parameters and returned values.
+    """
+    s = np.rec.fromarrays([wa, fl, er], names=str('wa,fl,er'))
 
     if edges is not None:
         edges = list(edges)
     elif kind.upper() == 'QSO':
         if 'redshift' in kwargs:
             z = kwargs['redshift']
-        elif 'redshift' in spec.meta:
-            z = spec.meta['redshift']
         else:
             raise RuntimeError(
                 "I need the emission redshift for kind='qso'; please\
@@ -359,3 +481,76 @@ def find_continuum(spec, edges=None, ax=None, debug=False, kind='QSO',
         ax.set_ylim(-0.02*ymax, 1.1*ymax)
 
     return co, [k[:2] for k in knots]
+
+
+def _find_continuum_worker(args):
+    """ Run _find_continuum() on a tuple of (wa, fl, er, kwargs);
+    used by find_continuum_batch() """
+    wa, fl, er, kwargs = args
+    return _find_continuum(wa, fl, er, **kwargs)
+
+
+def find_continuum_batch(specs, redshifts=None, nproc=None, **kwargs):
+    """ Estimate the continua of many spectra, in parallel.
+
+    Each spectrum is fit independently with find_continuum() on a pool
+    of processes.
+
+    Parameters
+    ----------
+    specs : list of XSpectrum1D, or XSpectrum1D
+      The spectra.  For an XSpectrum1D with nspec > 1, each of
+      its spectra is fit.
+    redshifts : float or array of float, optional
+      QSO emission redshift(s), one per spectrum.  If not given,
+      spec.meta['redshift'] is used for kind='QSO'.
+    nproc : int, optional
+      Number of processes.  Default is the number of CPUs;
+      nproc=1 fits the spectra serially in this process.
+
+    Additional keywords are passed to find_continuum() (e.g. kind,
+    edges, divmult, forest_divmult), but not `ax`.
+
+    Returns
+    -------
+    results : list of (co, contpoints)
+      One tuple per spectrum, as returned by find_continuum()
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Extract the arrays
+    if not isinstance(specs, (list, tuple)):
+        select = specs.select
+        all_specs = []
+        for ii in range(specs.nspec):
+            specs.select = ii
+            all_specs.append((specs.wavelength.value, specs.flux.value,
+                              specs.sig.value, specs.meta))
+        specs.select = select
+    else:
+        all_specs = [(spec.wavelength.value, spec.flux.value, spec.sig.value,
+                      spec.meta) for spec in specs]
+    nspec = len(all_specs)
+    if redshifts is not None:
+        if np.size(redshifts) not in (1, nspec):
+            raise IOError("Need one redshift per spectrum")
+        redshifts = np.broadcast_to(np.asarray(redshifts, dtype=float).ravel(), (nspec,))
+
+    args = []
+    for ii, (wa, fl, er, meta) in enumerate(all_specs):
+        ikwargs = dict(kwargs)
+        if redshifts is not None:
+            ikwargs['redshift'] = redshifts[ii]
+        elif 'redshift' not in ikwargs and 'redshift' in meta:
+            ikwargs['redshift'] = meta['redshift']
+        args.append((wa, fl, er, ikwargs))
+
+    # Fit
+    if nproc is None:
+        nproc = os.cpu_count() or 1
+    if nproc == 1 or nspec == 1:
+        return [_find_continuum_worker(arg) for arg in args]
+    with ProcessPoolExecutor(max_workers=min(nproc, nspec)) as executor:
+        results = list(executor.map(_find_continuum_worker, args))
+    return results
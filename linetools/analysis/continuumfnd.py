@@ -3,8 +3,8 @@
 """
 
 import numpy as np
-from matplotlib import pyplot as plt
 import linetools.utils as ltu
+from linetools.analysis.utils import box_smooth
 
 from linetools.spectra.io import readspec
 import linetools.spectra.xspectrum1d as xspec
@@ -212,6 +212,7 @@ def contknots(spec, sm=10, npix=40, lchmin=20, ewsnlim=3, lchmax=None,
 
     # plot spectrum without these lines
     if showcont:
+        from matplotlib import pyplot as plt
         plt.figure(figsize=(17, 4))
         plt.plot(wav, sigf, color='gray')
         plt.plot(wav, flx, color='black')
@@ -236,7 +237,126 @@ def contknots(spec, sm=10, npix=40, lchmin=20, ewsnlim=3, lchmax=None,
     return knots, knotpixs
 
 
+def find_knots(wave, flux, sig, sm=10, npix=40, lchmin=20, ewsnlim=3,
+               lchmax=None):
+    """ Vectorized, headless version of contknots()
 
+    Finds the continuum knots and the pixels on the continuum with
+    sliding-window maximum filters, run-length encoding of the
+    continuum intervals and prefix sums.  Unlike contknots(),
+    empty intervals never generate (NaN) knots.
 
+    Parameters
+    ----------
+    wave, flux, sig : ndarray or Quantity
+      Wavelength, flux and error arrays of the spectrum
+    sm, npix, lchmin, ewsnlim, lchmax :
+      See contknots()
+
+    Returns
+    -------
+    knots : ndarray, shape (nknots, 2)
+      Knots (wavelength, flux) that define the continuum;  e.g. for
+      XSpectrum1D.fit_continuum(knots=knots) or
+      AkimaSpline(knots[:,0], knots[:,1])
+    knotpixs : ndarray of int
+      Indices of pixels that define the continuum
+      (in the pixels where the initial continuum is positive, as in contknots)
+    """
+    from scipy.ndimage import maximum_filter1d
+    wav = np.asarray(getattr(wave, 'value', wave), dtype=float)
+    flx = np.asarray(getattr(flux, 'value', flux), dtype=float)
+    sigf = np.asarray(getattr(sig, 'value', sig), dtype=float)
+    if lchmax is None:
+        lchmax = 5 * lchmin
 
+    # 1) Local maxima of the smoothed spectrum within +/- npix pixels
+    flx3 = box_smooth(flx, sm)
+    bad = ~np.isfinite(flx3)
+    fmax = maximum_filter1d(np.where(bad, -np.inf, flx3), 2*npix+1, mode='nearest')
+    # Windows with a NaN have a NaN maximum in contknots()
+    cbad = np.concatenate([[0], np.cumsum(bad)])
+    ipix = np.arange(len(flx3))
+    nbad = cbad[np.minimum(ipix+npix+1, len(flx3))] - cbad[np.maximum(ipix-npix, 0)]
+    ipixs = np.where((flx3 == fmax) & (nbad == 0))[0]
+    cont0 = np.interp(wav, wav[ipixs], flx3[ipixs])
+
+    # 2) Absorption lines; prefix sums of EW and its variance between
+    #    pixels above the continuum
+    nz = np.where(cont0 > 0)[0]
+    flxcp1 = flx[nz]
+    cont0cp = cont0[nz]
+    wavcp = wav[nz]
+    k = np.where(flxcp1 > cont0cp)[0]
+    flxcp = np.where(flxcp1 > cont0cp, cont0cp, flxcp1)
+    cumiews = np.cumsum(1 - flxcp / cont0cp)
+    cumisigew2s = np.cumsum((sigf[nz] / cont0cp)**2)
+    jj = np.where(np.diff(cumiews[k]) > ewsnlim * np.diff(cumisigew2s[k])**0.5)[0]
+    arr = np.zeros(len(flxcp), dtype=int)
+    arr[k[jj]] = 1
+    arr[k[jj + 1]] -= 1
+    allind = np.where((np.cumsum(arr) != 1) & (flxcp != 0))[0]
+
+    # 3) Run-length encoding of the adjacent continuum pixels
+    if len(allind) == 0:
+        return np.zeros((0, 2)), allind
+    brk = np.where(np.diff(allind) != 1)[0] + 1
+    starts = np.concatenate([[0], brk])
+    lengths = np.diff(np.concatenate([starts, [len(allind)]]))
+    gdch = lengths >= lchmin
+    starts, lengths = starts[gdch], lengths[gdch]
+    knotpixs = allind[np.repeat(starts, lengths) +
+                      np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)]
+
+    # 4) Knots; intervals longer than lchmax are split in pieces of lchmax
+    nch = np.where(lengths < lchmax, 0, np.round(lengths / lchmax)).astype(int)
+    nseg = nch + 1
+    iseg = np.arange(nseg.sum()) - np.repeat(np.cumsum(nseg) - nseg, nseg)
+    seg0 = np.repeat(starts, nseg) + iseg * lchmax
+    seg1 = np.where(iseg < np.repeat(nch, nseg), seg0 + lchmax,
+                    np.repeat(starts + lengths, nseg))
+    seg1 = np.minimum(seg1, np.repeat(starts + lengths, nseg))
+    gdseg = seg1 > seg0
+    seg0, seg1 = seg0[gdseg], seg1[gdseg]
+    # Means with prefix sums (relative to the first wavelength for precision)
+    cwav = np.concatenate([[0.], np.cumsum(wavcp[allind] - wav[0])])
+    cflx = np.concatenate([[0.], np.cumsum(flxcp1[allind])])
+    nseg = seg1 - seg0
+    knots = np.zeros((len(seg0), 2))
+    knots[:, 0] = (cwav[seg1] - cwav[seg0]) / nseg + wav[0]
+    knots[:, 1] = (cflx[seg1] - cflx[seg0]) / nseg
+    return knots, knotpixs
 
+
+def find_knots_batch(wave, flux, sig, **kwargs):
+    """ Run find_knots() on a batch of spectra
+
+    Parameters
+    ----------
+    wave, flux, sig : 2D ndarray or list of 1D arrays, or XSpectrum1D
+      Spectra, one per row;  or an XSpectrum1D with nspec >= 1
+      (then flux and sig are ignored)
+
+    Other keywords are passed to find_knots()
+
+    Returns
+    -------
+    all_knots : list of ndarray
+    all_knotpixs : list of ndarray
+    """
+    if isinstance(wave, xspec.XSpectrum1D):
+        spec = wave
+        select = spec.select
+        wave, flux, sig = [], [], []
+        for ii in range(spec.nspec):
+            spec.select = ii
+            wave.append(spec.wavelength.value)
+            flux.append(spec.flux.value)
+            sig.append(spec.sig.value)
+        spec.select = select
+    all_knots, all_knotpixs = [], []
+    for iwave, iflux, isig in zip(wave, flux, sig):
+        knots, knotpixs = find_knots(iwave, iflux, isig, **kwargs)
+        all_knots.append(knots)
+        all_knotpixs.append(knotpixs)
+    return all_knots, all_knotpixs
@@ -0,0 +1,301 @@
+""" Blind search for absorption doublets (e.g. CIV, MgII) in spectra
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+
+from astropy import units as u
+from astropy import constants as const
+from astropy.table import Table, Column, vstack
+
+c_kms = const.c.to('km/s').value
+
+
+def doublet_data(doublet, llist=None):
+    """ Rest wavelengths and optically thin EW ratio of a doublet
+
+    Parameters
+    ----------
+    doublet : tuple of str
+      Names of the two transitions, e.g. ('CIV 1548', 'CIV 1550')
+    llist : LineList, optional
+      Default is LineList('ISM')
+
+    Returns
+    -------
+    wrest : ndarray
+      Rest wavelengths (Angstroms)
+    ratio : float
+      Wr[0]/Wr[1] in the optically thin limit, i.e. f0 wrest0**2 / (f1 wrest1**2)
+    """
+    from linetools.lists.linelist import LineList
+    if len(doublet) != 2:
+        raise IOError('A doublet has two transitions')
+    if llist is None:
+        llist = LineList('ISM')
+    wrest, fosc = [], []
+    for name in doublet:
+        data = llist[name]
+        if data is None or len(data) == 0:
+            raise ValueError('Transition {:s} not found within LineList {:s}'.format(name, llist.list))
+        wrest.append(data['wrest'].to('AA').value)
+        fosc.append(data['f'])
+    wrest = np.array(wrest)
+    return wrest, fosc[0]*wrest[0]**2 / (fosc[1]*wrest[1]**2)
+
+
+def doublet_ew(wave, flux, sig, wrest, zgrid, dv=50*u.km/u.s):
+    """ Rest equivalent widths of the lines of a doublet over a redshift grid
+
+    The EW in a window of +/- dv around each line is a difference of
+    the prefix sums of (1-flux) dwave, so the grid costs O(npix + nz log npix)
+    per spectrum.
+
+    Parameters
+    ----------
+    wave : ndarray
+      (npix,) or (nspec, npix) sorted wavelengths (Angstroms)
+    flux, sig : ndarray
+      (npix,) or (nspec, npix) normalized flux and error;  pixels with
+      NaN values or sig <= 0 are ignored
+    wrest : ndarray
+      Rest wavelengths of the lines (Angstroms)
+    zgrid : ndarray
+    dv : Quantity, optional
+      Half-width of the windows
+
+    Returns
+    -------
+    Wr, sig_Wr : ndarray
+      (nspec, nz, nline) rest equivalent widths (Angstroms) and their
+      errors;  NaN for windows without pixels
+    """
+    flux = np.atleast_2d(np.asarray(flux, dtype=float))
+    sig = np.atleast_2d(np.asarray(sig, dtype=float))
+    wave = np.atleast_2d(np.asarray(wave, dtype=float))
+    nspec, npix = flux.shape
+    if npix < 2:
+        raise IOError('Need at least 2 pixels')
+    zgrid = np.atleast_1d(np.asarray(zgrid, dtype=float))
+    # Prefix sums of EW, variance and good pixels
+    dwv = np.gradient(wave, axis=1)
+    good = np.isfinite(flux) & np.isfinite(sig) & (sig > 0.) & np.isfinite(dwv)
+    ew = np.where(good, (1. - flux) * dwv, 0.)
+    var = np.where(good, (sig * dwv)**2, 0.)
+    zero = np.zeros((nspec, 1))
+    cew = np.concatenate([zero, np.cumsum(ew, axis=1)], axis=1)
+    cvar = np.concatenate([zero, np.cumsum(var, axis=1)], axis=1)
+    cgood = np.concatenate([zero, np.cumsum(good, axis=1)], axis=1)
+    # Windows
+    half = dv.to('km/s').value / c_kms
+    wcen = (1 + zgrid)[:, np.newaxis] * np.asarray(wrest, dtype=float)
+    ilo = np.array([np.searchsorted(iwave, wcen*(1-half), side='left') for iwave in wave])
+    ihi = np.array([np.searchsorted(iwave, wcen*(1+half), side='right') for iwave in wave])
+    rows = np.arange(nspec)[:, np.newaxis, np.newaxis]
+    ngood = cgood[rows, ihi] - cgood[rows, ilo]
+    opz = (1 + zgrid)[np.newaxis, :, np.newaxis]
+    Wr = np.where(ngood > 0, (cew[rows, ihi] - cew[rows, ilo]) / opz, np.nan)
+    sig_Wr = np.where(ngood > 0, np.sqrt(np.maximum(cvar[rows, ihi] - cvar[rows, ilo], 0.)) / opz, np.nan)
+    return Wr, sig_Wr
+
+
+def _spec_arrays(spec):
+    """ Padded (nspec, npix) normalized arrays of an XSpectrum1D (or file)
+
+    Returns
+    -------
+    wave : ndarray
+      (npix,) if the spectra share a wavelength array, else (nspec, npix)
+    flux, sig : ndarray
+      (nspec, npix), NaN padded
+    """
+    from linetools.spectra.io import readspec
+    if isinstance(spec, str):
+        spec = readspec(spec)
+    select = spec.select
+    waves, fluxes, sigs = [], [], []
+    for ii in range(spec.nspec):
+        spec.select = ii
+        if not spec.sig_is_set:
+            spec.select = select
+            raise IOError('The doublet search needs an error array')
+        flux, sig = spec.flux.value, spec.sig.value
+        if spec.co_is_set and not spec.normed:
+            co = spec.co.value
+            flux, sig = flux / co, sig / co
+        waves.append(spec.wavelength.to('AA').value)
+        fluxes.append(flux)
+        sigs.append(sig)
+    spec.select = select
+    npix = max(len(iwave) for iwave in waves)
+    wave = np.zeros((len(waves), npix))
+    flux = np.full((len(waves), npix), np.nan)
+    sig = np.full((len(waves), npix), np.nan)
+    for ii, (iwave, iflux, isig) in enumerate(zip(waves, fluxes, sigs)):
+        nn = len(iwave)
+        # Extend the wavelengths linearly to keep them sorted
+        wave[ii, :nn] = iwave
+        wave[ii, nn:] = iwave[-1] + (iwave[-1] - iwave[-2]) * np.arange(1, npix-nn+1)
+        flux[ii, :nn] = iflux
+        sig[ii, :nn] = isig
+    if np.all(wave == wave[0]):
+        wave = wave[0]
+    return wave, flux, sig
+
+
+def _default_zgrid(wave, wrest, zmin=0.):
+    """ Redshift grid uniform in ln(1+z), with the median pixel spacing
+    """
+    wave = np.atleast_2d(wave)
+    dlnw = np.median(np.diff(np.log(wave), axis=1))
+    lnz0 = max(np.log(np.min(wave) / np.min(wrest)), np.log1p(zmin))
+    lnz1 = np.log(np.max(wave) / np.max(wrest))
+    if lnz1 < lnz0:
+        return np.zeros(0)
+    return np.expm1(np.arange(lnz0, lnz1 + dlnw/2., dlnw))
+
+
+def _search(wave, flux, sig, wrest, ratio, zgrid=None, dv=50*u.km/u.s, snr_min=5.,
+            nsig_line=2., nsig_ratio=2., zmin=0.):
+    """ Doublet search on arrays;  see doublet_search()
+    """
+    from scipy.ndimage import maximum_filter1d
+    if zgrid is None:
+        zgrid = _default_zgrid(wave, wrest, zmin=zmin)
+    zgrid = np.atleast_1d(np.asarray(zgrid, dtype=float))
+    if zgrid.size == 0:
+        return _candidate_table()
+    Wr, sig_Wr = doublet_ew(wave, flux, sig, wrest, zgrid, dv=dv)
+    # Matched filter for the template Wr = A (ratio, 1)
+    tmpl = np.array([ratio, 1.])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ivar = 1. / sig_Wr**2
+        snr = np.sum(tmpl * Wr * ivar, axis=2) / np.sqrt(np.sum(tmpl**2 * ivar, axis=2))
+        snr_line = Wr / sig_Wr
+    # Doublet ratio between 1 (saturated) and ratio (optically thin)
+    rlo, rhi = min(1., ratio), max(1., ratio)
+    W1, W2 = Wr[..., 0], Wr[..., 1]
+    s1, s2 = sig_Wr[..., 0], sig_Wr[..., 1]
+    with np.errstate(invalid='ignore'):
+        ok_ratio = ((W1 - rlo*W2 >= -nsig_ratio * np.sqrt(s1**2 + (rlo*s2)**2)) &
+                    (W1 - rhi*W2 <= nsig_ratio * np.sqrt(s1**2 + (rhi*s2)**2)))
+        ok = (snr >= snr_min) & np.all(snr_line >= nsig_line, axis=2) & ok_ratio
+    # Peaks of the S/N within the window;  plateaus count once, at their centre
+    snr0 = np.where(np.isfinite(snr), snr, -np.inf)
+    nwin = max(int(np.ceil(np.log1p(dv.to('km/s').value/c_kms) / np.median(np.diff(np.log1p(zgrid))))), 1) \
+        if zgrid.size > 1 else 1
+    smax = maximum_filter1d(snr0, 2*nwin+1, axis=1, mode='nearest')
+    flat = snr0.ravel()
+    nz = zgrid.size
+    new_run = np.r_[True, (flat[1:] != flat[:-1]) | (np.arange(1, flat.size) % nz == 0)]
+    starts = np.flatnonzero(new_run)
+    ends = np.r_[starts[1:], flat.size] - 1
+    peak = (smax.ravel()[starts] == flat[starts]) & ok.ravel()[starts]
+    starts, ends = starts[peak], ends[peak]
+    mid = (starts + ends) // 2
+    ispec, iz = np.divmod(mid, nz)
+    return _candidate_table(ispec, 0.5*(zgrid[starts % nz] + zgrid[ends % nz]),
+                            W1.ravel()[mid], s1.ravel()[mid], W2.ravel()[mid], s2.ravel()[mid],
+                            snr.ravel()[mid])
+
+
+def _candidate_table(ispec=(), z=(), Wr1=(), sig_Wr1=(), Wr2=(), sig_Wr2=(), snr=()):
+    """ Table of the doublet candidates
+    """
+    tbl = Table()
+    tbl['ispec'] = Column(ispec, dtype=int)
+    tbl['z'] = Column(z, dtype=float)
+    tbl['Wr1'] = Column(Wr1, dtype=float, unit=u.AA)
+    tbl['sig_Wr1'] = Column(sig_Wr1, dtype=float, unit=u.AA)
+    tbl['Wr2'] = Column(Wr2, dtype=float, unit=u.AA)
+    tbl['sig_Wr2'] = Column(sig_Wr2, dtype=float, unit=u.AA)
+    tbl['snr'] = Column(snr, dtype=float)
+    return tbl
+
+
+def doublet_search(spec, doublet=('CIV 1548', 'CIV 1550'), llist=None, zgrid=None,
+                   dv=50*u.km/u.s, snr_min=5., nsig_line=2., nsig_ratio=2., zmin=0.):
+    """ Blind search for a doublet in one or more spectra
+
+    The two line windows slide over a redshift grid and the EWs are
+    combined into a matched-filter S/N for the optically thin
+    template.  Candidates are the S/N peaks (within dv) above snr_min
+    where each line is detected at nsig_line and the EW ratio is
+    within nsig_ratio of [1, ratio].
+
+    Parameters
+    ----------
+    spec : XSpectrum1D or str
+      Normalized spectrum (all of its nspec spectra are searched),
+      or a file for readspec()
+    doublet : tuple of str, optional
+    llist : LineList, optional
+      Default is LineList('ISM')
+    zgrid : ndarray, optional
+      Default is uniform in ln(1+z) with the median pixel spacing,
+      over the wavelength coverage of both lines
+    dv : Quantity, optional
+      Half-width of the line windows
+    snr_min : float, optional
+    nsig_line : float, optional
+    nsig_ratio : float, optional
+    zmin : float, optional
+      Minimum redshift of the default grid
+
+    Returns
+    -------
+    candidates : Table
+      ispec, z, Wr1, sig_Wr1, Wr2, sig_Wr2 (rest-frame) and snr
+    """
+    wrest, ratio = doublet_data(doublet, llist=llist)
+    wave, flux, sig = _spec_arrays(spec)
+    tbl = _search(wave, flux, sig, wrest, ratio, zgrid=zgrid, dv=dv, snr_min=snr_min,
+                  nsig_line=nsig_line, nsig_ratio=nsig_ratio, zmin=zmin)
+    tbl.meta['doublet'] = list(doublet)
+    return tbl
+
+
+def _doublet_search_worker(args):
+    """ Run _search() on a file from a tuple of (file, wrest, ratio, kwargs);
+    used by doublet_search_files() """
+    ifile, wrest, ratio, kwargs = args
+    wave, flux, sig = _spec_arrays(ifile)
+    return _search(wave, flux, sig, wrest, ratio, **kwargs)
+
+
+def doublet_search_files(files, doublet=('CIV 1548', 'CIV 1550'), llist=None, nproc=None, **kwargs):
+    """ Doublet search over many spectral files, in parallel
+
+    Parameters
+    ----------
+    files : list of str
+    doublet : tuple of str, optional
+    llist : LineList, optional
+    nproc : int, optional
+      Number of processes.  Default is the number of CPUs;
+      nproc=1 searches the files serially in this process.
+
+    Additional keywords are passed to doublet_search().
+
+    Returns
+    -------
+    candidates : Table
+      As for doublet_search(), with an additional 'file' column
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    wrest, ratio = doublet_data(doublet, llist=llist)
+    args = [(ifile, wrest, ratio, kwargs) for ifile in files]
+    if nproc is None:
+        nproc = os.cpu_count() or 1
+    if nproc == 1 or len(files) <= 1:
+        results = [_doublet_search_worker(arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(nproc, len(files))) as executor:
+            results = list(executor.map(_doublet_search_worker, args))
+    for ifile, tbl in zip(files, results):
+        tbl['file'] = Column([ifile]*len(tbl), dtype=str)
+    tbl = vstack(results) if len(results) > 0 else _candidate_table()
+    tbl.meta['doublet'] = list(doublet)
+    return tbl
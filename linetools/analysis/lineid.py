@@ -0,0 +1,255 @@
+""" Identification of absorption features with (ion, z) hypotheses
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+
+from astropy import units as u
+from astropy import constants as const
+from astropy.units import Quantity
+from astropy.table import Table, Column
+
+from linetools.lists.linelist import LineList
+
+c_kms = const.c.to('km/s').value
+
+# Multiplets used to identify the features;  ion_name: transitions
+default_multiplets = {
+    'HI': ['HI 1215', 'HI 1025', 'HI 972', 'HI 949', 'HI 937', 'HI 930'],
+    'CIV': ['CIV 1548', 'CIV 1550'],
+    'SiIV': ['SiIV 1393', 'SiIV 1402'],
+    'NV': ['NV 1238', 'NV 1242'],
+    'OVI': ['OVI 1031', 'OVI 1037'],
+    'MgII': ['MgII 2796', 'MgII 2803'],
+}
+
+
+class LineIdentifier(object):
+    """ Match a list of observed absorption features to (ion, z) hypotheses
+
+    The log-wavelength ratio of two transitions of a multiplet does
+    not depend on redshift.  The ratios of all pairs of transitions are
+    kept in a sorted table and the features are sorted in
+    log-wavelength, so the pairs of features matching each ratio are
+    found by bisection.  The (ion, z) candidates are then clustered
+    in ln(1+z) and scored by the expected relative strength
+    (LineList rel_strength) of the matched transitions.
+
+    Parameters
+    ----------
+    llist : LineList, optional
+      Default is LineList('ISM')
+    multiplets : dict, optional
+      ion_name: list of transition names;  default is default_multiplets
+    dv_tol : Quantity, optional
+      Tolerance for matching the features
+
+    Attributes
+    ----------
+    transitions : Table
+      name, ion_name, wrest and rel_strength of the transitions
+    """
+
+    def __init__(self, llist=None, multiplets=None, dv_tol=20*u.km/u.s):
+        if llist is None:
+            llist = LineList('ISM')
+        if multiplets is None:
+            multiplets = default_multiplets
+        self.llist = llist
+        self.dv_tol = dv_tol.to('km/s')
+        self._tol = np.log1p(self.dv_tol.value / c_kms)
+        # Transitions
+        lnames = np.array(llist._data['name'])
+        lstrength = llist._extra_table['rel_strength']
+        rows = []
+        for iion, (ion_name, names) in enumerate(multiplets.items()):
+            for name in names:
+                mt = np.where(lnames == name)[0]
+                if len(mt) == 0:
+                    raise ValueError('Transition {:s} not found within LineList {:s}'.format(name, llist.list))
+                strength = lstrength[mt[0]]
+                if np.ma.is_masked(strength):
+                    strength = np.nan
+                rows.append((name, ion_name, iion, llist._data['wrest'][mt[0]], float(strength)))
+        self.transitions = Table(rows=rows, names=('name', 'ion_name', 'iion', 'wrest', 'rel_strength'))
+        self.transitions['wrest'].unit = u.AA
+        self._lnwrest = np.log(self.transitions['wrest'].data.astype(float))
+        self._iion = self.transitions['iion'].data
+        self._weight = np.nan_to_num(10.**self.transitions['rel_strength'].data)
+        self.ion_names = list(multiplets.keys())
+        # Ratios of all pairs of transitions within each multiplet, sorted
+        ta, tb = np.where((self._iion[:, np.newaxis] == self._iion) &
+                          (self._lnwrest[:, np.newaxis] < self._lnwrest))
+        ratio = self._lnwrest[tb] - self._lnwrest[ta]
+        srt = np.argsort(ratio)
+        self._ratio, self._ta, self._tb = ratio[srt], ta[srt], tb[srt]
+
+    def _match_pairs(self, lnw):
+        """ Pairs of features (sorted in ln wavelength) matching the ratio of a pair of transitions
+
+        Each of the sorted ratios is looked up by bisection, i.e.
+        O(M N log N) for N features and M ratios.
+
+        Returns
+        -------
+        fa, fb : int ndarray
+          Features (fa is bluer)
+        ta, tb : int ndarray
+          Transitions
+        """
+        nfeat = lnw.size
+        nratio = self._ratio.size
+        # Features redward of each feature by each ratio, within the tolerance
+        target = lnw[np.newaxis, :] + self._ratio[:, np.newaxis]
+        lo = np.searchsorted(lnw, target - self._tol, side='left').ravel()
+        hi = np.searchsorted(lnw, target + self._tol, side='right').ravel()
+        nmt = hi - lo
+        idx = np.repeat(np.arange(nratio*nfeat), nmt)
+        fb = np.repeat(lo - np.cumsum(nmt) + nmt, nmt) + np.arange(np.sum(nmt))
+        iratio, fa = np.divmod(idx, nfeat)
+        return fa, fb, self._ta[iratio], self._tb[iratio]
+
+    def identify(self, wobs, wvlim=None, zlim=None, min_score=0.):
+        """ Propose (ion, z) identifications of the features
+
+        Parameters
+        ----------
+        wobs : Quantity array
+          Observed wavelengths of the features
+        wvlim : Quantity array, optional
+          Wavelength coverage of the spectrum, used to set the
+          transitions expected for a hypothesis;  default is the
+          range of wobs
+        zlim : tuple, optional
+          Only consider redshifts within these limits
+        min_score : float, optional
+
+        Returns
+        -------
+        hypotheses : Table
+          One row per (ion, z) hypothesis, sorted by decreasing score:
+          ion_name, z, dv (velocity spread of the features), nmatch
+          (number of transitions matched), nexpect (number expected
+          in wvlim), score (fraction of the expected strength that is
+          matched), rel_strength (of the strongest matched
+          transition), transitions and features (indices into wobs)
+        """
+        wobs = np.atleast_1d(Quantity(wobs).to('AA').value)
+        lnw_in = np.log(wobs)
+        order = np.argsort(lnw_in, kind='stable')
+        lnw = lnw_in[order]
+        if wvlim is None:
+            lnlim = (lnw[0] - self._tol, lnw[-1] + self._tol) if lnw.size > 0 else (0., 0.)
+        else:
+            lnlim = tuple(np.log(Quantity(wvlim).to('AA').value))
+        fa, fb, ta, tb = self._match_pairs(lnw)
+        # ln(1+z) of each candidate
+        lnz = 0.5 * ((lnw[fa] - self._lnwrest[ta]) + (lnw[fb] - self._lnwrest[tb]))
+        if zlim is not None:
+            gdz = (lnz >= np.log1p(zlim[0])) & (lnz <= np.log1p(zlim[1]))
+            fa, fb, ta, tb, lnz = fa[gdz], fb[gdz], ta[gdz], tb[gdz], lnz[gdz]
+        if lnz.size == 0:
+            return self._hypotheses_table()
+        # Cluster the candidates of each ion in ln(1+z)
+        ion = self._iion[ta]
+        srt = np.lexsort((lnz, ion))
+        new = np.r_[True, (np.diff(ion[srt]) != 0) | (np.diff(lnz[srt]) > self._tol)]
+        cluster = np.empty(lnz.size, dtype=int)
+        cluster[srt] = np.cumsum(new) - 1
+        ncl = cluster[srt][-1] + 1
+        cl_ion = np.zeros(ncl, dtype=int)
+        cl_ion[cluster] = ion
+        # Unique (cluster, feature, transition) members, sorted by cluster
+        ntrans = len(self.transitions)
+        key = (np.r_[cluster, cluster].astype(np.int64) * lnw.size + np.r_[fa, fb]) * ntrans + np.r_[ta, tb]
+        key = np.unique(key)
+        mem_trans = key % ntrans
+        mem_feat = (key // ntrans) % lnw.size
+        mem_cl = key // ntrans // lnw.size
+        mem_lnz = lnw[mem_feat] - self._lnwrest[mem_trans]
+        starts = np.flatnonzero(np.r_[True, np.diff(mem_cl) != 0])
+        nmem = np.diff(np.r_[starts, key.size])
+        cl_lnz = np.add.reduceat(mem_lnz, starts) / nmem
+        dv = (np.maximum.reduceat(mem_lnz, starts) - np.minimum.reduceat(mem_lnz, starts)) * c_kms
+        # Matched and expected transitions
+        matched = np.zeros((ncl, ntrans), dtype=bool)
+        matched[mem_cl, mem_trans] = True
+        lnobs = cl_lnz[:, np.newaxis] + self._lnwrest
+        expected = (cl_ion[:, np.newaxis] == self._iion) & (lnobs >= lnlim[0]) & (lnobs <= lnlim[1])
+        expected |= matched
+        score = np.sum(matched * self._weight, axis=1) / np.sum(expected * self._weight, axis=1)
+        strength = np.max(np.where(matched, self.transitions['rel_strength'].data, -np.inf), axis=1)
+        # Table
+        gd = np.flatnonzero(score >= min_score)
+        names = np.array(self.transitions['name'])
+        trans_str = [','.join(names[mem_trans[starts[icl]:starts[icl]+nmem[icl]]]) for icl in gd]
+        feats = [order[mem_feat[starts[icl]:starts[icl]+nmem[icl]]] for icl in gd]
+        return self._hypotheses_table(np.array(self.ion_names)[cl_ion[gd]], np.expm1(cl_lnz[gd]), dv[gd],
+                                      np.sum(matched[gd], axis=1), np.sum(expected[gd], axis=1),
+                                      score[gd], strength[gd], trans_str, feats)
+
+    def _hypotheses_table(self, ion_name=(), z=(), dv=(), nmatch=(), nexpect=(), score=(),
+                          rel_strength=(), transitions=(), features=()):
+        """ Table of hypotheses, sorted by decreasing score
+        """
+        tbl = Table()
+        tbl['ion_name'] = Column(ion_name, dtype='U8')
+        tbl['z'] = Column(z, dtype=float)
+        tbl['dv'] = Column(dv, dtype=float, unit=u.km/u.s)
+        tbl['nmatch'] = Column(nmatch, dtype=int)
+        tbl['nexpect'] = Column(nexpect, dtype=int)
+        tbl['score'] = Column(score, dtype=float)
+        tbl['rel_strength'] = Column(rel_strength, dtype=float)
+        tbl['transitions'] = Column(transitions, dtype='U256')
+        features_col = np.empty(len(features), dtype=object)
+        features_col[:] = list(features)
+        tbl['features'] = Column(features_col, dtype=object)
+        if len(tbl) > 1:
+            srt = np.lexsort((tbl['z'].data, -tbl['nmatch'].data, -tbl['score'].data))
+            tbl = tbl[srt]
+        return tbl
+
+    def assign(self, hypotheses):
+        """ Select the best hypotheses that do not share a feature
+
+        Parameters
+        ----------
+        hypotheses : Table
+          From identify()
+
+        Returns
+        -------
+        Table
+          Subset of the hypotheses, in the same order
+        """
+        used = set()
+        keep = []
+        for ii, feats in enumerate(hypotheses['features']):
+            feats = set(np.atleast_1d(feats).tolist())
+            if used.isdisjoint(feats):
+                keep.append(ii)
+                used |= feats
+        return hypotheses[np.array(keep, dtype=int)]
+
+    def abslines(self, hypothesis):
+        """ AbsLine objects of the transitions matched in a hypothesis
+
+        Parameters
+        ----------
+        hypothesis : Row
+          Row of the Table from identify()
+
+        Returns
+        -------
+        abslines : list of AbsLine
+        """
+        from linetools.spectralline import many_abslines
+        names = hypothesis['transitions'].split(',')
+        wrest = np.array([self.transitions['wrest'][self.transitions['name'] == name][0] for name in names])
+        z = np.full(len(names), hypothesis['z'])
+        dz = (1 + z) * self.dv_tol.value / c_kms
+        return many_abslines(wrest*u.AA, self.llist, z=z, zlim=np.column_stack([z-dz, z+dz]))
+
+    def __repr__(self):
+        return '<{:s}: ions={}, ntrans={:d}, dv_tol={:g}>'.format(
+            self.__class__.__name__, ','.join(self.ion_names), len(self.transitions), self.dv_tol)
@@ -9,10 +9,6 @@ import astropy.units as u
 
 from linetools.spectra.xspectrum1d import XSpectrum1D
 
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import matplotlib as mpl
-
 def stack_plot(abslines, vlim=[-300,300.]*u.km/u.s, nrow=6, show=True, spec=None,
                ymnx=(-0.1,1.1), figsz=(18,11), return_fig=False,
                tight_layout=False, add_ew=False, zref=None):
@@ -49,6 +45,9 @@ def stack_plot(abslines, vlim=[-300,300.]*u.km/u.s, nrow=6, show=True, spec=None
     fig : matplotlib Figure, optional
         Figure instance containing stack plot with subplots, axes, etc.
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.gridspec as gridspec
+    import matplotlib as mpl
     from linetools.spectra.io import readspec
     mpl.rcParams['font.family'] = 'stixgeneral'
     mpl.rcParams['font.size'] = 15.
@@ -7,6 +7,7 @@ import os
 from astropy import units as u
 
 from linetools.analysis.abskin import generate_stau, pw97_kin, cgm_kin
+from linetools.analysis.abskin import generate_stau_batch, batch_kin
 
 
 def data_path(filename):
@@ -67,3 +68,41 @@ def test_cgmkin():
     # Tests
     np.testing.assert_allclose(abskin.data['Dv'].value, 20.)
     """
+
+
+def test_batch_kin():
+    _, velo, fx, sig = dummy_spec()
+    stau = generate_stau(velo, fx.copy(), sig.copy())
+    # Padded profiles;  the second is shorter
+    flux = np.vstack([fx, fx, np.roll(fx, 50)])
+    flux[1, 1500:] = np.nan
+    sigs = np.vstack([sig]*3)
+    stau_batch = generate_stau_batch(velo, flux, sigs)
+    np.testing.assert_allclose(stau_batch[0], stau, atol=1e-12)
+    stau1 = generate_stau(velo[:1500], fx[:1500].copy(), sig[:1500].copy())
+    np.testing.assert_allclose(stau_batch[1, :1500], stau1, atol=1e-12)
+    assert np.all(stau_batch[1, 1500:] == 0.)
+    # Kinematics
+    kin_tbl = batch_kin(velo, stau_batch)
+    assert len(kin_tbl) == 3
+    pw97 = pw97_kin(velo, stau)
+    cgm = cgm_kin(velo, stau)
+    for key in ['Dv', 'delta_v', 'v_peak', 'JF_fcover']:
+        np.testing.assert_allclose(kin_tbl[key].quantity[0].value,
+                                   u.Quantity(pw97.get(key, cgm.get(key))).value)
+    for key in ['fmm', 'fedg', 'X_fcover', 'zero_pk']:
+        np.testing.assert_allclose(kin_tbl[key][0], pw97.get(key, cgm.get(key)), atol=1e-10)
+    cgm1 = cgm_kin(velo[:1500], stau1)
+    np.testing.assert_allclose(kin_tbl['delta_v'][1], cgm1['delta_v'].value)
+
+
+def test_stau_batch_badpix():
+    _, velo, fx, sig = dummy_spec()
+    fx[1200:1202] = 0.
+    flux = np.vstack([fx, fx])
+    stau_batch = generate_stau_batch(velo, flux, np.vstack([sig, sig]))
+    stau = generate_stau(velo, fx.copy(), sig.copy())
+    np.testing.assert_allclose(stau_batch[0], stau, atol=1e-12)
+    # Too much bad data
+    flux[1, 100:110] = 0.
+    pytest.raises(ValueError, generate_stau_batch, velo, flux, np.vstack([sig, sig]))
@@ -6,7 +6,7 @@ import pdb
 from astropy import units as u
 
 from linetools.analysis.absline import aodm, log_clm, linear_clm, photo_cross,\
-    sum_logN, get_tau0, Wr_from_N_b, Wr_from_N_b_transition, Wr_from_N, Wr_from_N_transition,\
+    sum_logN, sum_logN_by_key, synthesize_colm_by_key, get_tau0, Wr_from_N_b, Wr_from_N_b_transition, Wr_from_N, Wr_from_N_transition,\
     N_from_Wr, N_from_Wr_transition
 
 from linetools.lists.linelist import LineList
@@ -69,6 +69,48 @@ def test_sumlogn_limit():
     np.testing.assert_allclose((logN, sig_logN), (obj2['logN'], obj2['sig_logN']))
 
 
+def test_sumlogn_by_key():
+    rng = np.random.RandomState(1234)
+    key = rng.randint(0, 4, 40)
+    flags = rng.randint(1, 4, 40)
+    logN = rng.uniform(12., 15., 40)
+    sig_logN = rng.uniform(0.01, 0.3, (40, 2))
+    ukeys, flag_N, sum_N, sig_N = sum_logN_by_key(key, flags, logN, sig_logN)
+    # Compare with the pair-wise logic
+    for jj, ukey in enumerate(ukeys):
+        idx = np.where(key == ukey)[0]
+        obj = dict(flag_N=flags[idx[0]], logN=logN[idx[0]], sig_logN=sig_logN[idx[0]])
+        for ii in idx[1:]:
+            obj['flag_N'], obj['logN'], obj['sig_logN'] = sum_logN(
+                obj, dict(flag_N=flags[ii], logN=logN[ii], sig_logN=sig_logN[ii]))
+        assert flag_N[jj] == obj['flag_N']
+        np.testing.assert_allclose(sum_N[jj], obj['logN'])
+        np.testing.assert_allclose(sig_N[jj], obj['sig_logN'])
+    # flag_N=0 entries are ignored
+    _, flag_N, sum_N, _ = sum_logN_by_key(np.zeros(3), [0, 3, 0], [14., 13., 15.], [0.1, 0.1, 0.1])
+    assert flag_N[0] == 3
+    np.testing.assert_allclose(sum_N[0], 13.)
+
+
+def test_synthesize_colm_by_key():
+    # Detections win over limits; weighted mean
+    key = np.array(['a', 'a', 'a', 'b', 'b', 'c', 'c', 'd'])
+    flags = np.array([1, 2, 1, 2, 2, 3, 3, 0])
+    N = np.array([1., 5., 2., 3., 4., 1., 3., 1.]) * 1e13
+    sig_N = np.array([1., 1., 2., 1., 1., 2., 0.5, 1.]) * 1e12
+    ukeys, flag_N, sN, ssig = synthesize_colm_by_key(key, flags, N, sig_N)
+    np.testing.assert_array_equal(flag_N, [1, 2, 3, 0])
+    weight = np.array([1., 0.25])
+    np.testing.assert_allclose(sN[0], np.sum(weight*[1e13, 2e13])/np.sum(weight))
+    np.testing.assert_allclose(ssig[0], 1e12/np.sqrt(np.sum(weight)))
+    np.testing.assert_allclose(sN[1:3], [4e13, 1e13])
+    # Upper limit is max(N, nsig_upper*sig_N)
+    _, _, sN, _ = synthesize_colm_by_key(key, flags, N, sig_N, nsig_upper=20.)
+    np.testing.assert_allclose(sN[2], 3e13)
+    # Bad flag
+    pytest.raises(ValueError, synthesize_colm_by_key, key, flags+4, N, sig_N)
+
+
 def test_get_tau0():
     hi_list = LineList('HI')
     lya = hi_list['HI 1215']
@@ -0,0 +1,49 @@
+# Module to run tests on Curve of Growth analysis
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+from astropy import units as u
+
+from linetools.analysis import cog as ltcog
+
+
+def fake_cog_lines(logN, b):
+    """ Lyman series EWs for a set of components
+    """
+    wrest = np.array([1215.6701, 1025.7223, 972.5368, 949.7431, 937.8035])
+    fval = np.array([0.4164, 0.07912, 0.02901, 0.01394, 0.007799])
+    ncomp = len(logN)
+    comp_id = np.repeat(np.arange(ncomp), wrest.size)
+    wrest = np.tile(wrest, ncomp)
+    fval = np.tile(fval, ncomp)
+    tau0 = 1.497e-15 * wrest * fval * 10**logN[comp_id] / b[comp_id]
+    EW = 2 * b[comp_id] * ltcog.intFtau0(tau0) / 3e5 * wrest
+    return wrest*u.AA, fval, EW*u.AA, comp_id
+
+
+def test_ftau0():
+    tau0 = np.logspace(-2, 8, 100)
+    np.testing.assert_allclose(ltcog.Ftau0(tau0), ltcog.intFtau0(tau0), rtol=1e-5)
+    # Beyond the table
+    assert ltcog.Ftau0(1e-5) > 0.
+    assert ltcog.Ftau0(1e10) > ltcog.Ftau0(1e9)
+    assert ltcog.Ftau0(0.) == 0.
+
+
+def test_batch_cog():
+    logN = np.array([12.5, 13.8, 14.5, 15.2])
+    b = np.array([30., 6.5, 20., 12.])
+    wrest, fval, EW, comp_id = fake_cog_lines(logN, b)
+    sig_EW = 0.02*EW + 0.002*u.AA
+    cog_tbl = ltcog.batch_cog_analysis(wrest, fval, EW, comp_id, sig_EW=sig_EW)
+    # Test
+    assert len(cog_tbl) == 4
+    assert np.all(cog_tbl['flag_conv'])
+    np.testing.assert_allclose(cog_tbl['logN'], logN, atol=1e-3)
+    np.testing.assert_allclose(cog_tbl['b'].to('km/s').value, b, rtol=1e-3)
+    assert cog_tbl['covar'].shape == (4, 2, 2)
+    assert np.all(cog_tbl['sig_logN'] > 0.)
+    # Compare to the single component analysis
+    gd = comp_id == 1
+    COG_dict = ltcog.single_cog_analysis(wrest[gd], fval[gd], EW[gd], sig_EW=sig_EW[gd])
+    np.testing.assert_allclose(cog_tbl['logN'][1], COG_dict['logN'], atol=1e-3)
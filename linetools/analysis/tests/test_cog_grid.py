@@ -0,0 +1,55 @@
+# Module to run tests on tabulated curves of growth
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+import pytest
+from astropy import units as u
+
+from linetools.analysis import cog as ltcog
+from linetools.analysis.cog_grid import WrGrid, exact_Wr
+from linetools.analysis.absline import Wr_from_N_b_transition
+from linetools.spectralline import AbsLine
+
+
+def test_exact_wr():
+    # Optically thin limit
+    Wr = exact_Wr(11., 20., 1215.6701, 0.4164, 6.265e8)
+    Wr_thin = Wr_from_N_b_transition(1e11/u.cm**2, 20*u.km/u.s, 'HI 1215')
+    np.testing.assert_allclose(Wr, Wr_thin.value, rtol=1e-3)
+    # Flat part matches the Gaussian curve of growth (negligible damping)
+    Wr = exact_Wr(14., 20., 1215.6701, 0.4164, 0.)
+    tau0 = 1.497e-15 * 1215.6701 * 0.4164 * 1e14 / 20.
+    np.testing.assert_allclose(Wr, 2*20*ltcog.intFtau0(tau0)/2.99792458e5*1215.6701, rtol=1e-3)
+
+
+def test_wrgrid():
+    grid = WrGrid.from_transition('HI 1215')
+    # Cached
+    assert WrGrid.from_transition('HI 1215') is grid
+    # Forward
+    logN = np.array([12., 14., 17., 20.])
+    Wr = grid.Wr(logN, 20*u.km/u.s)
+    assert Wr.unit == u.AA
+    exact = exact_Wr(logN, 20., 1215.6701, 0.4164, 6.265e8)
+    np.testing.assert_allclose(Wr.value, exact, rtol=2e-3)
+    # Inverse
+    np.testing.assert_allclose(grid.logN_from_Wr(Wr, 20*u.km/u.s), logN, atol=0.01)
+    # Vectorized with b
+    b = np.array([5., 10., 30., 60.])
+    np.testing.assert_allclose(grid.logN_from_Wr(grid.Wr(logN, b), b), logN, atol=0.01)
+    # Off the grid
+    assert np.isnan(grid.Wr(25., 20.))
+    assert np.isnan(grid.logN_from_Wr(100*u.AA, 0.1))
+    # The cache keeps the logN and b grids apart
+    gridN = WrGrid.from_transition('HI 1215', logN=[10., 20.])
+    gridb = WrGrid.from_transition('HI 1215', b=[10., 20.]*u.km/u.s)
+    assert gridN is not gridb
+    np.testing.assert_allclose(gridN.logN, [10., 20.])
+    np.testing.assert_allclose(gridb.b.value, [10., 20.])
+
+
+def test_absline_logN_from_Wr_b():
+    abslin = AbsLine('CIV 1548')
+    logN = abslin.get_logN_from_Wr_b(0.3*u.AA, 15*u.km/u.s)
+    Wr = WrGrid.from_atomic(abslin.wrest, abslin.data['f'], abslin.data['gamma']).Wr(logN, 15.)
+    np.testing.assert_allclose(Wr.value, 0.3, rtol=1e-3)
@@ -2,7 +2,9 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 
 from astropy.table import Table
 from ...spectra.io import readspec
-from ..continuum import find_continuum
+from ...spectra.xspectrum1d import XSpectrum1D
+from ..continuum import find_continuum, find_continuum_batch, IncrementalContinuum
+from ..continuum import linear_co, Akima_co
 import importlib
 import numpy as np
 import pytest
@@ -17,3 +19,42 @@ def test_find_continuum():
     assert np.allclose(co[-3:],[384.69366713, 384.69095479,   384.68824243])
     assert np.allclose(co[50000:50003],
                        [1575.88179631, 1575.5837134, 1575.28703315])
+
+
+def test_incremental_continuum():
+    wa = np.linspace(3000., 4000., 5000)
+    xknots = np.linspace(3010., 3990., 30)
+    rng = np.random.RandomState(1)
+    knots = [[x, y, False] for x, y in zip(xknots, 1 + 0.1*rng.rand(30))]
+    model_co = IncrementalContinuum(wa, knots)
+    model_co.update(knots)
+    # Move a few knots, including the end ones
+    for ii in [0, 7, 8, 20, 29]:
+        knots[ii][1] += 0.05
+        linear, akima = model_co.update(knots)
+        assert np.array_equal(linear, linear_co(wa, knots))
+        assert np.array_equal(akima, Akima_co(wa, knots))
+
+
+def test_find_continuum_batch():
+    d = importlib.util.find_spec('linetools').submodule_search_locations[0]
+    spec = readspec(d + '/spectra/tests/files/q0002m422.txt.gz', masking='none')
+    co, pts = find_continuum(spec, redshift=2.76, divmult=3.5,
+                             forest_divmult=3, kind='QSO')
+    results = find_continuum_batch([spec, spec], redshifts=[2.76, 2.76], nproc=2,
+                                   divmult=3.5, forest_divmult=3, kind='QSO')
+    assert len(results) == 2
+    for bco, bpts in results:
+        assert np.allclose(bco, co)
+        assert len(bpts) == len(pts)
+    # One redshift per spectrum
+    with pytest.raises(IOError):
+        find_continuum_batch([spec, spec, spec], redshifts=[2.76, 2.76])
+    # XSpectrum1D with several spectra;  the selected one is kept
+    specs = XSpectrum1D(np.tile(spec.wavelength.value, (2, 1)), np.tile(spec.flux.value, (2, 1)),
+                        np.tile(spec.sig.value, (2, 1)))
+    specs.select = 1
+    results = find_continuum_batch(specs, redshifts=2.76, nproc=1,
+                                   divmult=3.5, forest_divmult=3, kind='QSO')
+    assert specs.select == 1
+    assert np.allclose(results[1][0], co)
@@ -1,7 +1,8 @@
 from __future__ import print_function, absolute_import, division, unicode_literals
 
 from ...spectra.io import readspec
-from ..continuumfnd import contknots
+from ...spectra.xspectrum1d import XSpectrum1D
+from ..continuumfnd import contknots, find_knots, find_knots_batch, box_smooth
 import importlib
 import numpy as np
 import pytest 
@@ -17,3 +18,35 @@ def test_find_continuum_knots():
     assert np.allclose(dy, np.repeat(0., len(dy)), rtol=0., atol=0.1)
     assert np.std(dy) < 0.02
 
+
+
+def test_box_smooth():
+    from astropy.convolution import convolve, Box1DKernel
+    flux = np.random.RandomState(3).rand(500)
+    flux[[0, 100, 101]] = np.nan
+    for nbox in [5, 10]:
+        np.testing.assert_allclose(box_smooth(flux, nbox),
+                                   convolve(flux, Box1DKernel(nbox)), rtol=1e-10)
+
+
+def test_find_knots():
+    d = importlib.util.find_spec('linetools').submodule_search_locations[0]
+    spec = readspec(d + '/spectra/tests/files/spec_example_2.fits')
+    testknots, testknotpixs = contknots(spec, ewsnlim=5, showcont=False)
+    knots, knotpixs = find_knots(spec.wavelength, spec.flux, spec.sig, ewsnlim=5)
+    # Same as contknots, without the NaN knots
+    testknots = np.asarray(testknots)
+    gdk = np.isfinite(testknots[:, 1])
+    np.testing.assert_allclose(knots, testknots[gdk], rtol=1e-6)
+    assert np.array_equal(knotpixs, testknotpixs)
+    # Batch
+    all_knots, all_knotpixs = find_knots_batch(spec, None, None, ewsnlim=5)
+    assert len(all_knots) == 1
+    np.testing.assert_allclose(all_knots[0], knots)
+    # Several spectra;  the selected one is kept
+    specs = XSpectrum1D(np.tile(spec.wavelength.value, (2, 1)), np.tile(spec.flux.value, (2, 1)),
+                        np.tile(spec.sig.value, (2, 1)))
+    specs.select = 1
+    all_knots, _ = find_knots_batch(specs, None, None, ewsnlim=5)
+    assert specs.select == 1
+    np.testing.assert_allclose(all_knots[1], knots)
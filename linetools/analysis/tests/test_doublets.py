@@ -0,0 +1,64 @@
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+import pytest
+
+from astropy import units as u
+
+from linetools.spectra.xspectrum1d import XSpectrum1D
+from linetools.analysis.doublets import doublet_data, doublet_ew, doublet_search, doublet_search_files
+
+
+def fake_spec(zabs, nspec=3, Wr=(0.3, 0.16), wrest=(1548.204, 1550.781), sigv=20., noise=0.05):
+    rng = np.random.RandomState(1234)
+    wave = np.arange(4000., 6000., 0.5)
+    flux = np.ones((nspec, wave.size))
+    for ii in range(nspec):
+        for w0, W in zip(wrest, Wr):
+            wc = w0*(1+zabs[ii])
+            s = wc*sigv/3e5
+            flux[ii] -= W*(1+zabs[ii])/np.sqrt(2*np.pi)/s*np.exp(-0.5*((wave-wc)/s)**2)
+    flux += rng.normal(0., noise, flux.shape)
+    sig = np.full_like(flux, noise)
+    return XSpectrum1D(np.tile(wave, (nspec, 1)), flux, sig)
+
+
+def test_doublet_data():
+    wrest, ratio = doublet_data(('MgII 2796', 'MgII 2803'))
+    np.testing.assert_allclose(wrest, [2796.3543, 2803.5315])
+    np.testing.assert_allclose(ratio, 2., rtol=0.01)
+    with pytest.raises(IOError):
+        doublet_data(('CIV 1548',))
+
+
+def test_doublet_ew():
+    wave = np.arange(4000., 5000., 0.5)
+    flux = np.ones_like(wave)
+    flux[(wave > 4640.) & (wave < 4650.)] = 0.5  # 19 pixels
+    Wr, sig_Wr = doublet_ew(wave, flux, np.full_like(wave, 0.1), [1548.204, 1550.781], [2.],
+                            dv=400*u.km/u.s)
+    assert Wr.shape == (1, 1, 2)
+    np.testing.assert_allclose(Wr[0, 0, 0], 19*0.5*0.5/3.)
+    assert Wr[0, 0, 1] < Wr[0, 0, 0]
+    assert np.all(sig_Wr > 0.)
+
+
+def test_doublet_search(tmpdir):
+    zabs = [2.0, 2.3, 2.6]
+    spec = fake_spec(zabs)
+    cands = doublet_search(spec)
+    assert len(cands) == 3
+    np.testing.assert_array_equal(cands['ispec'], [0, 1, 2])
+    np.testing.assert_allclose(cands['z'], zabs, atol=1e-4)
+    np.testing.assert_allclose(cands['Wr1'], 0.3, atol=4*cands['sig_Wr1'].max())
+    assert np.all(cands['snr'] > 10.)
+    # Noise only
+    spec = fake_spec(zabs, Wr=(0., 0.))
+    assert len(doublet_search(spec)) == 0
+    # Files
+    files = [str(tmpdir.join('spec{:d}.fits'.format(ii))) for ii in range(2)]
+    for ifile in files:
+        fake_spec(zabs).write_to_fits(ifile)
+    cands = doublet_search_files(files, nproc=1)
+    assert len(cands) == 6
+    assert list(cands['file']) == [files[0]]*3 + [files[1]]*3
@@ -0,0 +1,62 @@
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import numpy as np
+import pytest
+
+from astropy import units as u
+
+from linetools.analysis.lineid import LineIdentifier
+
+
+@pytest.fixture(scope='module')
+def lid():
+    return LineIdentifier()
+
+
+def fake_features():
+    # CIV at z=2, MgII at z=1.1, Lyman series at z=2.5 and random features
+    rng = np.random.RandomState(1234)
+    wobs = np.concatenate([np.array([1548.204, 1550.781])*3.0,
+                           np.array([2796.3543, 2803.5315])*2.1,
+                           np.array([1215.67, 1025.7222, 972.5367])*3.5,
+                           rng.uniform(3350., 6000., 30)])
+    return wobs*u.AA
+
+
+def test_identify(lid):
+    wobs = fake_features()
+    hyp = lid.identify(wobs, wvlim=[3350., 6000.]*u.AA)
+    assert np.all(np.diff(hyp['score']) <= 0.)
+    # Best hypotheses
+    best = lid.assign(hyp)
+    for ion_name, z, feats in [('MgII', 1.1, [2, 3]), ('CIV', 2.0, [0, 1]), ('HI', 2.5, [4, 5, 6])]:
+        mt = np.where((best['ion_name'] == ion_name) & (np.abs(best['z'] - z) < 1e-5))[0]
+        assert len(mt) == 1
+        assert best['score'][mt[0]] == 1.
+        assert sorted(best['features'][mt[0]]) == feats
+    # Full Lyman series match is the strongest HI hypothesis
+    assert best['nmatch'][best['ion_name'] == 'HI'][0] == 3
+    # Redshift limits
+    hyp = lid.identify(wobs, zlim=(1.9, 2.1))
+    assert 'MgII' not in hyp['ion_name']
+    np.testing.assert_allclose(hyp['z'][hyp['ion_name'] == 'CIV'], 2.0, atol=1e-6)
+    # AbsLines
+    abslines = lid.abslines(best[(best['ion_name'] == 'CIV') & (np.abs(best['z'] - 2.) < 1e-5)][0])
+    assert [aline.name for aline in abslines] == ['CIV 1548', 'CIV 1550']
+    np.testing.assert_allclose(abslines[0].z, 2.0, atol=1e-6)
+
+
+def test_identify_score(lid):
+    # Lya + Lyb at z=2.5 with Lyg covered but missing
+    wobs = np.array([1215.67, 1025.7222])*3.5*u.AA
+    hyp = lid.identify(wobs, wvlim=[3350., 5000.]*u.AA)
+    assert len(hyp) == 1
+    assert hyp['nmatch'][0] == 2
+    assert hyp['nexpect'][0] == 3
+    assert 0. < hyp['score'][0] < 1.
+    # Nothing to identify
+    hyp = lid.identify([5000.]*u.AA)
+    assert len(hyp) == 0
+    # Bad transition
+    with pytest.raises(ValueError):
+        LineIdentifier(multiplets={'CIV': ['CIV 1549']})
@@ -111,3 +111,34 @@ def test_voigt_from_components():
     comp1, HIlines = mk_comp('HI', zcomp=0.01, vlim=[-10,10]*u.km/u.s)
     comp2, HIlines = mk_comp('HI', zcomp=0.05, vlim=[-10,10]*u.km/u.s)
     model = lav.voigt_from_components(wv_array, [comp1,comp2])
+
+
+def test_voigt_model_cache():
+    import warnings
+    from linetools.isgm.tests.test_use_abscomp import mk_comp
+    warnings.filterwarnings('ignore')
+    wv_array = np.arange(1200, 1250, 0.005) * u.AA
+    comp1, _ = mk_comp('HI', zcomp=0.01, vlim=[-10,10]*u.km/u.s, b=20*u.km/u.s, use_rand=False)
+    comp2, _ = mk_comp('HI', zcomp=0.02, vlim=[-10,10]*u.km/u.s, b=20*u.km/u.s, use_rand=False)
+    cache = lav.VoigtModelCache(wv_array, fwhm=3., tau_min=1e-8)
+    model = lav.voigt_from_components(wv_array, [comp1, comp2], cache=cache)
+    full = lav.voigt_from_components(wv_array, [comp1, comp2], fwhm=3., skip_wveval=True)
+    np.testing.assert_allclose(model.flux.value, full.flux.value, atol=1e-6)
+    # Nothing to update
+    assert cache.update([comp1, comp2]) == 0
+    # Modify one component
+    for line in comp2._abslines:
+        line.attrib['b'] = 40*u.km/u.s
+    assert cache.update([comp1, comp2]) == 1
+    full = lav.voigt_from_components(wv_array, [comp1, comp2], fwhm=3., skip_wveval=True)
+    np.testing.assert_allclose(cache.flux, full.flux.value, atol=1e-6)
+    # Remove one
+    assert cache.update([comp2]) == 1
+    full = lav.voigt_from_components(wv_array, [comp2], fwhm=3., skip_wveval=True)
+    np.testing.assert_allclose(cache.flux, full.flux.value, atol=1e-6)
+    # Same wavelengths in other units;  others (or kwargs) are refused
+    lav.voigt_from_components(wv_array.to('nm'), [comp2], cache=cache)
+    with pytest.raises(ValueError):
+        lav.voigt_from_components(wv_array[:-1], [comp2], cache=cache)
+    with pytest.raises(ValueError):
+        lav.voigt_from_components(wv_array, [comp2], cache=cache, fwhm=2.)
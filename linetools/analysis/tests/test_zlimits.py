@@ -8,6 +8,7 @@ import pytest
 from astropy import units as u
 
 from linetools.analysis.zlimits import zLimits
+from linetools import utils as ltu
 from linetools.spectralline import AbsLine
 
 def test_init():
@@ -62,3 +63,16 @@ def test_to_dict():
     ldict = llim.to_dict()
     for key in ['vlim', 'wrest', 'wvlim', 'z', 'zlim']:
         assert key in ldict.keys()
+
+def test_lazy():
+    llim = zLimits(1., (0.999, 1.001))
+    # No wrest, no wvlim
+    assert not hasattr(llim, 'wvlim')
+    assert 'wvlim' not in llim.to_dict().keys()
+    # Re-evaluated after set
+    np.testing.assert_allclose(llim.vlim.value, [-149.93370, 149.858755])
+    llim.set((0.998, 1.002))
+    np.testing.assert_allclose(llim.vlim.value, (ltu.dv_from_z(np.array([0.998, 1.002]), 1.)).value)
+    # Slots
+    with pytest.raises(AttributeError):
+        llim.junk = 1
@@ -8,8 +8,6 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 import numpy as np
 import os
 
-from astropy.modeling import models, fitting
-
 
 def box_ew(spec):
     """  Boxcar EW calculation
@@ -94,6 +92,7 @@ def gaussian_ew(spec, ltype, initial_guesses=None):
         raise ValueError('gaussian_ew: Format of the initial_guesses is incorrect')
 
     # Model initialization
+    from astropy.modeling import models, fitting
     g_init = models.Gaussian1D(amplitude=amp_init, mean=mean_init, stddev=stddev_init) # This model does not support units
 
     # Fitting algorithm initialization
@@ -119,3 +118,53 @@ def gaussian_ew(spec, ltype, initial_guesses=None):
     sigEW = EW * np.sqrt(cov[0,0] / x**2 + cov[2,2] / y**2 + 2 * cov[0,2] / (x*y))
 
     return EW, sigEW
+
+
+def box_smooth(flux, nbox):
+    """ Boxcar smooth an array with cumulative sums
+
+    Equivalent to astropy.convolution.convolve with a Box1DKernel(nbox),
+    i.e. zero-padded edges and NaNs interpolated over.  As for
+    Box1DKernel, an even nbox has half-weighted end pixels.
+
+    Parameters
+    ----------
+    flux : ndarray
+      1D or 2D array;  smoothed along the last axis
+    nbox : int or array of int
+      Width of the box in pixels;  for a 2D flux this may
+      be given per row
+
+    Returns
+    -------
+    smooth : ndarray
+    """
+    flux = np.asarray(flux, dtype=float)
+    good = np.isfinite(flux)
+    fx = np.where(good, flux, 0.)
+    nbox = np.asarray(nbox).astype(int)
+    if nbox.ndim > 0:
+        nbox = nbox[:, None]
+    even = (nbox % 2) == 0
+    hw = nbox // 2  # Half width of the kernel
+    hin = np.where(even, hw - 1, hw)  # Half width of the full-weight pixels
+    pmax = int(np.max(hw))
+    pad = [(0, 0)] * (flux.ndim - 1) + [(pmax + 1, pmax)]
+    idx = np.arange(flux.shape[-1]) + pmax + 1  # Index of each pixel in the padded array
+
+    def _take(arr, indices):
+        return np.take_along_axis(arr, np.broadcast_to(indices, flux.shape), axis=-1)
+
+    def _conv(arr, cval=0.):
+        arrp = np.pad(arr, pad, constant_values=cval)
+        cum = np.cumsum(arrp, axis=-1)
+        out = _take(cum, idx + hin) - _take(cum, idx - hin - 1)
+        if np.any(even):
+            out += np.where(even, 0.5 * (_take(arrp, idx - hw) + _take(arrp, idx + hw)), 0.)
+        return out
+
+    # Renormalize for NaNs;  the zero-padded edges count as good pixels
+    wgt = _conv(good.astype(float), cval=1.)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smooth = _conv(fx) / wgt
+    return smooth
@@ -8,12 +8,9 @@ import numpy as np
 import warnings
 import pdb
 
-from scipy.special import wofz
-
 from astropy import units as u
 from astropy.units import Quantity
 from astropy import constants as const
-from astropy.modeling import FittableModel, Parameter
 
 from linetools.spectra.xspectrum1d import XSpectrum1D
 from linetools.spectralline import AbsLine
@@ -40,6 +37,7 @@ def voigt_wofz(vin,a):
     -------
     voigt : ndarray
     """
+    from scipy.special import wofz
     return wofz(vin + 1j * a).real
 
 
@@ -259,7 +257,7 @@ def voigt_from_abslines(iwave, line, fwhm=None, ret=['vmodel'],
     return ret_val
 
 
-def voigt_from_components(wv_array, complist, **kwargs):
+def voigt_from_components(wv_array, complist, cache=None, **kwargs):
     """Generates a Voigt absorption model from a list
     of AbsComponents.
 
@@ -270,6 +268,11 @@ def voigt_from_components(wv_array, complist, **kwargs):
         model domain
     complist : list of AbsComponents
         A list of AbsComponents
+    cache : VoigtModelCache, optional
+        If provided, the model is updated incrementally from the
+        components that changed since its last call.
+        Its wavelengths must be wv_array and no kwargs may be given
+        (the cache sets the FWHM)
 
     Returns
     -------
@@ -281,6 +284,16 @@ def voigt_from_components(wv_array, complist, **kwargs):
     This is a wrapper to linetools.analysis.voigt.voigt_from_abslines()
     and **kwargs are passed to it.
     """
+    if cache is not None:
+        if len(kwargs) > 0:
+            raise ValueError('voigt_from_components: kwargs {} cannot be used with a cache'.format(
+                sorted(kwargs.keys())))
+        if (wv_array is not cache.wave) and not (
+                isinstance(wv_array, Quantity) and (wv_array.shape == cache.wave.shape) and
+                np.allclose(wv_array.to(cache.wave.unit).value, cache.wave.value, rtol=1e-12, atol=0.)):
+            raise ValueError('voigt_from_components: wv_array does not match the wavelengths of the cache')
+        cache.update(complist)
+        return cache.vmodel
 
     # Identify the goodlines within the domain
     wvmin = np.min(wv_array)
@@ -295,33 +308,259 @@ def voigt_from_components(wv_array, complist, **kwargs):
     return voigt_from_abslines(wv_array, gdlin, ret=['vmodel'], **kwargs)
 
 
-class single_voigt_model(FittableModel):
-    '''Generate a single Voigt model in astropy framework for fitting
-
-    Need to consider resampling wavelength array
-
-    input: wave array  :: Assumed in Angstroms; needs to be unitless
-    output: absorbed, normalized flux
-    Parameters: logN,b,z,wrest,f,gamma,fwhm
-    '''
-    inputs = ('wave',)
-    outputs = ('flux',)
-
-    # Free parameters (generally)
-    logN = Parameter()
-    b = Parameter()  # Assumes km/s
-    z = Parameter()
-
-    # Fixed parameters
-    wrest = Parameter(fixed=True)
-    f = Parameter(fixed=True)
-    gamma = Parameter(fixed=True)
-    fwhm = Parameter(fixed=True)
-
-    @staticmethod
-    def evaluate(wave,logN,b,z,wrest,f,gamma,fwhm):
-        tau = voigt_tau(wave/1e8, [logN,z,b*1e5,wrest/1e8,f,gamma])
-        fx = np.exp(-1*tau)
-        if fwhm > 0.:
-            fx = lsc.convolve_psf(fx, fwhm)
-        return fx 
+class VoigtModelCache(object):
+    """ Voigt model of a sightline that is updated one component at a time
+
+    The optical depth of each component is held on the pixel windows
+    of its lines (down to tau_min), keyed by a hash of the line
+    parameters.  When a component changes, its stale contribution is
+    subtracted from the total tau, the new one is added, and only
+    the affected pixels are re-smoothed.
+
+    Parameters
+    ----------
+    wave : Quantity array
+      Observed wavelengths (sorted).  These should sample the
+      b-values of the lines, i.e. no sub-grid is used (as in
+      voigt_from_abslines with skip_wveval=True)
+    fwhm : float, optional
+      FWHM for Gaussian smoothing (pixels)
+    tau_min : float, optional
+      Optical depth at which the line windows are truncated
+
+    Attributes
+    ----------
+    tau : ndarray
+      Total optical depth
+    """
+
+    def __init__(self, wave, fwhm=None, tau_min=1e-6):
+        if not isinstance(wave, Quantity):
+            raise ValueError('VoigtModelCache: wave must be a Quantity array')
+        self.wave = wave
+        self.fwhm = fwhm
+        self.tau_min = tau_min
+        self._wavecm = wave.to('cm').value
+        self._wvmnx = (np.min(wave), np.max(wave))
+        self.tau = np.zeros(wave.size)
+        self._flux = np.ones(wave.size)
+        self._smooth = np.ones(wave.size)
+        # Half-width of the smoothing kernel, as in convolve_psf()
+        if fwhm is not None:
+            self._nkern = int(np.ceil(3.034854259 * fwhm / 2.354820046))
+            self._smooth = lsc.convolve_psf(self._flux, fwhm)
+        # key -> (hash, list of (i0, i1, tau))
+        self._comps = {}
+
+    def _line_pars(self, comp):
+        """ voigt_tau() parameters of the lines of a component within the domain
+        """
+        pars = []
+        for line in comp._abslines:
+            wvobs = (1 + line.z) * line.wrest
+            if not ((wvobs > self._wvmnx[0]) & (wvobs < self._wvmnx[1])):
+                continue
+            if not isinstance(line.attrib['N'], u.Quantity):
+                raise RuntimeError("line attribute 'N' must have units!")
+            if line.attrib['b'].value <= 0.:
+                raise RuntimeError("line attribute 'b' must have units and be positive!")
+            pars.append((np.log10(line.attrib['N'].value),
+                         line.z, line.attrib['b'].to('cm/s').value,
+                         line.wrest.to('cm').value, line.data['f'],
+                         line.data['gamma'].value))
+        return tuple(pars)
+
+    def _line_tau(self, par):
+        """ Optical depth of a line on its pixel window
+        """
+        zp1 = par[1] + 1.
+        nujk = c_cgs / par[3]
+        dnu = par[2] / par[3]
+        avoigt = par[5] / (4 * np.pi * dnu)
+        tau_peak = 0.014971475 * 10.**par[0] * par[4] * voigt_wofz(0., avoigt) / dnu
+        # Doppler core and damping wings, H(a,u) ~ a/(sqrt(pi) u^2)
+        ucore = np.sqrt(np.log(max(tau_peak / self.tau_min, 1.)))
+        uwing = np.sqrt(tau_peak * avoigt / (np.sqrt(np.pi) * self.tau_min))
+        umax = max(ucore, uwing) + 1.
+        wvlo = zp1 * c_cgs / (nujk + umax * dnu)
+        wvhi = zp1 * c_cgs / (nujk - umax * dnu) if umax*dnu < nujk else np.inf
+        i0 = np.searchsorted(self._wavecm, wvlo, side='left')
+        i1 = np.searchsorted(self._wavecm, wvhi, side='right')
+        return i0, i1, voigt_tau(self._wavecm[i0:i1], par)
+
+    def _refresh(self, i0, i1):
+        """ Update the flux and smoothed flux affected by pixels [i0,i1)
+        """
+        if i1 <= i0:
+            return
+        self._flux[i0:i1] = np.exp(-1.0*self.tau[i0:i1])
+        if self.fwhm is None:
+            return
+        nk, npix = self._nkern, self.tau.size
+        lo, hi = max(0, i0-nk), min(npix, i1+nk)
+        a0, a1 = max(0, i0-2*nk), min(npix, i1+2*nk)
+        self._smooth[lo:hi] = lsc.convolve_psf(self._flux[a0:a1], self.fwhm)[lo-a0:hi-a0]
+
+    def set_component(self, comp, key=None):
+        """ Add or update the contribution of a component
+
+        Parameters
+        ----------
+        comp : AbsComponent
+        key : hashable, optional
+          Identifies the component in the cache;  default is id(comp)
+
+        Returns
+        -------
+        updated : bool
+          False if the component was cached with the same parameters
+        """
+        if key is None:
+            key = id(comp)
+        pars = self._line_pars(comp)
+        phash = hash(pars)
+        if (key in self._comps) and (self._comps[key][0] == phash):
+            return False
+        i0, i1 = self._remove(key)
+        windows = [self._line_tau(par) for par in pars]
+        for j0, j1, tau in windows:
+            self.tau[j0:j1] += tau
+            i0, i1 = min(i0, j0), max(i1, j1)
+        self._comps[key] = (phash, windows)
+        self._refresh(i0, i1)
+        return True
+
+    def _remove(self, key):
+        """ Subtract the contribution of a cached component;  returns its pixel range
+        """
+        i0, i1 = self.tau.size, 0
+        if key not in self._comps:
+            return i0, i1
+        for j0, j1, tau in self._comps.pop(key)[1]:
+            self.tau[j0:j1] -= tau
+            i0, i1 = min(i0, j0), max(i1, j1)
+        # Round-off
+        if i1 > i0:
+            self.tau[i0:i1] = np.maximum(self.tau[i0:i1], 0.)
+        return i0, i1
+
+    def remove_component(self, comp=None, key=None):
+        """ Remove a component from the model
+
+        Parameters
+        ----------
+        comp : AbsComponent, optional
+        key : hashable, optional
+          Default is id(comp)
+        """
+        if key is None:
+            key = id(comp)
+        self._refresh(*self._remove(key))
+
+    def update(self, complist, keys=None):
+        """ Synchronize the model with a list of components;  only
+        new or modified components are evaluated and cached components
+        not in the list are removed
+
+        Parameters
+        ----------
+        complist : list of AbsComponent
+        keys : list, optional
+          Default is id() of the components
+
+        Returns
+        -------
+        nupdate : int
+          Number of components (re)evaluated or removed
+        """
+        if keys is None:
+            keys = [id(comp) for comp in complist]
+        nupdate = 0
+        for key in set(self._comps.keys()) - set(keys):
+            self.remove_component(key=key)
+            nupdate += 1
+        for comp, key in zip(complist, keys):
+            nupdate += self.set_component(comp, key=key)
+        return nupdate
+
+    def rebuild(self):
+        """ Sum the cached contributions from scratch, e.g. to clear round-off
+        """
+        self.tau[:] = 0.
+        for _, windows in self._comps.values():
+            for j0, j1, tau in windows:
+                self.tau[j0:j1] += tau
+        self._refresh(0, self.tau.size)
+
+    @property
+    def flux(self):
+        """ Model flux (smoothed if fwhm was set)
+        """
+        if self.fwhm is None:
+            return self._flux.copy()
+        return self._smooth.copy()
+
+    @property
+    def vmodel(self):
+        """ Model as an XSpectrum1D
+        """
+        return XSpectrum1D.from_tuple((self.wave, self.flux))
+
+    def __len__(self):
+        return len(self._comps)
+
+    def __repr__(self):
+        return '<{:s}: ncomp={:d}, npix={:d}, fwhm={}>'.format(
+            self.__class__.__name__, len(self), self.tau.size, self.fwhm)
+
+
+def _single_voigt_model():
+    """ Build the single_voigt_model class;  astropy.modeling is
+    slow to import, so this is only done on first use
+    """
+    from astropy.modeling import FittableModel, Parameter
+
+    class single_voigt_model(FittableModel):
+        '''Generate a single Voigt model in astropy framework for fitting
+
+        Need to consider resampling wavelength array
+
+        input: wave array  :: Assumed in Angstroms; needs to be unitless
+        output: absorbed, normalized flux
+        Parameters: logN,b,z,wrest,f,gamma,fwhm
+        '''
+        inputs = ('wave',)
+        outputs = ('flux',)
+
+        # Free parameters (generally)
+        logN = Parameter()
+        b = Parameter()  # Assumes km/s
+        z = Parameter()
+
+        # Fixed parameters
+        wrest = Parameter(fixed=True)
+        f = Parameter(fixed=True)
+        gamma = Parameter(fixed=True)
+        fwhm = Parameter(fixed=True)
+
+        @staticmethod
+        def evaluate(wave,logN,b,z,wrest,f,gamma,fwhm):
+            tau = voigt_tau(wave/1e8, [logN,z,b*1e5,wrest/1e8,f,gamma])
+            fx = np.exp(-1*tau)
+            if fwhm > 0.:
+                fx = lsc.convolve_psf(fx, fwhm)
+            return fx 
+
+    single_voigt_model.__qualname__ = 'single_voigt_model'  # for pickle
+    return single_voigt_model
+
+
+def __getattr__(name):
+    if name == 'single_voigt_model':
+        globals()[name] = _single_voigt_model()
+        return globals()[name]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | {'single_voigt_model'})
@@ -12,6 +12,7 @@ from astropy import constants as const
 from linetools import utils as ltu
 
 ckms = const.c.to('km/s')
+c_kms = ckms.value
 
 
 class zLimits(object):
@@ -31,7 +32,10 @@ class zLimits(object):
       e.g. from an AbsLine object
     vlim : Quantity array
       velocity limits for the line
+
+    wvlim and vlim are evaluated from zlim when first accessed
     """
+    __slots__ = ('_z', '_zlim', '_wrest', '_wvlim', '_vlim')
 
     @classmethod
     def from_specline(cls, aline, z, zlim):
@@ -96,8 +100,6 @@ class zLimits(object):
             if not isinstance(wrest, Quantity):
                 raise IOError("Input wrest must be a quantity")
 
-        # Data
-        self._data = {}
         # Set
         self._z = z
         self._wrest = wrest
@@ -125,12 +127,21 @@ class zLimits(object):
     def wvlim(self):
         """ Return wvlim
         """
+        if self._wrest is None:
+            raise AttributeError("wvlim requires wrest")
+        if self._wvlim is None:
+            self._wvlim = self._wrest*(1+np.array(self._zlim))
         return self._wvlim
 
     @property
     def vlim(self):
         """ Return vlim
         """
+        if self._vlim is None:
+            # Relativistic, as in ltu.dv_from_z()
+            zp1 = (1 + np.array(self._zlim, dtype=float))**2
+            zrp1 = (1 + self._z)**2
+            self._vlim = ((zp1 - zrp1) / (zp1 + zrp1)) * c_kms * u.km/u.s
         return self._vlim
 
     @property
@@ -146,12 +157,11 @@ class zLimits(object):
         return self.vlim[1]
 
     def reset(self):
-        """ Update all the values
+        """ Update all the values, i.e. clear wvlim and vlim
+        which are re-evaluated when accessed
         """
-        #self._data['zlim'] = self._zlim
-        if self._wrest is not None:
-            self._wvlim = self._wrest*(1+np.array(self._zlim))
-        self._vlim = ltu.dv_from_z(self._zlim, self._z)
+        self._wvlim = None
+        self._vlim = None
 
     def is_set(self):
         """ Query if the limits are set to sensible values
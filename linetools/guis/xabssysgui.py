@@ -193,6 +193,7 @@ class XAbsSysGui(QDialog):
         # Components
         comps = ltiu.build_components_from_abslines(abs_lines, chk_vel=False)
         self.abs_sys._components = comps
+        self.abs_sys._reset_lookup()
         # Return
         return
 
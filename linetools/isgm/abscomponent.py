@@ -245,7 +245,7 @@ class AbsComponent(object):
         if coord is not None:
             radec = coord
         else:
-            radec = SkyCoord(ra=idict['RA'], dec=idict['DEC'], unit='deg')
+            radec = ltu.intern_coord((idict['RA'], idict['DEC']))
         # Init
         # slf = cls(radec, tuple(idict['Zion']), idict['zcomp'], Quantity(idict['vlim'], unit='km/s'),
 
@@ -366,7 +366,7 @@ class AbsComponent(object):
         """
 
         # Required
-        self.coord = ltu.radec_to_coord(radec)
+        self.coord = ltu.intern_coord(radec)
         self.Zion = Zion
         # Limits
         zlim = ltu.z_from_dv(vlim, zcomp)
@@ -438,7 +438,7 @@ class AbsComponent(object):
           Insist the bounds of the AbsLine are within 1km/s of the Component
              (allows for round-off error)
         chk_sep : bool, optional
-          Perform coordinate check (expensive)
+          Perform coordinate check
         vtoler : float, optional
           Tolerance for velocity in km/s (must be positive)
         """
@@ -447,7 +447,7 @@ class AbsComponent(object):
 
         # Perform easy checks
         if chk_sep:
-            testc = bool(self.coord.separation(absline.attrib['coord']) < tol)
+            testc = ltu.same_sky(self.coord, absline.attrib['coord'], tol)
         else:
             testc = True
 
@@ -737,52 +737,19 @@ class AbsComponent(object):
         self.attrib['flag_N'] = 0
         if debug:
             pdb.set_trace()
-        for aline in self._abslines:
-            if aline.attrib['flag_N'] == 0:  # No value
-                warnings.warn("Absline {} has flag=0.  Hopefully you expected that".format(str(aline)))
-                continue
-            # Check N is filled
-            if np.isclose(aline.attrib['N'].value, 0.):
-                raise ValueError("Need to set N in attrib.  \n Consider linear_clm in linetools.analysis.absline")
-            if aline.attrib['flag_N'] == 1:  # Good value?
-                if self.flag_N == 1:  # Weighted mean
-                    # Original
-                    weight = 1. / np.mean(self.sig_N)**2
-                    mu = self.attrib['N'] * weight
-                    # Update
-                    weight += 1./np.mean(aline.attrib['sig_N'])**2
-                    self.attrib['N'] = (mu + aline.attrib['N']/np.mean(aline.attrib['sig_N'])**2) / weight
-                    self.attrib['sig_N'] = Quantity([np.sqrt(1./weight)]*2)
-                else:  # Fill
-                    self.attrib['N'] = aline.attrib['N']
-                    self.attrib['sig_N'] = aline.attrib['sig_N']
-                    self.attrib['flag_N'] = 1
-            elif aline.attrib['flag_N'] == 2:  # Lower limit
-                if self.flag_N in [0, 3]:
-                    self.attrib['N'] = aline.attrib['N']
-                    self.attrib['sig_N'] = aline.attrib['sig_N']
-                    self.attrib['flag_N'] = 2
-                elif self.flag_N == 2:
-                    if aline.attrib['N'] > self.attrib['N']:
-                        self.attrib['N'] = aline.attrib['N']
-                        self.attrib['sig_N'] = aline.attrib['sig_N']
-                elif self.flag_N == 1:
-                    pass
-            elif aline.attrib['flag_N'] == 3:  # Upper limit
-                if self.flag_N == 0:
-                    self.attrib['N'] = max(aline.attrib['N'], nsig_upper*aline.attrib['sig_N'])
-                    self.attrib['sig_N'] = aline.attrib['sig_N']
-                    self.attrib['flag_N'] = 3
-                elif self.flag_N in [1, 2]:
-                    pass
-                elif self.flag_N == 3:
-                    if max(aline.attrib['N'], nsig_upper*aline.attrib['sig_N']) < self.attrib['N']:
-                        self.attrib['N'] = max(aline.attrib['N'], nsig_upper*aline.attrib['sig_N'])
-                        self.attrib['sig_N'] = aline.attrib['sig_N']
-            elif aline.attrib['flag_N'] == 0:  # No value
-                warnings.warn("Absline {} has flag=0.  Hopefully you expected that")
-            else:
-                raise ValueError("Bad flag_N value")
+        flags = np.array([aline.attrib['flag_N'] for aline in self._abslines], dtype=int)
+        for aline in np.array(self._abslines, dtype=object)[flags == 0]:
+            warnings.warn("Absline {} has flag=0.  Hopefully you expected that".format(str(aline)))
+        if np.any(flags != 0):
+            Ns = np.array([aline.attrib['N'].to('cm**-2').value for aline in self._abslines])
+            sigNs = np.array([np.broadcast_to(aline.attrib['sig_N'].to('cm**-2').value, (2,))
+                              for aline in self._abslines])
+            # Detections > lower limits > upper limits
+            _, flag_N, N, sig_N = ltaa.synthesize_colm_by_key(
+                np.zeros(flags.size, dtype=int), flags, Ns, sigNs, nsig_upper=nsig_upper)
+            self.attrib['flag_N'] = int(flag_N[0])
+            self.attrib['N'] = N[0] / u.cm**2
+            self.attrib['sig_N'] = sig_N[0] / u.cm**2
         # Enforce 2-element error arrays
         if self.attrib['sig_N'].size == 1:
             self.attrib['sig_N'] = [self.attrib['sig_N'].value]*2 * self.attrib['sig_N'].unit
@@ -1010,15 +977,15 @@ class AbsComponent(object):
                      A=self.A, Ej=self.Ej.to('1/cm').value, comment=self.comment,
                      attrib=self.attrib.copy())  # Avoids changing the dict in place
         cdict['class'] = self.__class__.__name__
-        # AbsLines
-        cdict['lines'] = {}
-        for iline in self._abslines:
-            cdict['lines'][iline.wrest.value] = iline.to_dict()
         # set linear quantities in column density
         _, _ = ltaa.linear_clm(cdict['attrib'])
 
         # Polish
         cdict = ltu.jsonify(cdict)
+        # AbsLines (already polished)
+        cdict['lines'] = {}
+        for iline in self._abslines:
+            cdict['lines'][iline.wrest.value] = iline.to_dict()
         # Return
         return cdict
 
@@ -138,7 +138,7 @@ class AbsSightline(object):
             Name of the sightline, e.g. '3C273'
         """
         # Required
-        self.coord = ltu.radec_to_coord(radec)
+        self.coord = ltu.intern_coord(radec)
 
         # Lists
         self._components = []
@@ -169,11 +169,11 @@ class AbsSightline(object):
           Tolerance on matching coordinates
           Only used if chk_sep=True
         chk_sep : bool, optional
-          Perform coordinate check (expensive)
+          Perform coordinate check
         """
         # Coordinates
         if chk_sep:
-            testcoord = bool(self.coord.separation(abscomp.coord) < tol)
+            testcoord = ltu.same_sky(self.coord, abscomp.coord, tol)
         else:
             testcoord = True
 
@@ -140,6 +140,7 @@ class AbsSystem(object):
         slf = cls(init_comp.coord, z, vlim, NHI=NHI, **s_kwargs)
         if slf.chk_component(init_comp):
             slf._components.append(init_comp)
+            slf._reset_lookup()
         else:
             raise IOError("Bad component input")
         # Append with component checking
@@ -186,7 +187,7 @@ class AbsSystem(object):
             ckwargs = dict(NHI=idict['NHI'], sig_NHI=idict['sig_NHI'], flag_NHI=idict['flag_NHI'])
         # Coord
         if coord is None:
-            coord = SkyCoord(ra=idict['RA']*u.deg, dec=idict['DEC']*u.deg)
+            coord = ltu.intern_coord((idict['RA'], idict['DEC']))
         # Instantiate
         slf = cls(coord, idict['zabs'], idict['vlim']*u.km/u.s, zem=idict['zem'],
                   name=idict['Name'], **ckwargs)
@@ -216,7 +217,7 @@ class AbsSystem(object):
                 self.flag_NHI = 0
         else:
             self.flag_NHI = flag_NHI
-        self.coord = ltu.radec_to_coord(radec)
+        self.coord = ltu.intern_coord(radec)
         if name is None:
             self.name = 'J{:s}{:s}_z{:.6f}'.format(  # Should be unique
                     self.coord.icrs.ra.to_string(unit=u.hour,sep='',pad=True),
@@ -233,6 +234,7 @@ class AbsSystem(object):
 
         # Components
         self._components = []  # List of AbsComponent objects
+        self._lookup_cache = None  # See _lookup()
 
         # Kinematics
         self.kin = {}
@@ -279,7 +281,7 @@ class AbsSystem(object):
           Tolerance on matching coordinates
           Only used if chk_sep=True
         chk_sep : bool, optional
-          Perform coordinate check (expensive)
+          Perform coordinate check
         chk_z : bool, optional
           Perform standard velocity range test
         overlap_only : bool, optional
@@ -296,7 +298,7 @@ class AbsSystem(object):
         """
         # Coordinates
         if chk_sep:
-            testcoord = bool(self.coord.separation(abscomp.coord) < tol)
+            testcoord = ltu.same_sky(self.coord, abscomp.coord, tol)
         else:
             testcoord = True
         # Now redshift/velocity
@@ -329,6 +331,7 @@ class AbsSystem(object):
         # Append?
         if test:
             self._components.append(abscomp)
+            self._reset_lookup()
         else:
             warnings.warn('Input AbsComponent with Zion={} does not match AbsSystem rules. Not appending'.format(abscomp.Zion))
             if not testcoord:
@@ -417,16 +420,16 @@ class AbsSystem(object):
           multiple components.  The returned quantity will then
           be a list instead of a single AbsLine object
         """
-        # Generate the lines
-        abslines = self.list_of_abslines()
-        if isinstance(inp,basestring):
-            names = np.array([absline.name for absline in abslines])
-            mt = np.where(names == inp)[0]
-        elif isinstance(inp,Quantity):
-            wrest = Quantity([absline.wrest for absline in abslines])
-            mt = np.where(np.abs(wrest-inp) < 0.01*u.AA)[0]
-        else:
+        if not isinstance(inp, (basestring, Quantity)):
             raise IOError("Bad input to absline")
+        # Generate the lines
+        lookup = self._lookup()
+        mt = self._match_abslines(lookup, inp)
+        if (len(mt) == 0) or not self._match_abslines(lookup, inp, check=mt):
+            # Lines may have changed in place since the tables were built
+            lookup = self._lookup(rebuild=True)
+            mt = self._match_abslines(lookup, inp)
+        abslines = lookup['abslines']
         # Finish
         if len(mt) == 0:
             warnings.warn("No absline with input={}".format(inp))
@@ -452,10 +455,9 @@ class AbsSystem(object):
         """
         if isinstance(inp, tuple):
             # Assume Zion for now, e.g. (26,2)
-            tuples = [comp.Zion for comp in self._components]
             try:
-                idx = tuples.index(inp)
-            except ValueError:
+                idx = self._lookup()['Zion'][inp]
+            except KeyError:
                 warnings.warn("Input Zion {} is not in any component".format(inp))
                 return None
             else:
@@ -489,6 +491,64 @@ class AbsSystem(object):
         warnings.warn("Input absorption line is not in any component")
         return None
 
+    def _match_abslines(self, lookup, inp, check=None):
+        """ Indices of the lines in lookup['abslines'] matching a name or rest wavelength
+
+        With check (indices), return whether those lines (still) match instead
+        """
+        if isinstance(inp, basestring):
+            if check is not None:
+                return all(lookup['abslines'][ii].name == inp for ii in check)
+            return lookup['names'].get(inp, [])
+        wv = inp.to('AA').value
+        if check is not None:
+            return all(np.abs(lookup['abslines'][ii].wrest.to('AA').value-wv) < 0.01 for ii in check)
+        wrest = lookup['wrest']
+        i0 = np.searchsorted(wrest, wv-0.01, side='right')
+        i1 = np.searchsorted(wrest, wv+0.01, side='left')
+        mt = np.sort(lookup['wrest_idx'][i0:i1])
+        return mt[np.abs(lookup['wrest_input'][mt]-wv) < 0.01]
+
+    def _lookup(self, rebuild=False):
+        """ Cached lookup tables for the components and their lines
+
+        Rebuilt when the list of components, the Zion of a component or
+        its number of lines change (O(Ncomp) check), or with rebuild=True.
+        get_absline() checks its matches against the lines themselves and
+        rebuilds on a miss, so lines edited in place are found
+
+        Returns
+        -------
+        lookup : dict
+          Zion -- dict of (Z,ion) to the index of the first such component
+          abslines -- list of AbsLine objects (as in list_of_abslines)
+          names -- dict of transition name to indices in abslines
+          wrest, wrest_idx -- sorted rest wavelengths (AA) and their indices
+          wrest_input -- rest wavelengths (AA) in abslines order
+        """
+        signature = tuple((comp.Zion, len(comp._abslines)) for comp in self._components)
+        if (self._lookup_cache is not None) and not rebuild:
+            components, isignature, lookup = self._lookup_cache
+            if (components is self._components) and (isignature == signature):
+                return lookup
+        lookup = dict(Zion={}, names={})
+        for idx, comp in enumerate(self._components):
+            lookup['Zion'].setdefault(comp.Zion, idx)
+        abslines = self.list_of_abslines()
+        for idx, absline in enumerate(abslines):
+            lookup['names'].setdefault(absline.name, []).append(idx)
+        lookup['abslines'] = abslines
+        lookup['wrest_input'] = np.array([absline.wrest.to('AA').value for absline in abslines])
+        lookup['wrest_idx'] = np.argsort(lookup['wrest_input'], kind='stable')
+        lookup['wrest'] = lookup['wrest_input'][lookup['wrest_idx']]
+        self._lookup_cache = (self._components, signature, lookup)
+        return lookup
+
+    def _reset_lookup(self):
+        """ Drop the cached lookup tables (see _lookup)
+        """
+        self._lookup_cache = None
+
     def list_of_abslines(self):
         """ Generate a list of the absorption lines in this system
 
@@ -619,16 +679,16 @@ class AbsSystem(object):
                        user=user
                        )
         outdict['class'] = self.__class__.__name__
-        # Components
-        outdict['components'] = {}
-        for component in self._components:
-            outdict['components'][component.name] = ltu.jsonify(component.to_dict())
         # Extras
         for eattr in ['spec_file', 'kin']:
             if hasattr(self, eattr):
                 outdict[eattr] = getattr(self,eattr)
         # Polish
         outdict = ltu.jsonify(outdict)
+        # Components (already polished)
+        outdict['components'] = {}
+        for component in self._components:
+            outdict['components'][component.name] = component.to_dict()
         # Return
         return outdict
 
@@ -0,0 +1,167 @@
+""" Redshift-sorted index over a set of absorption components
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import pdb
+import numpy as np
+
+from astropy import units as u
+
+from linetools.isgm.comptable import ComponentTable, _dv_from_z, _z_from_dv
+
+
+def _dvlims_kms(dvlims):
+    """ Check and strip the units of the velocity limits
+    """
+    if np.shape(dvlims)[-1] != 2:
+        raise IOError('dvlims must be a Quantity array of velocity limits (vmin, vmax).')
+    try:
+        return dvlims.to('km/s').value
+    except (u.UnitConversionError, AttributeError):
+        raise IOError('dvlims must have velocity units.')
+
+
+class ComponentIndex(object):
+    """ Index of components sorted by redshift, with buckets per (Z, ion)
+
+    Queries for the components within a velocity window of a redshift
+    are two binary searches on the sorted zcomp array, i.e. O(log N + k).
+
+    Parameters
+    ----------
+    components : list of AbsComponent objects or ComponentTable
+
+    Attributes
+    ----------
+    zcomp : ndarray
+      Component redshifts (input order)
+    Zion : ndarray (N,2)
+      Z, ion of the components (input order)
+    """
+
+    def __init__(self, components):
+        self.components = components
+        if isinstance(components, ComponentTable):
+            self.zcomp = components.comps['z_comp'].data.astype(float)
+            self.Zion = np.column_stack([components.comps['Z'].data, components.comps['ion'].data])
+        else:
+            self.zcomp = np.array([comp.zcomp for comp in components], dtype=float)
+            self.Zion = np.array([comp.Zion for comp in components], dtype=int).reshape(-1, 2)
+        self._key = self.Zion[:, 0]*1000 + self.Zion[:, 1]
+        # Sorted by z
+        self._order = np.argsort(self.zcomp, kind='stable')
+        self._zsort = self.zcomp[self._order]
+        # (Z, ion) buckets, filled as needed
+        self._buckets = {}
+
+    def __len__(self):
+        return self.zcomp.size
+
+    def _sorted(self, Zion=None):
+        """ Indices (sorted by z) and redshifts of all components or a single ion
+        """
+        if Zion is None:
+            return self._order, self._zsort
+        key = Zion[0]*1000 + Zion[1]
+        if key not in self._buckets:
+            idx = self._order[self._key[self._order] == key]
+            self._buckets[key] = (idx, self.zcomp[idx])
+        return self._buckets[key]
+
+    def query(self, z, dvlims, Zion=None):
+        """ Indices of the components within dvlims of z
+
+        Parameters
+        ----------
+        z : float
+        dvlims : Quantity array
+          Rest-frame velocity limits (inclusive) around z
+        Zion : tuple, optional
+          Restrict to a single (Z, ion)
+
+        Returns
+        -------
+        idx : int ndarray
+          Indices into the input components, in input order
+        """
+        _, idx = self.query_batch(np.array([z], dtype=float), dvlims, Zion=Zion)
+        return np.sort(idx)
+
+    def query_batch(self, z, dvlims, Zion=None):
+        """ Components within dvlims of each of many redshifts
+
+        Parameters
+        ----------
+        z : ndarray
+          Redshifts of the queries
+        dvlims : Quantity array
+          (2,) or (nz,2) rest-frame velocity limits (inclusive)
+        Zion : tuple, optional
+          Restrict to a single (Z, ion)
+
+        Returns
+        -------
+        iz : int ndarray
+          Index of the query for each match
+        icomp : int ndarray
+          Index of the matching component (sorted by zcomp within each query)
+        """
+        z = np.atleast_1d(np.asarray(z, dtype=float))
+        dv = np.broadcast_to(_dvlims_kms(dvlims), (z.size, 2))
+        idx, zsort = self._sorted(Zion)
+        # dv is monotonic in zcomp;  pad the window and then apply the exact cut
+        zlo = _z_from_dv(dv[:, 0], z)
+        zhi = _z_from_dv(dv[:, 1], z)
+        pad = 1e-9 * (1 + z)
+        start = np.searchsorted(zsort, zlo - pad, side='left')
+        stop = np.searchsorted(zsort, zhi + pad, side='right')
+        counts = np.maximum(stop - start, 0)
+        iz = np.repeat(np.arange(z.size), counts)
+        pos = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))
+        dv_comp = _dv_from_z(zsort[pos], z[iz])
+        good = (dv_comp >= dv[iz, 0]) & (dv_comp <= dv[iz, 1])
+        return iz[good], idx[pos[good]]
+
+    def components_at_z(self, z, dvlims, Zion=None):
+        """ Components within dvlims of z
+
+        Parameters
+        ----------
+        z : float
+        dvlims : Quantity array
+        Zion : tuple, optional
+
+        Returns
+        -------
+        components : list
+          AbsComponent objects (generated if the index is on a ComponentTable)
+        """
+        return [self.components[ii] for ii in self.query(z, dvlims, Zion=Zion)]
+
+    def abslines_at_z(self, Zion, z, dvlims):
+        """ AbsLine objects of the components of one ion within dvlims of z
+
+        Parameters
+        ----------
+        Zion : tuple
+        z : float
+        dvlims : Quantity array
+
+        Returns
+        -------
+        abslines : list
+        """
+        abslines = []
+        for ii in self.query(z, dvlims, Zion=Zion):
+            if isinstance(self.components, ComponentTable):
+                abslines += self.components.abslines(ii)
+            else:
+                abslines += self.components[ii]._abslines
+        return abslines
+
+    def __repr__(self):
+        txt = '<{:s}: ncomp={:d}'.format(self.__class__.__name__, len(self))
+        if len(self) > 0:
+            txt += ', z=[{:g},{:g}]'.format(self._zsort[0], self._zsort[-1])
+        txt += '>'
+        return txt
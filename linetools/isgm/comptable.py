@@ -0,0 +1,542 @@
+""" Columnar (struct-of-arrays) catalog of absorption components
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+# Python 2 & 3 compatibility
+try:
+    basestring
+except NameError:
+    basestring = str
+
+import pdb
+import numpy as np
+import warnings
+
+from astropy import constants as const
+from astropy import units as u
+from astropy.table import Table
+from astropy.coordinates import SkyCoord
+
+from linetools.abund.ions import ion_to_name
+
+c_kms = const.c.to('km/s').value
+
+# Columns held for the components and for their AbsLine objects
+#   (name, dtype, unit, default)
+comp_columns = [('RA', float, u.deg, 0.), ('DEC', float, u.deg, 0.),
+                ('comp_name', object, None, ''), ('Z', int, None, 0), ('ion', int, None, 0),
+                ('Ej', float, 1/u.cm, 0.), ('stars', object, None, ''),
+                ('z_comp', float, None, 0.), ('zmin', float, None, 0.), ('zmax', float, None, 0.),
+                ('flag_N', int, None, 0), ('logN', float, None, 0.), ('sig_logN', (float, 2), None, 0.),
+                ('b', float, u.km/u.s, 0.), ('sig_b', float, u.km/u.s, 0.),
+                ('vel', float, u.km/u.s, 0.), ('sig_vel', float, u.km/u.s, 0.),
+                ('reliability', object, None, 'none'), ('comment', object, None, '')]
+line_columns = [('comp_idx', int, None, 0), ('name', object, None, ''),
+                ('wrest', float, u.AA, 0.), ('z', float, None, 0.),
+                ('zmin', float, None, 0.), ('zmax', float, None, 0.),
+                ('flag_N', int, None, 0), ('logN', float, None, 0.), ('sig_logN', (float, 2), None, 0.),
+                ('b', float, u.km/u.s, 0.), ('sig_b', float, u.km/u.s, 0.),
+                ('EW', float, u.AA, 0.), ('sig_EW', float, u.AA, 0.), ('flag_EW', int, None, 0)]
+
+
+def _empty_table(columns, nrow):
+    """ Table of default values for the input column definitions
+    """
+    tab = Table()
+    for name, dtype, unit, default in columns:
+        if isinstance(dtype, tuple):
+            tab[name] = np.full((nrow, dtype[1]), default, dtype=dtype[0])
+        else:
+            tab[name] = np.full(nrow, default, dtype=dtype)
+        tab[name].unit = unit
+    return tab
+
+
+def _dv_from_z(z, zref):
+    """ Relativistic velocity offset in km/s (see linetools.utils.dv_from_z)
+    """
+    return c_kms * ((1 + z)**2 - (1 + zref)**2) / ((1 + z)**2 + (1 + zref)**2)
+
+
+def _z_from_dv(dv, zref):
+    """ Relativistic redshift for an offset in km/s (see linetools.utils.z_from_dv)
+    """
+    beta = dv / c_kms
+    return (1. + zref) * np.sqrt((1. + beta) / (1. - beta)) - 1.
+
+
+def _strip(val, unit):
+    """ Strip the units off an input value;  unitless values are assumed to be in unit
+    """
+    if isinstance(val, u.Quantity):
+        return val.to(unit).value
+    return np.asarray(val, dtype=float)
+
+
+def _attrib_value(attrib, key, unit=None):
+    """ Grab a float from an attrib dict, stripping units if needed
+    """
+    val = attrib.get(key, 0.)
+    if unit is not None:
+        val = _strip(val, unit)
+    return val
+
+
+class ComponentTable(object):
+    """ Struct-of-arrays catalog of absorption components and their lines
+
+    Components are held as the rows of the comps Table and their
+    AbsLine objects as the rows of the lines Table, grouped by
+    the index of the parent component (comp_idx).  AbsComponent
+    objects are only generated on request, e.g. ctbl[10], so a
+    catalog of millions of components remains a handful of arrays.
+
+    Redshift limits (zmin, zmax) are held instead of velocities
+    so that the limits round-trip exactly through AbsComponent.
+
+    Parameters
+    ----------
+    comps : Table
+      One row per component, columns as in comp_columns
+    lines : Table, optional
+      One row per AbsLine, columns as in line_columns
+    linelist : LineList, optional
+      Used to generate the AbsLine objects;  default is LineList('ISM')
+
+    Attributes
+    ----------
+    comps : Table
+    lines : Table
+    """
+
+    @classmethod
+    def from_complist(cls, complist, skip_abslines=False, **kwargs):
+        """ Instantiate from a list of AbsComponent objects
+
+        Parameters
+        ----------
+        complist : list
+          list of AbsComponent objects
+        skip_abslines : bool, optional
+          Do not record the AbsLine objects of the components
+
+        Returns
+        -------
+        ComponentTable
+        """
+        ncomp = len(complist)
+        comps = _empty_table(comp_columns, ncomp)
+        cols = {}
+        for key in ['RA', 'DEC', 'Ej', 'z_comp', 'zmin', 'zmax', 'logN',
+                    'b', 'sig_b', 'vel', 'sig_vel']:
+            cols[key] = np.zeros(ncomp)
+        for key in ['Z', 'ion', 'flag_N']:
+            cols[key] = np.zeros(ncomp, dtype=int)
+        sig_logN = np.zeros((ncomp, 2))
+        names, stars, reliability, comment = [], [], [], []
+        # Lines
+        lrows = []
+        for kk, comp in enumerate(complist):
+            icrs = comp.coord.icrs
+            cols['RA'][kk] = icrs.ra.deg
+            cols['DEC'][kk] = icrs.dec.deg
+            cols['Z'][kk], cols['ion'][kk] = comp.Zion
+            cols['Ej'][kk] = _strip(comp.Ej, '1/cm')
+            cols['z_comp'][kk] = comp.zcomp
+            cols['zmin'][kk], cols['zmax'][kk] = comp.limits.zlim
+            cols['flag_N'][kk] = comp.attrib['flag_N']
+            cols['logN'][kk] = comp.attrib['logN']
+            sig_logN[kk] = comp.attrib['sig_logN']
+            for key in ['b', 'sig_b', 'vel', 'sig_vel']:
+                cols[key][kk] = _attrib_value(comp.attrib, key, 'km/s')
+            names.append(comp.name)
+            stars.append('' if comp.stars is None else comp.stars)
+            reliability.append(comp.reliability)
+            comment.append(comp.comment)
+            if skip_abslines:
+                continue
+            for aline in comp._abslines:
+                lrows.append((kk, aline))
+        # Fill
+        for key in cols:
+            comps[key] = cols[key]
+        comps['sig_logN'] = sig_logN
+        for key, vals in zip(['comp_name', 'stars', 'reliability', 'comment'],
+                             [names, stars, reliability, comment]):
+            comps[key] = np.array(vals, dtype=object)
+        # Lines
+        lines = _empty_table(line_columns, len(lrows))
+        if len(lrows) > 0:
+            lcols = dict(comp_idx=[], name=[], wrest=[], z=[], zmin=[], zmax=[],
+                         flag_N=[], logN=[], sig_logN=[], b=[], sig_b=[],
+                         EW=[], sig_EW=[], flag_EW=[])
+            for kk, aline in lrows:
+                lcols['comp_idx'].append(kk)
+                lcols['name'].append(aline.name)
+                lcols['wrest'].append(aline.wrest.to('AA').value)
+                lcols['z'].append(aline.z)
+                zlim = aline.limits.zlim
+                lcols['zmin'].append(zlim[0])
+                lcols['zmax'].append(zlim[1])
+                for key in ['flag_N', 'logN', 'flag_EW']:
+                    lcols[key].append(aline.attrib.get(key, 0))
+                lcols['sig_logN'].append(np.broadcast_to(aline.attrib.get('sig_logN', 0.), 2))
+                for key in ['b', 'sig_b']:
+                    lcols[key].append(_attrib_value(aline.attrib, key, 'km/s'))
+                for key in ['EW', 'sig_EW']:
+                    lcols[key].append(_attrib_value(aline.attrib, key, 'AA'))
+            for key in lcols:
+                lines[key] = np.array(lcols[key], dtype=lines[key].dtype)
+        return cls(comps, lines, **kwargs)
+
+    @classmethod
+    def from_table(cls, table, **kwargs):
+        """ Instantiate from a Table of components, e.g. one
+        generated by linetools.isgm.utils.table_from_complist()
+
+        Parameters
+        ----------
+        table : Table
+          Mandatory columns are 'RA', 'DEC', 'Z', 'ion', 'z_comp', 'vmin', 'vmax'
+          Units for vmin, vmax are assumed km/s if not given
+          Units for Ej are assumed cm^-1 if not given
+
+        Returns
+        -------
+        ComponentTable
+        """
+        for colname in ['RA', 'DEC', 'Z', 'ion', 'z_comp', 'vmin', 'vmax']:
+            if colname not in table.keys():
+                raise IOError('{} is a mandatory column. Please make sure your input table has it.'.format(colname))
+        comps = _empty_table(comp_columns, len(table))
+
+        def _col(key, unit):
+            if table[key].unit is None:
+                return np.asarray(table[key], dtype=float)
+            return table[key].quantity.to(unit).value
+
+        comps['RA'] = _col('RA', 'deg')
+        comps['DEC'] = _col('DEC', 'deg')
+        comps['Z'] = np.asarray(table['Z'], dtype=int)
+        comps['ion'] = np.asarray(table['ion'], dtype=int)
+        comps['z_comp'] = np.asarray(table['z_comp'], dtype=float)
+        comps['zmin'] = _z_from_dv(_col('vmin', 'km/s'), comps['z_comp'].data)
+        comps['zmax'] = _z_from_dv(_col('vmax', 'km/s'), comps['z_comp'].data)
+        if 'Ej' in table.keys():
+            comps['Ej'] = _col('Ej', '1/cm')
+        # Column densities (either naming convention)
+        flag_key = 'flag_N' if 'flag_N' in table.keys() else 'flag_logN'
+        if flag_key in table.keys():
+            comps['flag_N'] = np.asarray(table[flag_key], dtype=int)
+        if 'logN' in table.keys():
+            comps['logN'] = np.asarray(table['logN'], dtype=float)
+        if 'sig_logN' in table.keys():
+            sig = np.asarray(table['sig_logN'], dtype=float)
+            comps['sig_logN'] = sig.reshape(len(table), -1) * np.ones((1, 2))
+        for key in ['b', 'sig_b', 'vel', 'sig_vel']:
+            if key in table.keys():
+                comps[key] = _col(key, 'km/s')
+        for key, tkey in [('comp_name', 'comp_name'), ('comp_name', 'name'),
+                          ('reliability', 'reliability'), ('comment', 'comment')]:
+            if tkey in table.keys():
+                comps[key] = np.array(table[tkey], dtype=object)
+        # Names and stars
+        slf = cls(comps, **kwargs)
+        nstars = np.where(slf.comps['Ej'] > 0., 1, 0)
+        if 'ion_name' in table.keys():
+            nstars = np.maximum(nstars, np.char.count(np.asarray(table['ion_name'], dtype=str), '*'))
+        slf.comps['stars'] = np.array(['*'*ns for ns in nstars], dtype=object)
+        noname = np.array([len(str(nm)) == 0 for nm in slf.comps['comp_name']], dtype=bool)
+        if np.any(noname):
+            ion_names = slf.ion_name
+            slf.comps['comp_name'][noname] = ['{:s}_z{:0.5f}'.format(iname.replace(' ', ''), zc)
+                                              for iname, zc in zip(ion_names[noname],
+                                                                   slf.comps['z_comp'][noname])]
+        return slf
+
+    def __init__(self, comps, lines=None, linelist=None):
+        # Fill in missing columns
+        if lines is None:
+            lines = _empty_table(line_columns, 0)
+        for columns, tab in [(comp_columns, comps), (line_columns, lines)]:
+            defaults = _empty_table(columns, len(tab))
+            for name, _, unit, _ in columns:
+                if name not in tab.keys():
+                    tab[name] = defaults[name]
+                tab[name].unit = unit
+        # Lines are grouped by component
+        if np.any(np.diff(lines['comp_idx']) < 0):
+            lines = lines[np.argsort(lines['comp_idx'], kind='stable')]
+        self.comps = comps
+        self.lines = lines
+        self._ptr = np.searchsorted(self.lines['comp_idx'].data, np.arange(len(comps)+1))
+        self._linelist = linelist
+        self._coord = None
+
+    @property
+    def coord(self):
+        """ SkyCoord array of the components (generated once)
+        """
+        if self._coord is None:
+            self._coord = SkyCoord(ra=self.comps['RA'].data, dec=self.comps['DEC'].data, unit='deg')
+        return self._coord
+
+    @property
+    def zlim(self):
+        """ ndarray (ncomp, 2) of redshift limits
+        """
+        return np.column_stack([self.comps['zmin'].data, self.comps['zmax'].data])
+
+    @property
+    def vlim(self):
+        """ Quantity (ncomp, 2) of velocity limits relative to z_comp
+        """
+        return _dv_from_z(self.zlim, self.comps['z_comp'].data[:, None]) * u.km/u.s
+
+    @property
+    def nlines(self):
+        """ ndarray of the number of AbsLine objects per component
+        """
+        return np.diff(self._ptr)
+
+    @property
+    def ion_name(self):
+        """ ndarray of ion names, e.g. 'SiII*', following table_from_complist()
+        """
+        Z, ion = self.comps['Z'].data, self.comps['ion'].data
+        mol = (Z * 1000 + ion) < 0
+        names = np.full(len(Z), 'Molecule', dtype=object)
+        if np.any(~mol):
+            names[~mol] = ion_to_name((Z[~mol], ion[~mol]))
+        stars = np.where(self.comps['Ej'].data > 0., '*', '')
+        return np.array([nm + st for nm, st in zip(names, stars)], dtype=object)
+
+    @property
+    def linelist(self):
+        """ LineList used to generate AbsLine objects (loaded on first use)
+        """
+        if self._linelist is None:
+            from linetools.lists.linelist import LineList
+            self._linelist = LineList('ISM')
+        return self._linelist
+
+    def select(self, Zion=None, Ej=None, zlim=None, z=None, vlim=None):
+        """ Boolean mask of the components satisfying all of the input criteria
+
+        Parameters
+        ----------
+        Zion : tuple or list of tuples, optional
+          (Z, ion) of the components to select
+        Ej : Quantity, optional
+          Energy of the lower level
+        zlim : tuple, optional
+          Range of z_comp to select
+        z : float, optional
+          Redshift that vlim refers to;  required with vlim
+        vlim : Quantity array, optional
+          Rest-frame velocity range around z for z_comp
+
+        Returns
+        -------
+        mask : bool ndarray
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if Zion is not None:
+            Zions = [Zion] if isinstance(Zion[0], (int, np.integer)) else Zion
+            key = self.comps['Z'].data * 1000 + self.comps['ion'].data
+            mask &= np.in1d(key, [iZ*1000 + iion for iZ, iion in Zions])
+        if Ej is not None:
+            mask &= np.isclose(self.comps['Ej'].data, _strip(Ej, '1/cm'))
+        zcomp = self.comps['z_comp'].data
+        if zlim is not None:
+            mask &= (zcomp >= zlim[0]) & (zcomp <= zlim[1])
+        if vlim is not None:
+            if z is None:
+                raise IOError('Need to input z with vlim')
+            vmnx = _strip(vlim, 'km/s')
+            dv = _dv_from_z(zcomp, z)
+            mask &= (dv >= vmnx[0]) & (dv <= vmnx[1])
+        return mask
+
+    def select_lines(self, wvlim=None, name=None):
+        """ Boolean mask of the lines satisfying all of the input criteria
+
+        Parameters
+        ----------
+        wvlim : Quantity array, optional
+          Observed wavelength range;  lines whose limits overlap it are selected
+        name : str or list, optional
+          Transition name(s), e.g. 'CIV 1548'
+
+        Returns
+        -------
+        mask : bool ndarray
+        """
+        mask = np.ones(len(self.lines), dtype=bool)
+        if wvlim is not None:
+            wvmnx = _strip(wvlim, 'AA')
+            wrest = self.lines['wrest'].data
+            mask &= (wrest * (1 + self.lines['zmin'].data) < wvmnx[1]) & (
+                wrest * (1 + self.lines['zmax'].data) > wvmnx[0])
+        if name is not None:
+            mask &= np.in1d(np.asarray(self.lines['name'], dtype=str), np.atleast_1d(name))
+        return mask
+
+    def _line_index(self, idx):
+        """ Indices of the lines belonging to the components idx (in order)
+        """
+        counts = self.nlines[idx]
+        starts = self._ptr[:-1][idx]
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(np.sum(counts)), counts
+
+    def take(self, idx):
+        """ New ComponentTable with a subset of the components (and their lines)
+
+        Parameters
+        ----------
+        idx : int ndarray, bool ndarray or slice
+
+        Returns
+        -------
+        ComponentTable
+        """
+        idx = np.arange(len(self))[idx]
+        lidx, counts = self._line_index(idx)
+        lines = self.lines[lidx]
+        lines['comp_idx'] = np.repeat(np.arange(idx.size), counts)
+        slf = self.__class__(self.comps[idx], lines, linelist=self._linelist)
+        if self._coord is not None:
+            slf._coord = self._coord[idx]
+        return slf
+
+    def abslines(self, idx, coord=None):
+        """ Generate the AbsLine objects of a single component
+
+        Parameters
+        ----------
+        idx : int
+        coord : SkyCoord, optional
+
+        Returns
+        -------
+        abslines : list
+        """
+        from linetools.spectralline import AbsLine
+        from linetools.analysis import absline as ltaa
+        if coord is None:
+            coord = SkyCoord(ra=self.comps['RA'][idx], dec=self.comps['DEC'][idx], unit='deg')
+        abslines = []
+        for row in self.lines[self._ptr[idx]:self._ptr[idx+1]]:
+            aline = AbsLine(row['name'], z=float(row['z']), linelist=self.linelist)
+            aline.limits.set((float(row['zmin']), float(row['zmax'])))
+            aline.attrib['coord'] = coord
+            aline.attrib['flag_N'] = int(row['flag_N'])
+            aline.attrib['logN'] = float(row['logN'])
+            sig_logN = np.array(row['sig_logN'])
+            aline.attrib['sig_logN'] = float(sig_logN[0]) if sig_logN[0] == sig_logN[1] else sig_logN
+            for key in ['b', 'sig_b']:
+                aline.attrib[key] = row[key] * u.km/u.s
+            for key in ['EW', 'sig_EW']:
+                aline.attrib[key] = row[key] * u.AA
+            aline.attrib['flag_EW'] = int(row['flag_EW'])
+            if aline.attrib['flag_N'] > 0:
+                _, _ = ltaa.linear_clm(aline.attrib)
+            abslines.append(aline)
+        return abslines
+
+    def component(self, idx, skip_abslines=False):
+        """ Generate the AbsComponent for a single row of the catalog
+
+        Parameters
+        ----------
+        idx : int
+        skip_abslines : bool, optional
+          Do not generate the AbsLine objects (faster)
+
+        Returns
+        -------
+        AbsComponent
+        """
+        from linetools.isgm.abscomponent import AbsComponent
+        from linetools.analysis import absline as ltaa
+        row = self.comps[idx]
+        coord = SkyCoord(ra=row['RA'], dec=row['DEC'], unit='deg')
+        zcomp = float(row['z_comp'])
+        zlim = (float(row['zmin']), float(row['zmax']))
+        vlim = _dv_from_z(np.array(zlim), zcomp) * u.km/u.s
+        stars = row['stars'] if len(row['stars']) > 0 else None
+        comp = AbsComponent(coord, (int(row['Z']), int(row['ion'])), zcomp, vlim,
+                            Ej=row['Ej']/u.cm, stars=stars, name=row['comp_name'],
+                            reliability=row['reliability'], comment=row['comment'])
+        comp.limits.set(zlim)
+        # Attributes
+        comp.attrib['flag_N'] = int(row['flag_N'])
+        comp.attrib['logN'] = float(row['logN'])
+        comp.attrib['sig_logN'] = np.array(row['sig_logN'])
+        if comp.attrib['flag_N'] > 0:
+            _, _ = ltaa.linear_clm(comp.attrib)
+        for key in ['b', 'sig_b', 'vel', 'sig_vel']:
+            comp.attrib[key] = row[key] * u.km/u.s
+        # Lines
+        if not skip_abslines:
+            comp._abslines = self.abslines(idx, coord=coord)
+        return comp
+
+    def to_complist(self, **kwargs):
+        """ Generate the list of AbsComponent objects
+
+        Parameters
+        ----------
+        **kwargs : passed to component()
+
+        Returns
+        -------
+        complist : list
+        """
+        return [self.component(ii, **kwargs) for ii in range(len(self))]
+
+    def to_table(self):
+        """ Table of the components in the format of
+        linetools.isgm.utils.table_from_complist()
+
+        Returns
+        -------
+        tab : Table
+        """
+        tab = Table()
+        for key in ['RA', 'DEC', 'comp_name', 'z_comp', 'Z', 'ion', 'Ej']:
+            tab[key] = self.comps[key]
+        vlim = self.vlim
+        tab['vmin'] = vlim[:, 0]
+        tab['vmax'] = vlim[:, 1]
+        tab['ion_name'] = self.ion_name.astype(str)
+        for key in ['flag_N', 'logN', 'sig_logN', 'b', 'sig_b', 'vel', 'sig_vel',
+                    'comment', 'reliability']:
+            tab[key] = self.comps[key]
+        for key in ['comp_name', 'comment', 'reliability']:
+            tab[key] = tab[key].astype(str)
+        return tab
+
+    def __len__(self):
+        return len(self.comps)
+
+    def __getitem__(self, item):
+        """ AbsComponent for an int, otherwise a ComponentTable subset
+        """
+        if isinstance(item, (int, np.integer)):
+            return self.component(item)
+        return self.take(item)
+
+    def __iter__(self):
+        for ii in range(len(self)):
+            yield self.component(ii)
+
+    def __repr__(self):
+        txt = '<{:s}: ncomp={:d}, nlines={:d}'.format(self.__class__.__name__,
+                                                      len(self), len(self.lines))
+        if len(self) > 0:
+            txt += ', z=[{:g},{:g}]'.format(np.min(self.comps['z_comp']),
+                                            np.max(self.comps['z_comp']))
+        txt += '>'
+        return txt
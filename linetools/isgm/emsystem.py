@@ -167,7 +167,7 @@ class EmSystem(object):
             self.vlim = [-300., 300.]*u.km/u.s
         else:
             self.vlim = vlim
-        self.coord = ltu.radec_to_coord(radec)
+        self.coord = ltu.intern_coord(radec)
         if name is None:
             self.name = 'J{:s}{:s}_z{:.3f}'.format(
                     self.coord.ra.to_string(unit=u.hour,sep='',pad=True),
@@ -240,7 +240,7 @@ class EmSystem(object):
           Tolerance on matching coordinates
           Only used if chk_sep=True
         chk_sep : bool, optional
-          Perform coordinate check (expensive)
+          Perform coordinate check
         chk_z : bool, optional
           Perform standard velocity range test
         overlap_only : bool, optional
@@ -255,7 +255,7 @@ class EmSystem(object):
         """
         # Coordinates
         if chk_sep:
-            testcoord = bool(self.coord.separation(emline.attrib['coord']) < tol)
+            testcoord = ltu.same_sky(self.coord, emline.attrib['coord'], tol)
         else:
             testcoord = True
         # Now redshift/velocity
@@ -13,6 +13,9 @@ import pdb
 import numpy as np
 import warnings
 import json
+import gzip
+import io
+import os
 
 from astropy.table import Table
 from astropy import constants as const
@@ -21,40 +24,256 @@ from astropy.coordinates import SkyCoord
 
 from linetools import utils as ltu
 from linetools.analysis.absline import linear_clm
-from linetools.isgm.abssystem import GenericAbsSystem
+from linetools.isgm.abssystem import GenericAbsSystem, LymanAbsSystem
 from linetools.isgm.abscomponent import AbsComponent
-from linetools.spectralline import AbsLine
+from linetools.spectralline import AbsLine, many_abslines
 from linetools.lists.linelist import LineList
 
 ckms = const.c.to('km/s').value
 
-def abssys_from_json(filename):
+_abssys_classes = dict(GenericAbsSystem=GenericAbsSystem, LymanAbsSystem=LymanAbsSystem)
+
+def abssys_from_json(filename, **kwargs):
     """
     Parameters
     ----------
     filename
+    **kwargs : passed to abssys_from_dict()
 
     Returns
     -------
     abs_sys : AbsSystem
 
     """
-    # Load JSON file to determine type
+    # Load JSON file
     adict = ltu.loadjson(filename)
+    return abssys_from_dict(adict, **kwargs)
+
+
+def abssys_from_dict(adict, **kwargs):
+    """ Instantiate an AbsSystem of the class recorded in the dict
+
+    Parameters
+    ----------
+    adict : dict
+    **kwargs : passed to from_dict()
+
+    Returns
+    -------
+    abs_sys : AbsSystem
+
+    """
     if 'class' in adict.keys():
         if adict['class'] == 'MgIISystem':
             from pyigm.abssys.igmsys import MgIISystem
-            abs_sys = MgIISystem.from_dict(adict)
+            abs_sys = MgIISystem.from_dict(adict, **kwargs)
+        elif adict['class'] in _abssys_classes:
+            abs_sys = _abssys_classes[adict['class']].from_dict(adict, **kwargs)
         else:
             warnings.warn("Unknown or uncoded class: {:s}.\nMaking a Generic one".format(adict['class']))
-            abs_sys = GenericAbsSystem.from_dict(adict)
+            abs_sys = GenericAbsSystem.from_dict(adict, **kwargs)
     else:
-        abs_sys = GenericAbsSystem.from_dict(adict)
+        abs_sys = GenericAbsSystem.from_dict(adict, **kwargs)
 
     # Return
     return abs_sys
 
 
+def obj_from_dict(idict, skip_components=False, skip_abslines=False, **kwargs):
+    """ AbsSystem or AbsComponent from a dict written by its to_dict() method
+
+    Parameters
+    ----------
+    idict : dict
+    skip_components : bool, optional
+      Do not load the components of an AbsSystem
+    skip_abslines : bool, optional
+      Do not load the AbsLine objects of the components
+    **kwargs : passed to from_dict()
+
+    Returns
+    -------
+    AbsSystem or AbsComponent
+    """
+    if idict.get('class') == 'AbsComponent':
+        return AbsComponent.from_dict(idict, skip_abslines=skip_abslines, **kwargs)
+    return abssys_from_dict(idict, skip_components=skip_components,
+                            skip_abslines=skip_abslines, **kwargs)
+
+
+def write_catalog(objs, outfile, overwrite=True):
+    """ Write AbsSystem and/or AbsComponent objects to a JSON-Lines catalog
+
+    Each object is written as one compact JSON record per line, so
+    the catalog may be streamed on output and input.  The file is
+    gzip compressed if outfile ends in .gz
+
+    Parameters
+    ----------
+    objs : iterable
+      AbsSystem or AbsComponent objects, or dicts from their to_dict()
+    outfile : str
+    overwrite : bool, optional
+
+    Returns
+    -------
+    nobj : int
+      Number of records written
+    """
+    if os.path.lexists(outfile) and not overwrite:
+        raise IOError('{:s} exists'.format(outfile))
+    nobj = 0
+    with _open_catalog(outfile, 'wt') as fh:
+        for obj in objs:
+            odict = obj if isinstance(obj, dict) else obj.to_dict()
+            fh.write(json.dumps(odict, separators=(',', ':')))
+            fh.write('\n')
+            nobj += 1
+    return nobj
+
+
+def read_catalog(filename, **kwargs):
+    """ Read all of the objects in a JSON-Lines catalog
+
+    Parameters
+    ----------
+    filename : str
+    **kwargs : passed to CatalogReader, e.g. skip_abslines=True
+
+    Returns
+    -------
+    objs : list
+      AbsSystem and/or AbsComponent objects
+    """
+    return list(CatalogReader(filename, **kwargs))
+
+
+def _open_catalog(filename, mode):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, mode)
+    return io.open(filename, mode)
+
+
+class CatalogReader(object):
+    """ Lazy reader of a JSON-Lines catalog written by write_catalog()
+
+    Records are parsed, and their objects instantiated, only when
+    accessed.  Iteration streams through the file;  indexing uses
+    the byte offsets of the records, found in a single pass on first use
+    (seeks are slow in gzip compressed files).  A single LineList
+    is shared by all of the AbsLine objects.
+
+    Parameters
+    ----------
+    filename : str
+    skip_components : bool, optional
+      Do not load the components of the AbsSystem objects
+    skip_abslines : bool, optional
+      Do not load the AbsLine objects of the components
+    linelist : LineList, optional
+      Used to build the AbsLine objects;  default is LineList('ISM')
+    **kwargs : passed to the from_dict() methods
+    """
+
+    def __init__(self, filename, skip_components=False, skip_abslines=False, **kwargs):
+        self.filename = filename
+        self.kwargs = kwargs
+        self.kwargs['skip_components'] = skip_components
+        self.kwargs['skip_abslines'] = skip_abslines
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        """ Byte offsets of the records
+        """
+        if self._offsets is None:
+            offsets = []
+            pos = 0
+            with _open_catalog(self.filename, 'rb') as fh:
+                for line in fh:
+                    if line.strip():
+                        offsets.append(pos)
+                    pos += len(line)
+            self._offsets = np.array(offsets, dtype=np.int64)
+        return self._offsets
+
+    def iter_dicts(self):
+        """ Stream the records of the catalog as dicts
+        """
+        with _open_catalog(self.filename, 'rb') as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line.decode('utf-8'))
+
+    def record(self, idx):
+        """ Parse a single record
+
+        Parameters
+        ----------
+        idx : int
+
+        Returns
+        -------
+        idict : dict
+        """
+        with _open_catalog(self.filename, 'rb') as fh:
+            fh.seek(int(self.offsets[idx]))
+            return json.loads(fh.readline().decode('utf-8'))
+
+    def summary(self, keys=None):
+        """ Table of the scalar top-level entries of the records,
+        e.g. Name, RA, DEC, zabs.  No objects are instantiated.
+
+        Parameters
+        ----------
+        keys : list, optional
+          Entries to include;  default is all scalar entries of the first record
+
+        Returns
+        -------
+        tbl : Table
+        """
+        rows = []
+        for idict in self.iter_dicts():
+            if keys is None:
+                keys = [key for key, value in idict.items()
+                        if isinstance(value, (basestring, int, float, bool))]
+            rows.append([idict.get(key) for key in keys])
+        if keys is None:
+            return Table()
+        return Table(rows=rows, names=keys) if len(rows) > 0 else Table(names=keys)
+
+    def load(self, idict):
+        """ Instantiate the object of a record
+
+        Parameters
+        ----------
+        idict : dict
+
+        Returns
+        -------
+        AbsSystem or AbsComponent
+        """
+        if (self.kwargs.get('linelist') is None) and (not self.kwargs['skip_abslines']):
+            self.kwargs['linelist'] = LineList('ISM')
+        return obj_from_dict(idict, **self.kwargs)
+
+    def __len__(self):
+        return self.offsets.size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[ii] for ii in range(*idx.indices(len(self)))]
+        return self.load(self.record(idx))
+
+    def __iter__(self):
+        for idict in self.iter_dicts():
+            yield self.load(idict)
+
+    def __repr__(self):
+        return '<{:s}: file={:s}>'.format(self.__class__.__name__, self.filename)
+
+
 def read_joebvp_to_components(filename, coord, llist=None, specfile=None, chk_vel=False):
     """ Generate a list of AbsComponent objects from a JoeB VP output file
 
@@ -68,7 +287,8 @@ def read_joebvp_to_components(filename, coord, llist=None, specfile=None, chk_ve
       Used to construct AbsLine objects
     specfile : str, optional
     chk_vel : bool, optional
-      Demand that the velocities of a given ion all be the same
+      Demand that the velocities of a given ion all be the same;
+      raises ValueError otherwise
 
     Returns
     -------
@@ -79,62 +299,89 @@ def read_joebvp_to_components(filename, coord, llist=None, specfile=None, chk_ve
     if llist is None:
         llist = LineList('ISM')
     comps = []
-    # Read
-    vp_data = Table.read(filename, format='ascii')
-
-    # Subset by zsys + trans
-    lbls = []
-    for izsys, itrans in zip(vp_data['zsys'], vp_data['trans']):
-        lbls.append('{:.6f}_{:s}'.format(izsys, itrans))
-    lbls = np.array(lbls)
-    ulbls = np.unique(lbls)
-
-    # Subset by nflag; Build components
-    for lbl in ulbls:
-        mt_lines = np.where(lbls == lbl)[0]
-        if chk_vel:
-            if len(np.unique(vp_data['vel'][mt_lines])) != 1:
-                pdb.set_trace()
-        z_fit = ltu.z_from_dv(vp_data['vel'][mt_lines[0]]*u.km/u.s, vp_data['zsys'][mt_lines[0]])
-        # Loop on abs lines
-        alines = []
-        for idx in mt_lines:
-            zlim = [vp_data['zsys'][idx] +
-                    vp_data[vkey][idx] * (1 + vp_data['zsys'][idx]) / ckms
-                    for vkey in ['vlim1', 'vlim2']]
-            absline = AbsLine(vp_data['restwave'][idx] * u.AA, z=z_fit,
-                              zlim=zlim, linelist=llist)
-            # Add measurements [JB -- Want to capture anything else??]
-            absline.attrib['coord'] = coord
-            absline.attrib['flag_N'] = 1
-            absline.attrib['logN'] = vp_data['col'][idx]
-            absline.attrib['sig_logN'] = vp_data['sigcol'][idx]
-            absline.attrib['b'] = vp_data['bval'][idx] * u.km/u.s
-            absline.attrib['sig_b'] = vp_data['sigbval'][idx] * u.km/u.s
-            absline.attrib['z'] = z_fit
-            absline.attrib['sig_z'] = ltu.dz_from_dv(vp_data['sigvel'][idx]*u.km/u.s, vp_data['z_comp'][idx])
-            if specfile is None:
-                absline.attrib['specfile'] = vp_data['specfile'][idx]
-            else:
-                absline.attrib['specfile'] = specfile
-            # Fill N, sig_N
-            _, _, = linear_clm(absline.attrib)
-            alines.append(absline)
-
-        # AbsComponent
-        stars = '*' * alines[0].ion_name.count('*')
+    coord = ltu.intern_coord(coord)
+    # Read;  pipe-delimited (as written by joebvp) is parsed directly
+    vp_data = Table.read(filename, format='ascii.basic', delimiter='|')
+    if not set(['zsys', 'trans', 'restwave', 'vel', 'vlim1', 'vlim2']).issubset(vp_data.keys()):
+        vp_data = Table.read(filename, format='ascii')
+    if len(vp_data) == 0:
+        return comps
+
+    # Group by zsys + trans;  sorted once
+    zsys = vp_data['zsys'].data.astype(float)
+    trans = np.array(vp_data['trans']).astype(str)
+    zkey = np.round(zsys, 6)
+    isrt = np.lexsort((trans, zkey))
+    new = np.r_[True, (zkey[isrt][1:] != zkey[isrt][:-1]) | (trans[isrt][1:] != trans[isrt][:-1])]
+    starts = np.flatnonzero(new)
+    group = np.empty(len(vp_data), dtype=int)
+    group[isrt] = np.cumsum(new) - 1
+    first = isrt[starts]  # First row of each group
+    if chk_vel:
+        vel = vp_data['vel'].data
+        if np.any(vel != vel[first][group]):
+            raise ValueError("Velocities of a given ion differ")
+
+    # Lines, all at once
+    z_fit = ltu.z_from_dv(vp_data['vel'].data[first]*u.km/u.s, zsys[first])[group]
+    zlim = zsys[:, np.newaxis] + np.column_stack([vp_data['vlim1'].data, vp_data['vlim2'].data]) * (
+        1 + zsys[:, np.newaxis]) / ckms
+    alines = many_abslines(vp_data['restwave'].data * u.AA, llist, z=z_fit, zlim=zlim)
+    logN = vp_data['col'].data.astype(float)
+    sig_logN = vp_data['sigcol'].data.astype(float)
+    # Scalar Quantities are much faster to generate from an iterator
+    N = 10.**logN / u.cm**2
+    sig_N = list(sig_logN * np.log(10.) * N)
+    N = list(N)
+    bval = list(vp_data['bval'].data * u.km/u.s)
+    sig_b = list(vp_data['sigbval'].data * u.km/u.s)
+    sig_z = ltu.dz_from_dv(vp_data['sigvel'].data*u.km/u.s, vp_data['z_comp'].data.astype(float))
+    if specfile is None:
+        specfiles = np.array(vp_data['specfile']).astype(str).tolist()
+    else:
+        specfiles = [specfile]*len(vp_data)
+    for ii, absline in enumerate(alines):
+        # Add measurements [JB -- Want to capture anything else??]
+        absline.attrib.update(coord=coord, flag_N=1, logN=logN[ii], sig_logN=sig_logN[ii],
+                              b=bval[ii], sig_b=sig_b[ii], z=z_fit[ii], sig_z=sig_z[ii],
+                              specfile=specfiles[ii], N=N[ii], sig_N=sig_N[ii])
+
+    # Component rules (see AbsComponent.add_absline)
+    atomic = {}  # The lines share the LineList records
+    for aline in alines:
+        if id(aline.data) not in atomic:
+            atomic[id(aline.data)] = (aline.data['Z'], aline.data['ion'], aline.data['Ej'].to('1/cm').value)
+    Zion, Ej = np.hsplit(np.array([atomic[id(aline.data)] for aline in alines]), [2])
+    Ej = Ej[:, 0]
+    dz_toler = (1 + z_fit) / ckms
+    ok = np.all(Zion == Zion[first][group], axis=1) & (Ej == Ej[first][group]) & (
+        zlim[:, 0] >= zlim[first, 0][group] - dz_toler) & (zlim[:, 1] <= zlim[first, 1][group] + dz_toler)
+    for ii in np.where(~ok)[0]:
+        warnings.warn("Failed add_absline test")
+        print('Input Absline with wrest={:g} at z={:.3f} does not match component rules. Not appending'.format(
+            alines[ii].wrest, alines[ii].z))
+
+    # AbsComponents
+    vlim = list(ltu.dv_from_z(zlim[first], np.outer(z_fit[first], np.ones(2))))
+    for jj, (ss, ee) in enumerate(zip(starts, np.r_[starts[1:], len(isrt)])):
+        idx = isrt[ss:ee]
+        init_line = alines[idx[0]]
+        stars = '*' * init_line.ion_name.count('*')
         if 'comment' in vp_data.keys():
-            comment = vp_data['comment'][mt_lines[0]]
+            comment = vp_data['comment'][idx[0]]
         else:
             comment = ''
         if 'rely' in vp_data.keys():
-            reliability = vp_data['rely'][mt_lines[0]]
+            reliability = vp_data['rely'][idx[0]]
         else:
             reliability = 'none'
-        abscomp = AbsComponent.from_abslines(alines, stars=stars, comment=comment, reliability=reliability)
+        abscomp = AbsComponent(coord, (init_line.data['Z'], init_line.data['ion']), init_line.z,
+                               vlim[jj], Ej=init_line.data['Ej'], stars=stars,
+                               reliability=reliability, comment=comment)
+        abscomp._abslines = [alines[ii] for ii in idx if ok[ii]]
 
         # Add measurements [JB -- Want to capture anything else??]
-        abscomp.attrib = alines[0].attrib.copy()
+        abscomp.attrib = init_line.attrib.copy()
         # Remove undesired keys
         for key in ['EW', 'sig_EW', 'flag_EW', 'N', 'sig_N']:
             abscomp.attrib.pop(key)
@@ -0,0 +1,82 @@
+# Module to run tests on ComponentTable
+
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+# TEST_UNICODE_LITERALS
+
+import numpy as np
+import warnings
+
+from astropy import units as u
+
+from linetools.isgm.comptable import ComponentTable
+from linetools.isgm import utils as ltiu
+
+from linetools.isgm.tests.utils import mk_comp, mk_comptable
+
+
+def test_from_to_complist():
+    warnings.filterwarnings('ignore')
+    SiII_comp, _ = mk_comp('SiII', vlim=[-250, 80.]*u.km/u.s)
+    HI_comp, _ = mk_comp('HI', zcomp=0.5)
+    SiIIs_comp, _ = mk_comp('SiII*', zcomp=1.)
+    complist = [SiII_comp, HI_comp, SiIIs_comp]
+    ctbl = ComponentTable.from_complist(complist)
+    assert len(ctbl) == 3
+    assert len(ctbl.lines) == 8
+    np.testing.assert_array_equal(ctbl.nlines, [4, 2, 2])
+    assert ctbl.ion_name[2] == 'SiII*'
+    # Views
+    for comp, view in zip(complist, ctbl.to_complist()):
+        assert view.name == comp.name
+        assert view.Zion == comp.Zion
+        assert view.limits.zlim == tuple(comp.limits.zlim)
+        assert np.isclose(view.logN, comp.logN)
+        assert len(view._abslines) == len(comp._abslines)
+        for aline, vline in zip(comp._abslines, view._abslines):
+            assert vline.name == aline.name
+            assert np.isclose(vline.attrib['logN'], aline.attrib['logN'])
+            assert np.allclose(vline.limits.vlim.value, aline.limits.vlim.value)
+        assert view.stars == comp.stars
+
+
+def test_select_and_take():
+    warnings.filterwarnings('ignore')
+    complist = [mk_comp('SiII')[0], mk_comp('HI', zcomp=0.5)[0],
+                mk_comp('SiII*', zcomp=1.)[0], mk_comp('HI', zcomp=0.5001)[0]]
+    ctbl = ComponentTable.from_complist(complist)
+    # Ion
+    sub = ctbl[ctbl.select(Zion=(14, 2))]
+    assert len(sub) == 2
+    np.testing.assert_array_equal(sub.lines['comp_idx'], [0, 0, 0, 0, 1, 1])
+    assert ctbl.select(Zion=[(14, 2), (1, 1)]).sum() == 4
+    assert ctbl.select(Zion=(14, 2), Ej=0./u.cm).sum() == 1
+    # Velocity
+    mask = ctbl.select(z=0.5, vlim=[-10., 100.]*u.km/u.s)
+    np.testing.assert_array_equal(np.where(mask)[0], [1, 3])
+    # Re-order
+    sub = ctbl[[3, 0]]
+    assert sub[0].name == complist[3].name
+    np.testing.assert_array_equal(sub.nlines, [2, 4])
+    # Lines
+    lmask = ctbl.select_lines(wvlim=[1800., 1830.]*u.AA)
+    assert list(ctbl.lines['name'][lmask]) == ['HI 1215', 'HI 1215']
+
+
+def test_table_roundtrip():
+    warnings.filterwarnings('ignore')
+    complist = [mk_comp('SiII')[0], mk_comp('HI', zcomp=0.5)[0]]
+    tab = ltiu.table_from_complist(complist)
+    ctbl = ComponentTable.from_table(tab)
+    tab2 = ctbl.to_table()
+    for key in ['RA', 'z_comp', 'vmin', 'vmax', 'logN', 'flag_N', 'b']:
+        assert np.allclose(tab[key], tab2[key])
+    assert list(tab2['ion_name']) == list(tab['ion_name'])
+    assert list(tab2['comp_name']) == list(tab['comp_name'])
+    # Minimal table
+    ctbl = ComponentTable.from_table(mk_comptable())
+    assert ctbl[4].name == 'OVI_z0.60000'
+    assert np.allclose(ctbl[0].vlim.value, [-50., 100.])
+    # And back to the object API
+    comps = ltiu.complist_from_table(ctbl.to_table())
+    assert len(comps) == 5
@@ -114,3 +114,22 @@ def test_build_systems_from_comp():
     abs_systems = ltiu.build_systems_from_components([abscomp,SiII_comp,abscomp2])
     assert len(abs_systems) == 2
 
+
+
+def test_build_systems_indexed():
+    # Indexed grouping matches the pairwise loop
+    warnings.filterwarnings("ignore")
+    radec = SkyCoord(ra=123.1143*u.deg, dec=-12.4321*u.deg)
+    radec2 = SkyCoord(ra=223.1143*u.deg, dec=-12.4321*u.deg)
+    comps = [lyman_comp(radec), si2_comp(radec), lyman_comp(radec2),
+             oi_comp(radec, vlim=[-50., 50.]*u.km/u.s, z=2.9305),
+             oi_comp(radec, vlim=[-50., 50.]*u.km/u.s, z=1.5),
+             lyman_comp(radec2, z=1.5)]
+    for kwargs in [dict(), dict(vsys=400*u.km/u.s)]:
+        systems = ltiu.build_systems_from_components(comps, **kwargs)
+        systems2 = ltiu.build_systems_from_components(comps, indexed=False, **kwargs)
+        assert len(systems) == len(systems2)
+        for sys1, sys2 in zip(systems, systems2):
+            assert [comp.name for comp in sys1._components] == [comp.name for comp in sys2._components]
+            assert np.allclose(sys1.limits.zlim, sys2.limits.zlim)
+    assert len(ltiu.build_systems_from_components(comps)) == 4
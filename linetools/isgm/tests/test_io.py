@@ -10,6 +10,7 @@ import importlib_resources
 
 from astropy.coordinates import SkyCoord
 from astropy import units as u
+from astropy.table import Table
 
 import linetools.isgm.io as ltiio
 from linetools.isgm.tests.utils import mk_comp
@@ -33,6 +34,19 @@ def test_read_joebvp():
     assert comps[1]._abslines[0].attrib['N'].value > 0.
 
 
+def test_read_joebvp_formats(tmp_path):
+    # VP files that are not pipe-delimited
+    vp_file = data_path('group_9.VP')
+    icoord = SkyCoord(ra=12., dec=-12, unit='deg')
+    names = [comp.name for comp in ltiio.read_joebvp_to_components(vp_file, icoord)]
+    vp_data = Table.read(vp_file, format='ascii')
+    for fmt in ['ascii.basic', 'ascii.csv']:
+        ofile = str(tmp_path / 'group_9.{:s}'.format(fmt))
+        vp_data.write(ofile, format=fmt)
+        comps = ltiio.read_joebvp_to_components(ofile, icoord)
+        assert [comp.name for comp in comps] == names
+
+
 def test_complist_to_joebvp():
     # will write a file in directory ./files/
     abscomp, HIlines = mk_comp('HI', b=15*u.km/u.s, use_rand=False)
@@ -46,3 +60,34 @@ def test_complist_to_joebvp():
     ltiio.write_joebvp_from_components(comp_list, 'test.fits', data_path('test_joebvp_repr.joebvp'))
     ltu.compare_two_files(data_path('test_joebvp_repr.joebvp'),
                       str(importlib_resources.files('linetools.data.tests')/'test_joebvp_repr_reference.joebvp'))
+
+
+def test_catalog():
+    import warnings
+    import numpy as np
+    from linetools.isgm.abssystem import GenericAbsSystem
+    warnings.filterwarnings('ignore')
+    SiII_comp, _ = mk_comp('SiII', vlim=[-250, 80.]*u.km/u.s)
+    gensys = GenericAbsSystem.from_components([SiII_comp])
+    for outfil in [data_path('tmp_catalog.jsonl'), data_path('tmp_catalog.jsonl.gz')]:
+        nobj = ltiio.write_catalog([gensys, gensys, SiII_comp], outfil)
+        assert nobj == 3
+        # Lazy reader
+        rdr = ltiio.CatalogReader(outfil)
+        assert len(rdr) == 3
+        comp = rdr[2]
+        assert comp.name == SiII_comp.name
+        assert len(comp._abslines) == len(SiII_comp._abslines)
+        abssys = rdr[1]
+        assert isinstance(abssys, GenericAbsSystem)
+        assert np.isclose(abssys.zabs, gensys.zabs)
+        assert len(abssys._components[0]._abslines) == 4
+        # Summary
+        tbl = rdr.summary(keys=['Name', 'zabs'])
+        assert tbl['Name'][0] == gensys.name
+        # Partial loads
+        objs = ltiio.read_catalog(outfil, skip_abslines=True)
+        assert len(objs[0]._components) == 1
+        assert len(objs[0]._components[0]._abslines) == 0
+        objs = ltiio.read_catalog(outfil, skip_components=True)
+        assert len(objs[0]._components) == 0
@@ -17,6 +17,7 @@ import pdb
 from linetools.isgm.abscomponent import AbsComponent
 from linetools.spectralline import AbsLine
 from linetools.isgm import utils as ltiu
+from linetools import utils as ltu
 
 from linetools.isgm.tests.utils import mk_comp, mk_comptable, ism
 
@@ -79,6 +80,36 @@ def test_get_components_at_z():
         ltiu.get_components_at_z(complist, 0.1, [-1000,1000]*u.km)  # wrong vlims units
 
 
+def test_component_index():
+    from linetools.isgm.compindex import ComponentIndex
+    from linetools.isgm.comptable import ComponentTable
+    tab = mk_comptable()
+    complist = ltiu.complist_from_table(tab)
+    idx = ComponentIndex(complist)
+    comps = idx.components_at_z(0.1, [-1000,1000]*u.km/u.s)
+    assert [comp.name for comp in comps] == [comp.name for comp in
+                                             ltiu.get_components_at_z(complist, 0.1, [-1000,1000]*u.km/u.s)]
+    np.testing.assert_array_equal(idx.query(0.1, [-1000,1000]*u.km/u.s, Zion=(1,1)), [1])
+    # Batch
+    zq = np.array([0.05, 0.1, 0.6, 1.5])
+    iz, icomp = idx.query_batch(zq, [-500,500]*u.km/u.s)
+    np.testing.assert_array_equal(iz, [0, 1, 1, 1, 2])
+    np.testing.assert_array_equal(icomp, [0, 1, 2, 3, 4])
+    # Random catalog against the direct calculation
+    rng = np.random.RandomState(1234)
+    zcomp = rng.uniform(0., 1., 500)
+    ctbl = ComponentTable.from_table(Table(dict(RA=np.zeros(500), DEC=np.zeros(500), Z=[6]*500,
+                                                ion=[4]*500, z_comp=zcomp, vmin=[-10.]*500,
+                                                vmax=[10.]*500)))
+    idx = ComponentIndex(ctbl)
+    zq = rng.uniform(0., 1., 50)
+    iz, icomp = idx.query_batch(zq, [-3000,1000]*u.km/u.s)
+    for ii, z in enumerate(zq):
+        dv = ltu.dv_from_z(zcomp, z).value
+        np.testing.assert_array_equal(np.sort(icomp[iz == ii]),
+                                      np.where((dv >= -3000) & (dv <= 1000))[0])
+
+
 # This test is now failing because of some astropy
 # modeling advance.
 #  JXP is not fixing it.. 
@@ -260,6 +291,15 @@ def test_unique_comps():
     # Run
     uniq = ltiu.unique_components([HIcomp, SiIIcomp], [SiIIcomp])
     assert np.all(uniq == np.array([True,False]))
+    # No overlap in redshift
+    SiIIcomp2,_ = mk_comp('SiII', vlim=[-300.,50.]*u.km/u.s, zcomp=2.94)
+    uniq = ltiu.unique_components([HIcomp, SiIIcomp, SiIIcomp2], [SiIIcomp, HIcomp])
+    assert np.all(uniq == np.array([False,False,True]))
+    # ComponentTable
+    from linetools.isgm.comptable import ComponentTable
+    ctbl = ComponentTable.from_complist([HIcomp, SiIIcomp, SiIIcomp2])
+    uniq = ltiu.unique_components(ctbl, [SiIIcomp])
+    assert np.all(uniq == np.array([True,False,True]))
 
 def test_add_absline():
     abscomp,_ = mk_comp('HI', zcomp=0.)
@@ -120,6 +120,26 @@ def test_get_component():
     # Junk
     with pytest.raises(IOError):
         junk = gensys.get_component(None)
+    # Cached lookups follow new components and in-place changes
+    assert gensys.get_absline('CIV 1548') is None
+    radec = SkyCoord(ra=123.1143*u.deg, dec=-12.4321*u.deg)
+    civ = AbsLine('CIV 1548', z=2.92939)
+    civ.attrib['coord'] = radec
+    civ.limits.set([-250.,80.]*u.km/u.s)
+    gensys.add_component(AbsComponent.from_abslines([civ]))
+    assert gensys.get_absline('CIV 1548') is civ
+    assert gensys.get_component((6,4)) is not None
+    gensys._components = gensys._components[1:]
+    assert gensys.get_component((1,1)) is None
+    civ.name = 'CIV 1548b'
+    assert gensys.get_absline('CIV 1548b') is civ
+    # Line added to a component of the system
+    civ2 = AbsLine('CIV 1550', z=2.92939)
+    civ2.attrib['coord'] = radec
+    civ2.limits.set([-250.,80.]*u.km/u.s)
+    gensys.get_component((6,4)).add_absline(civ2)
+    assert gensys.get_absline('CIV 1550') is civ2
+    assert gensys.get_absline(1550.781*u.AA) is civ2
 
 
 def test_todict():
@@ -16,7 +16,7 @@ import warnings
 from astropy import constants as const
 from astropy import units as u
 from astropy.table import Table
-from astropy.coordinates import SkyCoord, match_coordinates_sky
+from astropy.coordinates import SkyCoord
 
 from linetools.analysis import absline as ltaa
 from linetools.isgm.abscomponent import AbsComponent
@@ -58,7 +58,7 @@ def chk_components(components, chk_match=False, chk_A_none=False, tol=0.2*u.arcs
         comp0 = components[0]
         for comp in components[1:]:
             # RA/DEC
-            match = match & bool(comp0.coord.separation(comp.coord) < tol)
+            match = match & ltu.same_sky(comp0.coord, comp.coord, tol)
             # Zion
             match = match & (comp0.Zion == comp.Zion)
             # Ej
@@ -179,7 +179,62 @@ def build_components_from_dict(idict, coord=None, **kwargs):
     return srt_comps
 
 
-def build_systems_from_components(comps, systype=None, vsys=None, **kwargs):
+def unit_vectors(coords):
+    """ Cartesian unit vectors (ICRS) for a SkyCoord array
+
+    Parameters
+    ----------
+    coords : SkyCoord
+
+    Returns
+    -------
+    xyz : ndarray (N,3)
+    """
+    return np.atleast_2d(ltu.coord_unit_vector(coords))
+
+
+def chord_from_angle(tol):
+    """ Chord length between unit vectors separated by tol
+
+    Parameters
+    ----------
+    tol : Angle or Quantity
+
+    Returns
+    -------
+    chord : float
+    """
+    return 2*np.sin(tol.to('radian').value/2.)
+
+
+def sky_buckets(xyz, tol):
+    """ Group sources into buckets connected (by transitivity) within tol
+    using a KD-tree on their unit vectors
+
+    Parameters
+    ----------
+    xyz : ndarray (N,3)
+      Unit vectors, e.g. from unit_vectors()
+    tol : Angle or Quantity
+
+    Returns
+    -------
+    bucket : int ndarray
+      Bucket index for each source
+    """
+    from scipy.spatial import cKDTree
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    # Many components share a sightline;  only pair up the distinct positions
+    uxyz, inv = np.unique(xyz, axis=0, return_inverse=True)
+    npts = uxyz.shape[0]
+    pairs = cKDTree(uxyz).query_pairs(chord_from_angle(tol), output_type='ndarray')
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(npts, npts))
+    _, bucket = connected_components(graph, directed=False)
+    return bucket[inv.ravel()]
+
+
+def build_systems_from_components(comps, systype=None, vsys=None, indexed=True, **kwargs):
     """ Build a list of AbsSystems from a list of AbsComponents
     Current default implementation allows for overlapping components, i.e.
       only_overlap=True in add_component
@@ -195,6 +250,11 @@ def build_systems_from_components(comps, systype=None, vsys=None, **kwargs):
       Passed as vtoler to add_component
       The first component will define the system redshift and all others will
       need to lie within vsys of it
+    indexed : bool, optional
+      Bucket the components on the sky and sweep their sorted redshift
+      limits instead of testing every pair of components.
+      The systems are identical to those of the pairwise loop,
+      which is still used when update_vlim=True
     **kwargs -- Passed to add_component()
 
     Returns
@@ -217,6 +277,8 @@ def build_systems_from_components(comps, systype=None, vsys=None, **kwargs):
     # Add
     abs_systems = []
     cpy_comps = [comp.copy() for comp in comps]
+    if indexed and (not kwargs.get('update_vlim', False)) and (len(cpy_comps) > 0):
+        return _indexed_systems(cpy_comps, systype, **kwargs)
     # Loop until all components assigned
     while len(cpy_comps) > 0:
         # Use the first one
@@ -239,6 +301,89 @@ def build_systems_from_components(comps, systype=None, vsys=None, **kwargs):
     return abs_systems
 
 
+def _indexed_systems(comps, systype, tol=0.2*u.arcsec, chk_sep=True, chk_z=True,
+                     overlap_only=False, vtoler=1., **kwargs):
+    """ Group components into systems with the rules of AbsSystem.add_component()
+
+    The first unassigned component seeds each system and the
+    (later) unassigned components matching it in position and
+    redshift are added, as in build_systems_from_components().
+    Candidates are restricted to the sky bucket of the seed and,
+    within it, to a window of the components sorted by zmin.
+
+    Parameters
+    ----------
+    comps : list
+      List of AbsComponents
+    systype : AbsSystem class
+    Other parameters as in AbsSystem.add_component()
+
+    Returns
+    -------
+    abs_systems : list
+    """
+    ncomp = len(comps)
+    zlim = np.array([comp.limits.zlim for comp in comps])
+    # Sky buckets
+    if chk_sep:
+        radec = np.array([(comp.coord.icrs.ra.deg, comp.coord.icrs.dec.deg) for comp in comps])
+        xyz = unit_vectors(SkyCoord(ra=radec[:, 0], dec=radec[:, 1], unit='deg'))
+        bucket = sky_buckets(xyz, tol)
+        chord = chord_from_angle(tol)
+    else:
+        bucket = np.zeros(ncomp, dtype=int)
+    # Components of each bucket, sorted by zmin
+    order = np.lexsort((zlim[:, 0], bucket))
+    bstart = np.searchsorted(bucket[order], np.arange(bucket.max()+2))
+    zmin_sorted = zlim[order, 0]
+    # Widest component per bucket bounds the window for overlaps
+    width = np.zeros(bucket.max()+1)
+    np.maximum.at(width, bucket, zlim[:, 1] - zlim[:, 0])
+
+    assigned = np.zeros(ncomp, dtype=bool)
+    abs_systems = []
+    for seed in range(ncomp):
+        if assigned[seed]:
+            continue
+        assigned[seed] = True
+        abssys = systype.from_components([comps[seed]])
+        ib = bucket[seed]
+        i0, i1 = bstart[ib], bstart[ib+1]
+        # Window of candidates in redshift
+        if chk_z:
+            zmin_sys, zmax_sys = zlim[seed]
+            dz_toler = (1 + abssys.zabs) * vtoler / const.c.to('km/s').value
+            lo = zmin_sys - dz_toler
+            hi = zmax_sys + dz_toler
+            if overlap_only:
+                lo -= width[ib]
+            j0 = i0 + np.searchsorted(zmin_sorted[i0:i1], lo, side='left')
+            j1 = i0 + np.searchsorted(zmin_sorted[i0:i1], hi, side='right')
+        else:
+            j0, j1 = i0, i1
+        cand = order[j0:j1]
+        cand = cand[(cand > seed) & ~assigned[cand]]
+        # Exact tests
+        if chk_z:
+            if overlap_only:
+                good = (zlim[cand, 0] <= hi) & (zlim[cand, 1] >= zmin_sys - dz_toler)
+            else:
+                good = (zlim[cand, 0] >= lo) & (zlim[cand, 1] <= hi)
+            cand = cand[good]
+        if chk_sep:
+            dist = np.sqrt(np.sum((xyz[cand] - xyz[seed])**2, axis=1))
+            cand = cand[dist < chord]
+        # Add in the original order, leaving any system-specific checks to add_component
+        for icomp in np.sort(cand):
+            if abssys.add_component(comps[icomp], chk_sep=False, chk_z=False, **kwargs):
+                assigned[icomp] = True
+        # Update vlim
+        abssys.update_vlim()
+        abs_systems.append(abssys)
+    # Return
+    return abs_systems
+
+
 def xhtbl_from_components(components, ztbl=None, NHI_obj=None):
     """ Generate a Table of XH values from a list of components
     Parameters
@@ -411,15 +556,13 @@ def table_from_complist(complist, summed_ion=False, NHI_obj=None, vrange=None,
     tab.rename_column('zcomp', 'z_comp')
 
     # Ion names
-    ion_names = []
-    for comp in complist:
-        if comp.Zion == (-1,-1):
-            ion_names += ["Molecule"]
-        else:
-            ion_names += [ion_to_name(comp.Zion)]
-        if comp.Ej.value > 0.:  # Slightly kludgy
-            ion_names[-1] += '*'
-    tab['ion_name'] = ion_names
+    Z, ion = np.asarray(tab['Z']), np.asarray(tab['ion'])
+    mol = (Z == -1) & (ion == -1)
+    ion_names = np.full(len(tab), 'Molecule', dtype=object)
+    if np.any(~mol):
+        ion_names[~mol] = ion_to_name((Z[~mol], ion[~mol]))
+    stars = np.where(np.array([comp.Ej.value for comp in complist]) > 0., '*', '')  # Slightly kludgy
+    tab['ion_name'] = [nm + st for nm, st in zip(ion_names, stars)]
 
     # attrib dict containing logN, b, etc
     for attrib in ['flag_N', 'logN', 'sig_logN', 'sig_z',
@@ -476,42 +619,45 @@ def table_from_complist(complist, summed_ion=False, NHI_obj=None, vrange=None,
         if vrange is not None:
             vrange = vrange.to(u.km / u.s).value
 
-        ###   - synthesize column densities
-        # Loop
-        count = 0
-        for i,ui in enumerate(uqions):
-            # Grab velocities from components
-            compvels = tab['vel']
-            # Synthesize components with like Zion, Ej, and in vrange
-            if vrange is not None:
-                try:
-                    thesecomps = np.where((tab['ion_name'] == ui) &
-                                 (compvels > vrange[0]) &
-                                 (compvels < vrange[1]))[0]
-                except:
-                    import pdb; pdb.set_trace()
-            else:
-                thesecomps = np.where(tab['ion_name'] == ui)[0]
-            comps = [complist[ii] for ii in thesecomps]  # Need a list
-            if len(comps) > 0:
-                synth_comp = synthesize_components(comps, zcomp=ztbl)
-
-                # Add a row to Table
-                tab.add_row(tab[thesecomps[0]])
-                tab['logN'][-1] = synth_comp.logN
-                tab['sig_logN'][-1] = synth_comp.sig_logN  # Allow for two values
-                tab['flag_N'][-1] = synth_comp.flag_N
-                tab['vmin'][-1] = synth_comp.vlim.value[0]
-                tab['vmax'][-1] = synth_comp.vlim.value[1]
-                count += 1
-
-                #tab['comp_name'][-1] = 'HI_z{:0.5f}'.format(tab['z_comp'][-1])
-            else:
+        ###   - synthesize column densities of like Zion, Ej, and in vrange
+        #       [same rules as synthesize_components, for all ions at once]
+        if vrange is not None:
+            compvels = tab['vel'].data
+            thesecomps = np.where((compvels > vrange[0]) & (compvels < vrange[1]))[0]
+        else:
+            thesecomps = np.arange(len(tab))
+        names = tab['ion_name'].data[thesecomps]
+        for ui in uqions:
+            if ui not in names:
                 print('No components found within velocity range found.')
-
-        ###   - Create new table and return
-
-        summed_tab = tab[-count:]
+        if thesecomps.size == 0:
+            summed_tab = tab[thesecomps]
+            summed_tab.remove_column('vel')
+            return summed_tab
+        _, inv, order, starts = ltaa._group_by_key(names)
+        for ss, ee in zip(starts, np.r_[starts[1:], len(order)]):
+            assert chk_components([complist[ii] for ii in thesecomps[order[ss:ee]]],
+                                  chk_A_none=True, chk_match=True)
+        _, flag_N, logN, sig_logN = ltaa.sum_logN_by_key(
+            names, tab['flag_N'].data[thesecomps], tab['logN'].data[thesecomps],
+            tab['sig_logN'].data[thesecomps])
+        # vlim by min/max
+        zcomps = tab['z_comp'].data[thesecomps]
+        if ztbl is None:
+            zref = np.bincount(inv, weights=zcomps) / np.bincount(inv)
+        else:
+            zref = np.full(len(starts), ztbl)
+        vlims = np.column_stack([tab['vmin'].quantity[thesecomps].to('km/s').value,
+                                 tab['vmax'].quantity[thesecomps].to('km/s').value])
+        vmin, vmax = _synth_vlim(zcomps, vlims, zref[inv])
+
+        ###   - Create new table (one row per ion) and return
+        summed_tab = tab[thesecomps[order[starts]]]
+        summed_tab['logN'][:] = logN
+        summed_tab['sig_logN'][:] = sig_logN  # Allow for two values
+        summed_tab['flag_N'][:] = flag_N
+        summed_tab['vmin'][:] = np.minimum.reduceat(vmin[order], starts)
+        summed_tab['vmax'][:] = np.maximum.reduceat(vmax[order], starts)
         # We needed component velocities for vrange selection, but
         # they are meaningless for summed ion info
         summed_tab.remove_column('vel')
@@ -656,30 +802,45 @@ def synthesize_components(components, zcomp=None, vbuff=0*u.km/u.s):
 
 
     # Meld column densities
-    obj = dict(flag_N=components[0].flag_N, logN=components[0].logN,
-               sig_logN=components[0].sig_logN)
-    for comp in components[1:]:
-        if comp.flag_N != 0:
-            obj['flag_N'], obj['logN'], obj['sig_logN'] = ltaa.sum_logN(obj, comp)
+    _, flag_N, logN, sig_logN = ltaa.sum_logN_by_key(
+        np.zeros(len(components), dtype=int), [comp.flag_N for comp in components],
+        [comp.logN for comp in components], _stack_sig([comp.sig_logN for comp in components]))
 
     # zcomp
+    zcomps = np.array([comp.zcomp for comp in components])
     if zcomp is None:
-        zcomp = np.mean([comp.zcomp for comp in components])
+        zcomp = np.mean(zcomps)
 
     # Set vlim by min/max  [Using non-relativistic + buffer]
-    vmin = u.Quantity([(comp.zcomp-zcomp)/(1+zcomp)*const.c.to('km/s')+comp.vlim[0] for comp in components])
-    vmax = u.Quantity([(comp.zcomp-zcomp)/(1+zcomp)*const.c.to('km/s')+comp.vlim[1] for comp in components])
-    vlim = u.Quantity([np.min(vmin)-vbuff, np.max(vmax)+vbuff])
+    vlims = np.array([comp.vlim.to('km/s').value for comp in components])
+    vmin, vmax = _synth_vlim(zcomps, vlims, zcomp)
+    vlim = u.Quantity([np.min(vmin)*u.km/u.s-vbuff, np.max(vmax)*u.km/u.s+vbuff])
 
     # Init final component
     synth_comp = AbsComponent(components[0].coord, components[0].Zion, zcomp,
                               vlim, Ej=components[0].Ej, stars=components[0].stars,
-                              Ntup=(obj['flag_N'], obj['logN'], obj['sig_logN']))  # Should probably set attrib instead
+                              Ntup=(flag_N[0], logN[0], sig_logN[0]))  # Should probably set attrib instead
 
     # Return
     return synth_comp
 
 
+def _stack_sig(sigs):
+    """ Stack errors into an (n,) array, or (n,2) if any are 2-sided
+    """
+    sigs = [np.asarray(sig, dtype=float) for sig in sigs]
+    if all([sig.size == 1 for sig in sigs]):
+        return np.array([sig.item() for sig in sigs])
+    return np.array([np.broadcast_to(sig, (2,)) for sig in sigs])
+
+
+def _synth_vlim(zcomps, vlims, zcomp):
+    """ Velocity limits (km/s) of components relative to zcomp [non-relativistic]
+    """
+    dv = (zcomps - zcomp) / (1 + zcomp) * const.c.to('km/s').value
+    return dv + vlims[:, 0], dv + vlims[:, 1]
+
+
 def get_components_at_z(complist, z, dvlims):
     """In a given list of AbsComponents, it finds
     the ones that are within dvlims from a given redshift
@@ -699,6 +860,11 @@ def get_components_at_z(complist, z, dvlims):
     -------
     components_at_z : list
         List of AbsComponents in complist within dvlims from z
+
+    Notes
+    -----
+    For many queries on the same list, use
+    linetools.isgm.compindex.ComponentIndex instead
     """
     # check input
     if not isinstance(complist[0], AbsComponent):
@@ -711,12 +877,10 @@ def get_components_at_z(complist, z, dvlims):
         except u.UnitConversionError:
             raise IOError('dvlims must have velocity units.')
 
-    good_complist = []
-    for comp in complist:
-        dv_comp = ltu.dv_from_z(comp.zcomp, z)
-        if (dv_comp >= dvlims[0]) and (dv_comp <= dvlims[1]):
-            good_complist += [comp]
-    return good_complist
+    zcomp = np.array([comp.zcomp for comp in complist])
+    dv_comp = ltu.dv_from_z(zcomp, z).to('km/s').value
+    good = (dv_comp >= dvlims_kms[0].value) & (dv_comp <= dvlims_kms[1].value)
+    return [comp for comp, igood in zip(complist, good) if igood]
 
 
 def get_wvobs_chunks(comp):
@@ -779,7 +943,7 @@ def coincident_components(comp1, comp2, tol=0.2*u.arcsec):
         raise ValueError('comp1 must be AbsComponent object.')
 
     # Check whether they are in the same sky region
-    if comp1.coord.separation(comp2.coord) > tol:
+    if not ltu.same_sky(comp1.coord, comp2.coord, tol):
         return False
 
     # loop over abslines
@@ -1024,8 +1188,8 @@ def unique_components(comps1, comps2, tol=5*u.arcsec):
 
     Parameters
     ----------
-    comps1 : list of AbsComponent objects
-    comps2 : list of AbsComponent objects
+    comps1 : list of AbsComponent objects or ComponentTable
+    comps2 : list of AbsComponent objects or ComponentTable
 
     Returns
     -------
@@ -1033,36 +1197,66 @@ def unique_components(comps1, comps2, tol=5*u.arcsec):
       True = members of comps1 that are not currently in comps2
 
     """
-    c_mks = const.c.to('km/s').value
-    unique = np.array([True]*len(comps1))
-    # Coordinates
-    ras = [icomp.coord.ra.value for icomp in comps1]
-    decs = [icomp.coord.dec.value for icomp in comps1]
-    coords1 = SkyCoord(ra=ras, dec=decs, unit='deg')
-    ras = [icomp.coord.ra.value for icomp in comps2]
-    decs = [icomp.coord.dec.value for icomp in comps2]
-    coords2 = SkyCoord(ra=ras, dec=decs, unit='deg')
-    # Compare
-    idx, d2d, d3d = match_coordinates_sky(coords1, coords2, nthneighbor=1)
-    close_enough = d2d < tol
-    if np.sum(close_enough) == 0:
+    unique = np.ones(len(comps1), dtype=bool)
+    if (len(comps1) == 0) or (len(comps2) == 0):
         return unique
-    # Next step (Z, ion, Ej)
-    ZiE1 = np.array([(icomp.Zion[0], icomp.Zion[1], icomp.Ej.value) for icomp in comps1])
-    ZiE2 = np.array([(icomp.Zion[0], icomp.Zion[1], icomp.Ej.value) for icomp in comps2])
-    indices = np.where(close_enough)[0]
-    for idx in indices:  # comp1 indices
-        # Match on coords
-        coord_mt = np.where(coords1[idx].separation(coords2) < tol)[0]
-        # Match on ZiE
-        mtZiE = np.where((ZiE2[coord_mt] == ZiE1[idx]).all(axis=1))[0]
-        if len(mtZiE) > 0: # Lastly redshift
-            zlim_comp1 = comps1[idx].limits.zlim
-            for idx2 in coord_mt[mtZiE]:
-                zlim_comp2 = comps2[idx2].limits.zlim
-                # Redshift overlap?
-                if (zlim_comp1[0] < zlim_comp2[1]) & (zlim_comp1[1] > zlim_comp2[0]):
-                    unique[idx] = False
+    radec1, ZiE1, zlim1 = _component_arrays(comps1)
+    radec2, ZiE2, zlim2 = _component_arrays(comps2)
+    n1 = len(comps1)
+    xyz1 = unit_vectors(SkyCoord(ra=radec1[:, 0], dec=radec1[:, 1], unit='deg'))
+    xyz2 = unit_vectors(SkyCoord(ra=radec2[:, 0], dec=radec2[:, 1], unit='deg'))
+    # Integer keys for (Z, ion, Ej)
+    _, key = np.unique(np.concatenate([ZiE1, ZiE2]), axis=0, return_inverse=True)
+    # Groups of like (Z, ion, Ej) within the same patch of sky
+    bucket = sky_buckets(np.concatenate([xyz1, xyz2]), tol)
+    _, grp = np.unique(np.column_stack([bucket, key.ravel()]), axis=0, return_inverse=True)
+    grp = grp.ravel()
+    g1, g2 = grp[:n1], grp[n1:]
+    # comps2 overlapping comps1 in redshift have zmin within [zmin1 - width, zmax1)
+    width = np.zeros(grp.max()+1)
+    np.maximum.at(width, g2, zlim2[:, 1] - zlim2[:, 0])
+    lo = zlim1[:, 0] - width[g1]
+    hi = zlim1[:, 1]
+    # Exact integer ranks let us sort and search on (group, zmin) in one array
+    _, rank = np.unique(np.concatenate([zlim2[:, 0], lo, hi]), return_inverse=True)
+    rank = rank.ravel()
+    nrank = rank.max() + 1
+    r2, rlo, rhi = rank[:len(comps2)], rank[len(comps2):len(comps2)+n1], rank[len(comps2)+n1:]
+    srt_key = g2.astype(np.int64)*nrank + r2
+    order = np.argsort(srt_key, kind='stable')
+    start = np.searchsorted(srt_key[order], g1.astype(np.int64)*nrank + rlo, side='left')
+    stop = np.searchsorted(srt_key[order], g1.astype(np.int64)*nrank + rhi, side='left')
+    counts = np.maximum(stop - start, 0)
+    # Candidate pairs
+    i1 = np.repeat(np.arange(n1), counts)
+    i2 = order[np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))]
+    # Exact tests:  redshift overlap and separation
+    overlap = (zlim1[i1, 0] < zlim2[i2, 1]) & (zlim1[i1, 1] > zlim2[i2, 0])
+    close = np.sqrt(np.sum((xyz1[i1] - xyz2[i2])**2, axis=1)) < chord_from_angle(tol)
+    unique[i1[overlap & close]] = False
     # Return
     return unique
 
+
+def _component_arrays(comps):
+    """ Coordinates, (Z, ion, Ej) and zlim arrays for a list of AbsComponent
+    objects or a ComponentTable
+
+    Returns
+    -------
+    radec : ndarray (N,2)
+      RA, DEC in deg
+    ZiE : ndarray (N,3)
+      Z, ion, Ej (1/cm)
+    zlim : ndarray (N,2)
+    """
+    from linetools.isgm.comptable import ComponentTable
+    if isinstance(comps, ComponentTable):
+        radec = np.column_stack([comps.comps['RA'].data, comps.comps['DEC'].data])
+        ZiE = np.column_stack([comps.comps[key].data for key in ['Z', 'ion', 'Ej']])
+        return radec, ZiE, comps.zlim
+    radec = np.array([(icomp.coord.icrs.ra.deg, icomp.coord.icrs.dec.deg) for icomp in comps])
+    ZiE = np.array([(icomp.Zion[0], icomp.Zion[1], icomp.Ej.to('1/cm').value) for icomp in comps])
+    zlim = np.array([icomp.limits.zlim for icomp in comps], dtype=float)
+    return radec, ZiE, zlim
+
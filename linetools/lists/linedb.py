@@ -0,0 +1,222 @@
+""" On-disk, indexed database of transitions (SQLite) for very large line lists
+"""
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import os
+import sqlite3
+
+import numpy as np
+
+from astropy import units as u
+from astropy.units import Quantity
+from astropy.table import Table, Column, MaskedColumn
+
+from linetools.lists import parse as lilp
+
+
+def _schema():
+    """ Column names, SQL types and units of the line data (see parse.line_data)
+    """
+    ldict, _ = lilp.line_data()
+    schema = []
+    for key, value in ldict.items():
+        if isinstance(value, Quantity):
+            schema.append((key, 'REAL', value.unit))
+        elif isinstance(value, str):
+            schema.append((key, 'TEXT', None))
+        elif isinstance(value, float):
+            schema.append((key, 'REAL', None))
+        else:
+            schema.append((key, 'INTEGER', None))
+    return schema
+
+
+def _sql_values(col, unit=None):
+    """ Python values of a Column for sqlite (None where masked)
+    """
+    if unit is not None and col.unit is not None:
+        values = Quantity(col.data, col.unit).to(unit).value
+    else:
+        values = np.asarray(col.data)
+    mask = np.ma.getmaskarray(col)
+    if values.dtype.kind == 'f':
+        mask = mask | ~np.isfinite(values)
+    values = values.astype(object)
+    values[mask] = None
+    return values
+
+
+def write_linedb(tables, db_file, overwrite=False):
+    """ Write transitions to an indexed, on-disk LineDB (SQLite) file
+
+    Parameters
+    ----------
+    tables : Table or iterable of Table
+      Transitions with (at least) the name, wrest, Z and ion columns
+      of parse.line_data().  An iterable of chunks avoids holding a
+      very large list in memory.  Missing columns are NULL.
+    db_file : str
+    overwrite : bool, optional
+
+    Returns
+    -------
+    nline : int
+      Number of transitions written
+    """
+    if os.path.isfile(db_file):
+        if not overwrite:
+            raise IOError('LineDB file {:s} exists;  use overwrite=True'.format(db_file))
+        os.remove(db_file)
+    if isinstance(tables, Table):
+        tables = [tables]
+    schema = _schema()
+    con = sqlite3.connect(db_file)
+    try:
+        con.execute('PRAGMA journal_mode=OFF')
+        con.execute('PRAGMA synchronous=OFF')
+        clms = ', '.join('"{:s}" {:s}'.format(key, sqltype) for key, sqltype, _ in schema)
+        con.execute('CREATE TABLE lines (id INTEGER PRIMARY KEY, {:s}, log_wf REAL)'.format(clms))
+        con.execute('CREATE TABLE units (clm TEXT PRIMARY KEY, unit TEXT)')
+        con.executemany('INSERT INTO units VALUES (?, ?)',
+                        [(key, unit.to_string()) for key, _, unit in schema if unit is not None])
+        nline = 0
+        for table in tables:
+            for key in ('name', 'wrest', 'Z', 'ion'):
+                if key not in table.keys():
+                    raise IOError('LineDB tables need a {:s} column'.format(key))
+            nrow = len(table)
+            # Only the columns of the table;  the others are NULL
+            keys = [key for key, _, _ in schema if key in table.keys()]
+            values = [_sql_values(table[key], unit=unit) for key, _, unit in schema if key in table.keys()]
+            # log10(wrest*f) for the strength index
+            wrest = Quantity(table['wrest']).to('AA').value if table['wrest'].unit is not None \
+                else np.asarray(table['wrest'], dtype=float)
+            if 'f' in table.keys():
+                wf = wrest * np.ma.filled(np.ma.asarray(table['f'], dtype=float), 0.)
+            else:
+                wf = np.zeros(nrow)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_wf = np.where(wf > 0., np.log10(wf), np.nan).astype(object)
+            log_wf[~(wf > 0.)] = None
+            values.append(log_wf)
+            insert = 'INSERT INTO lines ({:s}, log_wf) VALUES ({:s})'.format(
+                ', '.join('"{:s}"'.format(key) for key in keys), ', '.join(['?']*(len(keys)+1)))
+            con.executemany(insert, zip(*[ivalues.tolist() for ivalues in values]))
+            nline += nrow
+        # Indices (faster once the rows are in)
+        con.execute('CREATE INDEX idx_wrest ON lines (wrest)')
+        con.execute('CREATE INDEX idx_Zion ON lines (Z, ion, wrest)')
+        con.execute('CREATE INDEX idx_strength ON lines (log_wf)')
+        con.execute('CREATE INDEX idx_name ON lines (name)')
+        # Statistics for the query planner
+        con.execute('ANALYZE')
+        con.commit()
+    finally:
+        con.close()
+    return nline
+
+
+class LineDB(object):
+    """ Indexed, on-disk database of transitions
+
+    Queries read only the rows they select, through the indices on
+    wrest, (Z, ion, wrest), log10(wrest*f) and name.  Write a database
+    with write_linedb();  LineList.from_db() builds a LineList from a
+    query.
+
+    Parameters
+    ----------
+    db_file : str
+      SQLite file written by write_linedb()
+    """
+
+    def __init__(self, db_file):
+        if not os.path.isfile(db_file):
+            raise IOError('LineDB file {:s} does not exist'.format(db_file))
+        self.db_file = db_file
+        self._con = sqlite3.connect(db_file)
+        self.columns = [key for key, _, _ in _schema()]
+        self.units = dict((key, u.Unit(unit)) for key, unit in
+                          self._con.execute('SELECT clm, unit FROM units'))
+        self._nline = None
+
+    def __len__(self):
+        if self._nline is None:
+            self._nline = self._con.execute('SELECT COUNT(*) FROM lines').fetchone()[0]
+        return self._nline
+
+    def query(self, wvlims=None, Zion=None, min_strength=None, names=None, limit=None):
+        """ Transitions matching all of the criteria, sorted by wrest
+
+        Parameters
+        ----------
+        wvlims : Quantity array, optional
+          Rest wavelength limits (inclusive)
+        Zion : tuple, optional
+          (Z, ion)
+        min_strength : float, optional
+          Minimum log10(wrest*f), with wrest in Angstroms
+        names : list of str, optional
+        limit : int, optional
+          Maximum number of rows
+
+        Returns
+        -------
+        data : Table
+          Columns of parse.line_data() (masked where NULL) and an Id
+          column with the row id in the database
+        """
+        where, params = [], []
+        if wvlims is not None:
+            wvmin, wvmax = Quantity(wvlims).to('AA').value
+            where.append('wrest BETWEEN ? AND ?')
+            params += [float(wvmin), float(wvmax)]
+        if Zion is not None:
+            where.append('Z = ? AND ion = ?')
+            params += [int(Zion[0]), int(Zion[1])]
+        if min_strength is not None:
+            where.append('log_wf >= ?')
+            params.append(float(min_strength))
+        if names is not None:
+            names = list(names)
+            where.append('name IN ({:s})'.format(', '.join(['?']*len(names))))
+            params += names
+        sql = 'SELECT id, {:s} FROM lines'.format(', '.join('"{:s}"'.format(key) for key in self.columns))
+        if len(where) > 0:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY +wrest'  # sort the selected rows, do not scan by wrest
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(int(limit))
+        rows = self._con.execute(sql, params).fetchall()
+        return self._to_table(rows)
+
+    def _to_table(self, rows):
+        """ Table from the rows of a query
+        """
+        ldict, _ = lilp.line_data()
+        values = list(zip(*rows)) if len(rows) > 0 else [()]*(len(self.columns)+1)
+        tbl = Table()
+        for key, ivalues in zip(self.columns, values[1:]):
+            default = ldict[key].value if isinstance(ldict[key], Quantity) else ldict[key]
+            obj = np.array(ivalues, dtype=object)
+            mask = np.equal(obj, None)
+            obj[mask] = default
+            data = obj.astype(type(default))
+            if np.any(mask):
+                tbl[key] = MaskedColumn(data, mask=mask, unit=self.units.get(key))
+            else:
+                tbl[key] = Column(data, unit=self.units.get(key))
+        tbl['Id'] = np.array(values[0], dtype=int)
+        return tbl
+
+    def close(self):
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return '<{:s}: {:s}, nline={:d}>'.format(self.__class__.__name__, self.db_file, len(self))
@@ -3,6 +3,7 @@
 
 basestring = str
 
+import os
 import numpy as np
 
 import importlib_resources
@@ -16,11 +17,37 @@ import fnmatch
 
 # from xastropy.xutils import xdebug as xdb
 
-CACHE = {'full_table': {}, 'data': {}}
+CACHE = {'full_table': {}, 'data': {}, 'extra': {}}
 
 from linetools.lists import parse as lilp
 from linetools.lists import utils as lilu
 
+
+class _LineRecord(dict):
+    """ Read-only dict of the data of a single line, shared by all the
+    lines (e.g. AbsLine) of a transition (see LineList.record)
+
+    copy() returns a regular (writable) dict
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('LineList records are read-only;  use dict(record) for a copy to modify')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self  # Read-only, so shared
+
+    def __reduce__(self):
+        return (_LineRecord, (dict(self),))
+
+
 # TODO
 # Do something about transitions that are both in Galaxy and ISM
 # (e.g. MgII). Currently, priority is given to the first one loaded
@@ -78,7 +105,7 @@ class LineList(object):
         self.verbose = verbose
 
         # Load Data
-        self.load_data()
+        self.load_data(use_cache=use_cache)
         '''
         if not use_ISM_table or llst_key not in ('ISM', 'HI', 'Strong'):
             self.load_data(use_cache=use_cache)
@@ -93,6 +120,8 @@ class LineList(object):
 
         # Memoize
         self.memoize = {}  # To speed up multiple calls
+        self._strength_idx = None  # See _strength_index()
+        self._db_file = None  # See from_db()
 
         # Sort
         self.sort_by = sort_by
@@ -101,10 +130,54 @@ class LineList(object):
         if self._data is not None:
             # redo extra columns?
             self._extra_table['Id_ex'] = self._data['Id']
-            self.make_extra_table(redo=redo_extra)
+            self.make_extra_table(redo=redo_extra, use_cache=use_cache)
             # sort the LineList
             self.sortdata(sort_by)
 
+    @classmethod
+    def from_db(cls, db, wvlims=None, Zion=None, min_strength=None, names=None,
+                sort_by='wrest', abundance_type='solar'):
+        """ LineList of the transitions of an on-disk LineDB that match a query
+        Only the selected rows are read from disk
+
+        Parameters
+        ----------
+        db : LineDB or str
+          Database or its file (see linetools.lists.linedb)
+        wvlims, Zion, min_strength, names :
+          See LineDB.query()
+        sort_by : str or list of str, optional
+        abundance_type : str, optional
+          See make_extra_table()
+
+        Returns
+        -------
+        LineList
+          Its Id column numbers the selected rows;  db_id is the id in the database
+        """
+        from linetools.lists.linedb import LineDB
+        if isinstance(db, basestring):
+            with LineDB(db) as idb:
+                return cls.from_db(idb, wvlims=wvlims, Zion=Zion, min_strength=min_strength,
+                                   names=names, sort_by=sort_by, abundance_type=abundance_type)
+        new = cls(os.path.basename(db.db_file), set_lines=False, sort_by=sort_by)
+        new._db_file = db.db_file
+        new._data = db.query(wvlims=wvlims, Zion=Zion, min_strength=min_strength, names=names)
+        # Row numbers, as for the other lists;  keep the id in the database
+        new._data.rename_column('Id', 'db_id')
+        new._data['Id'] = np.arange(len(new._data))
+        new._extra_table['Id_ex'] = new._data['Id']
+        new._set_extra_columns(abundance_type, 'none')
+        new.sortdata(sort_by)
+        return new
+
+    @property
+    def _atomic(self):
+        """ Whether the list holds atomic transitions with the full set
+        of extra columns (HI, ISM, EUV, Strong or a LineDB query)
+        """
+        return (self.list in ['HI', 'ISM', 'EUV', 'Strong']) or (self._db_file is not None)
+
     @property
     def name(self):
         """ Return the transition names
@@ -129,10 +202,23 @@ class LineList(object):
         """
         return self._data['ion']
 
-    def load_data(self):
+    def load_data(self, use_cache=True):
+        """ Load the full table of transitions, shared by reference
+        with all the other LineList objects through CACHE
+        """
+        global CACHE
+        key = 'linelist.ascii'
+        if use_cache and key in CACHE['full_table']:
+            self._fulltable = CACHE['full_table'][key]
+            return
         data_file = importlib_resources.files('linetools.data.lines')/'linelist.ascii'
-        # Read
-        self._fulltable = Table.read(data_file, format='ascii.ecsv')
+        npz_file = importlib_resources.files('linetools.data.lines')/'linelist.npz'
+        # Read;  the binary copy if it was written from the current ECSV
+        try:
+            self._fulltable = lilp.read_npz(npz_file, source=data_file)
+        except IOError:
+            self._fulltable = Table.read(data_file, format='ascii.ecsv')
+        CACHE['full_table'][key] = self._fulltable
 
     '''
     def load_data(self, use_ISM_table=True, tol=1e-3, use_cache=True):
@@ -284,32 +370,23 @@ class LineList(object):
         if len(set_flags) > 0:
             # Read standard file
             set_data = lilp.read_sets()
-            # Speed up
             wrest = self._fulltable['wrest']  # Assuming Angstroms
             for sflag in set_flags:
                 gdset = np.where(set_data[sflag] == 1)[0]
                 # Match to wavelengths
-                for igd in gdset:
-                    mt = np.where(np.abs(set_data['wrest'][igd] - wrest) < 9e-5)[0]
-                    if len(mt) == 1:
-                        self._fulltable['name'][mt[0]] = set_data['name'][igd]
-                        indices.append(mt[0])
-                    elif len(mt) > 1:
-                        #
-                        #wmsg = 'WARNING: Multiple lines with wrest={:g}'.format(
-                        #    set_data['wrest'][igd])
-                        #warnings.warn(wmsg)
-                        #warnings.warn(
-                        #    'Taking the first entry. Maybe use higher precision.')
-                        self._fulltable['name'][mt[0]] = set_data['name'][igd]
-                        indices.append(mt[0])
-                    else:
-                        if verbose:
-                            print('set_lines: Did not find {:s} in data Tables'.format(
-                                set_data[igd]['name']))
+                iset, imt = lilp.match_wrest(set_data['wrest'][gdset], wrest, 9e-5)
+                # Taking the first entry if there are multiple lines with wrest
+                first = np.ones(iset.size, dtype=bool)
+                first[1:] = iset[1:] != iset[:-1]
+                iset, imt = gdset[iset[first]], imt[first]
+                self._fulltable['name'][imt] = set_data['name'][iset]
+                indices.append(imt)
+                if verbose:
+                    for name in set_data['name'][np.setdiff1d(gdset, iset)]:
+                        print('set_lines: Did not find {:s} in data Tables'.format(name))
 
         # Collate (should grab unique ones!)
-        all_idx = np.unique(np.array(indices))
+        all_idx = np.unique(np.concatenate(indices))
 
         # Parse and sort (consider masking instead)
         tmp_tab = self._fulltable[all_idx]
@@ -322,7 +399,7 @@ class LineList(object):
 
 
     def make_extra_table(self, abundance_type='solar', ion_correction='none',
-                                       redo=False):
+                                       redo=False, use_cache=True):
         """Build an additional table that is parallel to self._data that
         includes convenient columns. These will be useful
         for sorting the underlying data table in convenient ways, e.g. by expected
@@ -356,6 +433,9 @@ class LineList(object):
                          be filled with zeros. (Default)
         redo : bool, optional
             Remake the extra columns
+        use_cache : bool, optional
+            Share the extra table of the (unsorted) default list
+            through CACHE
 
         Note
         ----
@@ -367,19 +447,33 @@ class LineList(object):
         if ('ion_name' in self._extra_table.keys()) and (redo is False):
             return
 
-        if self.list not in ['HI', 'ISM', 'EUV', 'Strong', 'H2']:
+        if not (self._atomic or self.list == 'H2'):
             warnings.warn('Not implemented: will not set relative strength for LineList: {}.'.format(self.list))
             return
 
+        # Shared with the other LineList objects?
+        key = self.list, abundance_type, ion_correction
+        use_cache = use_cache and (self._data is CACHE['data'].get(self.list))
+        if use_cache and key in CACHE['extra']:
+            self._extra_table = CACHE['extra'][key]
+        else:
+            # Never fill a table shared through CACHE
+            if any(self._extra_table is tbl for tbl in CACHE['extra'].values()):
+                self._extra_table = Table(self._extra_table, masked=True, copy=True)
+            self._set_extra_columns(abundance_type, ion_correction)
+            if use_cache:
+                CACHE['extra'][key] = self._extra_table
+        self._strength_idx = None
+
+    def _set_extra_columns(self, abundance_type, ion_correction):
+        """ Fill self._extra_table;  see make_extra_table()
+        """
         # Set ion_name column
-        ion_name = np.array([' '*20]*len(self.name)).astype(str)
-        if self.list in ['HI', 'ISM', 'EUV', 'Strong']:
-            for kk,name in enumerate(self.name):  # valid for atomic transitions
-                ion_name[kk] = name.split(' ')[0]
-        elif self.list in ['H2']:
-            for kk,name in enumerate(self.name):  # H2
-                ion_name[kk] = name.split('(')[0]
-        self._extra_table['ion_name'] = ion_name
+        if self.list in ['H2']:
+            ion_name = np.char.partition(self.name.astype(str), '(')[:, 0]
+        else:  # valid for atomic transitions
+            ion_name = np.char.partition(self.name.astype(str), ' ')[:, 0]
+        self._extra_table['ion_name'] = ion_name.astype('U20')
 
         if self.list in ['H2']:
             # we want Jk to be 1 or 0 first
@@ -408,14 +502,14 @@ class LineList(object):
         elif abundance_type == 'solar':
             from linetools.abund.solar import SolarAbund
             solar = SolarAbund()
-            abund = np.ma.masked_array(np.zeros(len(self._data)), mask=True)
-            for row in solar._data:
-                Zmt = self._data['Z'] == row['Z']
-                abund[Zmt] = row['Abund']
-                abund.mask[Zmt] = False
+            abund_Z = solar.abund_by_Z()
+            Z = np.asarray(self._data['Z'])
+            gdZ = (Z >= 0) & (Z < abund_Z.size)
+            abund = np.full(len(self._data), np.nan)
+            abund[gdZ] = abund_Z[Z[gdZ]]
+            abund = np.ma.masked_array(np.nan_to_num(abund), mask=np.isnan(abund))
             # Deuterium is special
-            fchar = np.array([ion_name[0] for ion_name in self._extra_table['ion_name'].data])
-            DI = fchar == 'D'
+            DI = np.char.startswith(self._extra_table['ion_name'].data.astype(str), 'D')
             abund[DI] = solar['D']
             # Finish
             self._extra_table['abundance'] = abund
@@ -442,7 +536,8 @@ class LineList(object):
             If True, the sorting is reversed
             Default is False.
 
-        Note: this is a wrapper to astropy.table.table.sort()
+        Note: the rows of self._data and self._extra_table are taken
+        in the order of astropy.table.Table.argsort() on the key columns
         """
         # define the sorting key(s) as list
         if isinstance(keys, (str, basestring)):
@@ -452,30 +547,27 @@ class LineList(object):
         if keys[0] == 'as_given':
             return
 
-        # hstack for convenience
-        if len(self._extra_table) == len(self._data):
-            flg_extra = True
-            dkeys = self._data.keys()
-            ekeys = self._extra_table.keys()
-            dtbl = hstack([self._data, self._extra_table], join_type='exact')
-        else:
-            flg_extra = False
-            dtbl = self._data
-
-        # sort
-        dtbl.sort(keys)
+        # Sort a permutation of the rows on the key columns only
+        flg_extra = len(self._extra_table) == len(self._data)
+        key_cols = []
+        for key in keys:
+            if key in self._data.keys():
+                key_cols.append(self._data[key])
+            elif flg_extra and key in self._extra_table.keys():
+                key_cols.append(self._extra_table[key])
+            else:
+                raise ValueError('sortdata: {:s} is not a column of the LineList'.format(key))
+        perm = Table(key_cols, names=keys, copy=False).argsort(keys)
 
         # reverse?
         if reverse:
-            dtbl.reverse()
+            perm = perm[::-1]
         self.sort_by = keys
 
         # Finish
+        self._data = self._data[perm]
         if flg_extra:
-            self._data = dtbl[dkeys]
-            self._extra_table = dtbl[ekeys]
-        else:
-            self._data = dtbl
+            self._extra_table = self._extra_table[perm]
 
     def subset_lines(self, subset, reset_data=False, verbose=False, sort_by=['wrest']):
         """ Select a user-specific subset of the lines from the LineList
@@ -509,41 +601,36 @@ class LineList(object):
         # Reset _data (useful for changing subsets)
         if reset_data:
             self.set_lines(verbose=False)
+            self._extra_table = Table(masked=True)
+            self._extra_table['Id_ex'] = self._data['Id']
+            self.make_extra_table()
+            self.memoize = {}
 
-        indices = []
+        as_given = sort_by == ['as_given'] or sort_by == 'as_given'
         if isinstance(subset, Quantity):  # wrest
-            wrest = self._data['wrest'].to('AA').value
-            # Generate dummy 2D arrays
-            subset2d = np.outer(subset.to('AA').value, np.ones_like(wrest))
-            wrest2d = np.outer(np.ones(len(subset)), wrest)
-            diff = np.abs(subset2d-wrest2d)
-            indices = np.where(diff < 1e-4)[1].tolist()
+            # Matches within 1e-4 AA, ordered by subset and then by row
+            _, indices = lilp.match_wrest(subset, Quantity(self._data['wrest']), 1e-4)
         elif isinstance(subset[0], (basestring)):  # Names
-            # Using sets
-            names = set(self._data['name'])
-            inter = set(subset).intersection(names)  # But these aren't ordered the same
-            # For the indices
-            ind_dict = dict((k,i) for i,k in enumerate(self._data['name']))
-            indices = [ind_dict[x] for x in inter]
+            # Last row of each name, as for a dict
+            names = np.array(self._data['name'])
+            srt = np.argsort(names, kind='stable')
+            sub = np.array(subset)
+            pos = np.searchsorted(names[srt], sub, side='right') - 1
+            found = (pos >= 0) & (names[srt][np.maximum(pos, 0)] == sub)
+            indices = srt[pos[found]]
+            if not as_given:
+                indices = np.unique(indices)
         else:
             raise ValueError('Not ready for this `subset` type yet.')
 
-        # Sort
-        tmp = self._data[indices]
-        # Return LineList object
+        # Return LineList object sharing the full table
         new = LineList(self.list, closest=self.closest,
                        set_lines=False, verbose=self.verbose)
-        new._data = tmp
-        if sort_by == ['as_given'] or sort_by == 'as_given':
-            if isinstance(subset, Quantity):  # wrest
-                pass
-            elif isinstance(subset[0], (basestring)):  # Names
-                isort = []
-                names = list(new._data['name'])
-                for name in subset:
-                    isort.append(names.index(name))
-                new._data = new._data[isort]
-        else:
+        new._db_file = self._db_file
+        new._data = self._data[indices]
+        if len(self._extra_table) == len(self._data):
+            new._extra_table = self._extra_table[indices]
+        if not as_given:
             new.sortdata(sort_by)
 
         return new
@@ -584,7 +671,7 @@ class LineList(object):
 
         """
 
-        if self.list not in ['HI', 'ISM', 'EUV', 'Strong', 'H2']:
+        if not (self._atomic or self.list == 'H2'):
             warnings.warn('Not implemented for LineList: {}.'.format(self.list))
             return
 
@@ -674,8 +761,7 @@ class LineList(object):
         found), or Table (if > 1 transitions are found)
 
         """
-        good_linelists = ['HI', 'ISM', 'EUV', 'Strong']
-        if self.list not in good_linelists:
+        if not self._atomic:
             warnings.warn('Not implemented for LineList: {}.'.format(self.list))
             return
 
@@ -719,7 +805,10 @@ class LineList(object):
             # remove transitions out of range
             data = data[cond]
             # sort by relative strength
-            idx = data['Id'].data
+            # Rows of the extra table (which may be sorted or a subset)
+            Id_ex = self._extra_table['Id_ex'].data
+            isrt = np.argsort(Id_ex, kind='stable')
+            idx = isrt[np.searchsorted(Id_ex, data['Id'].data, sorter=isrt)]
             sorted_inds = np.argsort(self._extra_table['rel_strength'][idx])
             # reverse sorted indices, so strongest get first
             sorted_inds = sorted_inds[::-1]
@@ -764,85 +853,151 @@ class LineList(object):
         This is an hstack of self._data and self._extra_table
         """
 
-        if self.list not in ['HI', 'ISM', 'EUV', 'Strong']:
-            warnings.warn('Not implemented for LineList: {}.'.format(self.list))
+        if not self._chk_available(n_max_tuple, min_strength):
             return
+        wvlims = Quantity(wvlims).to('AA').value
+        _, rows = self._available_rows(wvlims[0:1], wvlims[1:2], n_max_tuple=n_max_tuple,
+                                       min_strength=min_strength)
+        if rows.size == 0:
+            return None
+        output = self._strength_index()['table'][rows]
 
-        if not all((isinstance(n, int) or (n is None)) for n in [n_max_tuple]):
-            raise SyntaxError(
-                'n_max_tuple must be integer when given!')
-        if isinstance(min_strength, (float,int)):
-            pass
-        else:
-            raise SyntaxError('min_strength must be a float value')
-
-        # Cut on wavelength first!
-        gdwv = (self.wrest>wvlims[0]) & (self.wrest < wvlims[1])
-        if np.any(gdwv):
-            tmp_data = self._data[gdwv]
-            extras = self._extra_table[gdwv]
-            data = hstack([tmp_data,extras])
+        # Deal with output formatting now
+        # if len==1 return dict
+        if len(output) == 1:
+            return lilu.from_table_to_dict(output)
         else:
-            return None
+            return output
 
-        # Sort
-        data.sort(['ion_name','rel_strength'])
-        data.reverse()
+    def available_transitions_batch(self, wvlims, z=None, n_max_tuple=None, min_strength=0.):
+        """ Find the strongest available transitions in many wavelength intervals.
 
+        Same as available_transitions() for each interval in turn,
+        but evaluated all at once.
 
-        # Identify unique ion_names (e.g. HI, CIV, CIII)
-        # This is WRONG for FeII*
-        unique_ion_names, idx = np.unique(data['ion_name'], return_index=True)
-        unique= data[idx]
+        Parameters
+        ----------
+        wvlims : Quantity array
+            Wavelength range(s), shape (2,) or (nwin, 2)
+        z : float or ndarray, optional
+            Redshift(s) of the windows.  If given, wvlims are observed
+            wavelengths and the rest-frame ranges are wvlims/(1+z)
+        n_max_tuple : int, optional
+        min_strength : float, optional
 
-        '''
-        # obtain the strongest available transition of a given unique ion species
-        transition_name = []
-        strength = []
-        for ion in unique_ion_names:  # This loop is necessary to have a non trivial but convenient order in the final output
-            aux = self.strongest_transitions(ion, wvlims, n_max=1)  # only the strongest available
-
-            if aux is not None:
-                assert isinstance(aux, dict)  # this should always be True given n_max=1
-                transition_name += [aux['name']]
-                strength += [aux['rel_strength']]
-        if len(transition_name) == 0:
-            # no matches
+        Returns
+        -------
+        Table or None
+            The rows of available_transitions() for each window, in
+            window order.  Column 'iwin' gives the index of the window
+            (and 'z' its redshift, if input)
+        """
+        if not self._chk_available(n_max_tuple, min_strength):
+            return
+        wvlims = np.atleast_2d(Quantity(wvlims).to('AA').value)
+        if z is None:
+            nwin = wvlims.shape[0]
+        else:
+            z = np.atleast_1d(np.asarray(z, dtype=float))
+            nwin = max(wvlims.shape[0], z.size)
+            wvlims = wvlims / (1 + z[:, np.newaxis])
+        wvlims = np.broadcast_to(wvlims, (nwin, 2))
+        iwin, rows = self._available_rows(wvlims[:, 0], wvlims[:, 1], n_max_tuple=n_max_tuple,
+                                          min_strength=min_strength)
+        if rows.size == 0:
             return None
+        output = self._strength_index()['table'][rows]
+        output['iwin'] = iwin
+        if z is not None:
+            output['z'] = np.broadcast_to(z, (nwin,))[iwin]
+        return output
+
+    def _chk_available(self, n_max_tuple, min_strength):
+        """ Check the inputs of available_transitions()
+        """
+        if not self._atomic:
+            warnings.warn('Not implemented for LineList: {}.'.format(self.list))
+            return False
 
-        # create auxiliary Table
-        pdb.set_trace()
-        unique = Table()
-        unique['name'] = transition_name
-        unique['rel_strength'] = strength
-        '''
-
-        # get rid of those below the min_strength threshold
-        cond = unique['rel_strength'] >= min_strength
-        unique = unique[np.where(cond == True)[0]] # Deals with masking
-        if len(unique) < 1:
-            return None
+        if not all((isinstance(n, int) or (n is None)) for n in [n_max_tuple]):
+            raise SyntaxError(
+                'n_max_tuple must be integer when given!')
+        if isinstance(min_strength, (float,int)):
+            pass
+        else:
+            raise SyntaxError('min_strength must be a float value')
+        return True
 
-        # sort by strength
-        unique.sort(['rel_strength'])
-        unique.reverse()
-        # Table unique is now sorted by strength, with only
-        # 1 entry per ion species
+    def _strength_index(self):
+        """ Index of the transitions for available_transitions()
 
-        # Create output data table adding up to n_max_tuple per ion species
-        indices = []
-        for ion_name in unique['ion_name']:
-            mt = np.where(data['ion_name'] == ion_name)[0]
-            indices += mt[0:n_max_tuple].tolist()
-        output = data[np.array(indices)]
+        Built once, and again if the lines are changed.  It holds the
+        hstack of self._data and self._extra_table, its positions when
+        grouped by ion and sorted by decreasing strength, and the rest
+        wavelengths in ascending order.
 
-        # Deal with output formatting now
-        # if len==1 return dict
-        if len(output) == 1:
-            return lilu.from_table_to_dict(output)
-        else:
-            return output
+        Returns
+        -------
+        sidx : dict
+        """
+        sidx = self._strength_idx
+        if (sidx is not None) and (sidx['data'] is self._data) and (sidx['extra'] is self._extra_table):
+            return sidx
+        table = hstack([self._data, self._extra_table])
+        # Same order as sorting by ion_name and rel_strength, reversed
+        gorder = np.asarray(table.argsort(['ion_name', 'rel_strength']))[::-1]
+        gpos = np.empty(len(table), dtype=int)
+        gpos[gorder] = np.arange(len(table))
+        ion_name = np.asarray(table['ion_name'])[gorder]
+        strength = table['rel_strength']
+        strength = np.where(np.ma.getmaskarray(strength), np.nan, np.ma.getdata(strength))
+        wrest = table['wrest'].quantity.to('AA').value
+        wsort = np.argsort(wrest, kind='stable')
+        sidx = dict(data=self._data, extra=self._extra_table, table=table,
+                    gorder=gorder, gpos=gpos,
+                    ion=np.cumsum(np.r_[True, ion_name[1:] != ion_name[:-1]]) - 1,
+                    strength=strength[gorder], wsort=wsort, wsorted=wrest[wsort])
+        self._strength_idx = sidx
+        return sidx
+
+    def _available_rows(self, wvmin, wvmax, n_max_tuple=None, min_strength=0.):
+        """ Available transitions in many rest wavelength windows (AA)
 
+        Returns
+        -------
+        iwin : int ndarray
+          Window of each transition
+        rows : int ndarray
+          Rows of the transitions in the table of _strength_index()
+        """
+        sidx = self._strength_index()
+        # Bisection on the sorted wavelengths (bounds excluded)
+        start = np.searchsorted(sidx['wsorted'], wvmin, side='right')
+        stop = np.searchsorted(sidx['wsorted'], wvmax, side='left')
+        counts = np.maximum(stop - start, 0)
+        iwin = np.repeat(np.arange(counts.size), counts)
+        isort = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))
+        pos = sidx['gpos'][sidx['wsort'][isort]]
+        if pos.size == 0:
+            return iwin, pos
+        # Group by window and ion;  strongest first
+        srt = np.lexsort((pos, iwin))
+        iwin, pos = iwin[srt], pos[srt]
+        ion = sidx['ion'][pos]
+        new = np.r_[True, (iwin[1:] != iwin[:-1]) | (ion[1:] != ion[:-1])]
+        grp = np.cumsum(new) - 1
+        first = np.flatnonzero(new)
+        rank = np.arange(iwin.size) - first[grp]
+        # The strongest transition of an ion sets its strength
+        gstrength = sidx['strength'][pos[first]][grp]
+        with np.errstate(invalid='ignore'):
+            keep = gstrength >= min_strength
+        if n_max_tuple is not None:
+            keep &= rank < n_max_tuple
+        # Ions sorted by decreasing strength in each window, up to n_max_tuple transitions each
+        srt = np.lexsort((rank, pos[first][grp], -gstrength, iwin))
+        srt = srt[keep[srt]]
+        return iwin[srt], sidx['gorder'][pos[srt]]
 
     def __getitem__(self, k, tol=1e-3*u.AA):
         """ Passback data as a dict (from the table) for the input line
@@ -860,8 +1015,29 @@ class LineList(object):
         dict (from row in the data table if only 1 line is found) or
           Table (tuple when more than 1 lines are found)
         """
+        tmp = self.record(k, tol=tol)
+        if tmp is None:
+            return None
+        return tmp.copy()
+
+    def record(self, k, tol=1e-3*u.AA):
+        """ As __getitem__ but without the copy, i.e. a single line
+        is passed back as the memoized, read-only dict shared by all calls
+
+        Used by SpectralLine for its atomic data
+
+        Parameters
+        ----------
+        k : float, Quantity, str or tuple
+          See __getitem__
+        tol : Quantity, optional
+
+        Returns
+        -------
+        dict or Table or None
+        """
         try:
-            tmp = self.memoize[k].copy()
+            tmp = self.memoize[k]
         except KeyError:
             if isinstance(k, (float, Quantity)):  # Wavelength
                 if isinstance(k, float):  # Assuming Ang
@@ -901,7 +1077,7 @@ class LineList(object):
                         tmp2[name] = self._data[name][mt][0]
                     else:
                         tmp2[name] = self._data[name][mt][0] * self._data[name].unit
-                self.memoize[k] = tmp2.copy()
+                self.memoize[k] = _LineRecord(tmp2)
                 # return self._data[mt][0]  # Pass back as a Row not a Table
             elif isinstance(k, tuple):
                 self.memoize[k] = self._data[mt]
@@ -909,7 +1085,7 @@ class LineList(object):
                 raise ValueError(
                     '{:s}: Multiple lines in the list with your input.  Give a more unique input or change the tol.'.format(self.__class__.__name__))
             # Finish
-            tmp = self.memoize[k].copy()
+            tmp = self.memoize[k]
         return tmp
 
     # Printing
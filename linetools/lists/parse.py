@@ -4,6 +4,9 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 
 import numpy as np
 import os, glob, pdb, gzip, sys
+import hashlib
+import json
+from collections import OrderedDict
 if not sys.version_info[0] > 2:
     import codecs
     open = codecs.open
@@ -14,7 +17,7 @@ import importlib_resources
 from astropy import units as u
 from astropy.units.quantity import Quantity
 from astropy.io import fits, ascii
-from astropy.table import Column, Table, vstack
+from astropy.table import Column, MaskedColumn, Table, vstack
 
 from linetools.abund import roman, ions
 from linetools.abund.elements import ELEMENTS
@@ -116,6 +119,47 @@ def read_sets(infil=None, verbose=False):
     return set_data
 
 
+def match_wrest(wrest1, wrest2, tol):
+    """ Match two sets of rest wavelengths within a tolerance
+
+    A join on the sorted wavelengths (searchsorted), i.e.
+    O((N1 + N2) log N2) instead of a comparison of all pairs
+
+    Parameters
+    ----------
+    wrest1 : ndarray or Quantity
+    wrest2 : ndarray or Quantity
+      Assumed in Angstroms if not a Quantity
+    tol : float or Quantity
+      Matches have |wrest1 - wrest2| < tol
+
+    Returns
+    -------
+    idx1, idx2 : int ndarray
+      All of the matched pairs, ordered by idx1 and then idx2
+    """
+    def _aa(value):
+        if isinstance(value, Quantity):
+            return value.to('AA').value
+        return np.ma.filled(np.ma.asarray(value, dtype=float), np.nan)
+    w1 = np.atleast_1d(_aa(wrest1))
+    w2 = np.atleast_1d(_aa(wrest2))
+    tol = _aa(tol)
+    srt = np.argsort(w2, kind='stable')
+    w2s = w2[srt]
+    lo = np.searchsorted(w2s, w1 - tol, side='left')
+    hi = np.searchsorted(w2s, w1 + tol, side='right')
+    # Expand the windows
+    nmatch = hi - lo
+    idx1 = np.repeat(np.arange(w1.size), nmatch)
+    offset = np.arange(idx1.size) - np.repeat(np.cumsum(nmatch) - nmatch, nmatch)
+    idx2 = srt[np.repeat(lo, nmatch) + offset]
+    good = np.abs(w1[idx1] - w2[idx2]) < tol
+    idx1, idx2 = idx1[good], idx2[good]
+    order = np.lexsort((idx2, idx1))
+    return idx1[order], idx2[order]
+
+
 def read_euv():
     """ read additional EUV lines
 
@@ -259,16 +303,10 @@ def read_verner94():
     data['gk'] = tbl_6['Gk']
     data['Z'] = tbl_6['Z']
     data['ion'] = tbl_6['Z'] - tbl_6['N'] + 1
-    for ii,row in enumerate(tbl_6):
-        data[ii]['name'] = (
-            row['Species'][0:2].strip() + row['Species'][2:].strip() + 
-            ' {:d}'.format(int(row['lambda'])))
     # name
-    names = []
-    for row in data:
-        ionnm = ions.ion_to_name((row['Z'], row['ion']))
-        names.append('{:s} {:d}'.format(ionnm, int(row['wrest'])))
-    data['name'] = names
+    ionnm = ions.ion_to_name((data['Z'], data['ion']))
+    wint = np.asarray(data['wrest'], dtype=float).astype(int).astype(str)
+    data['name'] = np.char.add(np.char.add(ionnm, ' '), wint).tolist()
     #  Finish
     data['group'] = 1
     data['Ref'] = 'Verner1994'
@@ -878,27 +916,23 @@ def update_fval(table, verbose=False):
     # Dress up
     howk00['wrest'].unit = u.AA
 
-    fval = []
-    fsig = []
-    for row in howk00:
-        ipos1 = row['fval_sig'].find('(')
-        ipos2 = row['fval_sig'].find(')')
-        # 
-        fval.append(float(row['fval_sig'][0:ipos1]))
-        fsig.append(float(row['fval_sig'][ipos1+1:ipos2]))
+    # f-value and its error (in the last decimal), e.g. 0.0742(6)
+    fval_sig = np.char.strip(np.asarray(howk00['fval_sig']).astype(str))
+    fval, _, fsig = np.char.partition(fval_sig, '(').T
+    fsig = np.char.rstrip(fsig, ')')
     # Add columns
-    howk00.add_column(Column(np.array(fval), name='f'))
-    howk00.add_column(Column(np.array(fsig), name='fsig')) # Error in last decimal
-
-    # Now, finally, update
-    for row in howk00:
-        mt = np.where( (np.abs(table['wrest'].data*table['wrest'].unit-row['wrest']*u.AA) < 1e-3*u.AA) &
-            (table['Z'] == 26) & (table['ion'] == 2))[0]
-        if len(mt) == 0:
-            if verbose:
-                print('update_fval: Line {:g} not in your table.'.format(row['wrest']))
-        else:
-            table['f'][mt] = row['f']
+    howk00.add_column(Column(fval.astype(float), name='f'))
+    howk00.add_column(Column(fsig.astype(float), name='fsig')) # Error in last decimal
+
+    # Now, finally, update (FeII only)
+    ihowk, itab = match_wrest(howk00['wrest'].quantity, table['wrest'], 1e-3*u.AA)
+    feII = (np.asarray(table['Z'])[itab] == 26) & (np.asarray(table['ion'])[itab] == 2)
+    ihowk, itab = ihowk[feII], itab[feII]
+    if verbose:
+        for wrest in howk00['wrest'][np.setdiff1d(np.arange(len(howk00)), ihowk)]:
+            print('update_fval: Line {:g} not in your table.'.format(wrest))
+    # Later rows of howk00 take precedence, as ihowk is sorted
+    table['f'][itab] = howk00['f'][ihowk]
 
     ## ##
     # Lines without f-value but of interest
@@ -940,10 +974,13 @@ def update_gamma(table):
             # More accurate for stronger lines (pulled from Morton) [all in units of s^-1]
             gdict = {1215.670: 6.265E+08, 1025.7222: 1.897E+08, # From Morton
                 972.5367: 8.127E+07, 949.7430: 4.204E+07, 937.8034: 2.450E+07}
-            for key in gdict.keys():
-                mt = np.where( (np.abs(table['wrest']-key) < 1e-4))[0]
-                if len(mt) > 0:
-                    table['gamma'][mt[0]] = gdict[key]
+            gwrest = np.array(list(gdict.keys()))
+            gval = np.array(list(gdict.values()))
+            igd, itab = match_wrest(gwrest, table['wrest'], 1e-4)
+            # First match only
+            first = np.ones(igd.size, dtype=bool)
+            first[1:] = igd[1:] != igd[:-1]
+            table['gamma'][itab[first]] = gval[igd[first]]
 
 
 def update_wrest(table, verbose=True):
@@ -965,57 +1002,60 @@ def update_wrest(table, verbose=True):
     table['Ek'][mt[0]] = 52330.33 / u.cm
     '''
 #
-def load_datasets(datasets, tol=1e-3):
+def load_datasets(datasets, tol=1e-3, unique=False):
     """Load up all the inidividual linelist datasets
 
     Parameters
     ----------
     datasets : list of func
-      Routines to call for generating the dataset
+      Routines to call for generating the dataset, in order of priority
+    tol : float, optional
+      Tolerance for matching wavelengths in AA (with unique=True)
+    unique : bool, optional
+      Drop the lines of a dataset within tol of a line of a
+      previous (higher priority) dataset
+
     Returns
     -------
-
+    full_table : Table
     """
     flag_fval = True  # Update f-values?
     flag_wrest = True  # Update wavelengths?
     flag_gamma = True  # Update gamma values (recommended)
 
-    full_table = None
+    tables = []
     all_func = []
     tmp, _ = line_data(1)
     tkeys = list(tmp.keys())
     # Loop on data sets
     for func in datasets:
         # Query if read already
-        if func not in all_func:
-            # Read
-            table = func()
-
-            # Check keys
-            for key in table.keys():
-                if key not in tkeys:
-                    pdb.set_trace()
-
-            # Add extras
-            if full_table is None:
-                full_table = table
-            else:
-                '''
-                # Unique values
-                wrest = full_table['wrest']
-                newi = []
-                for jj, row in enumerate(table):
-                    mt = np.abs(row['wrest'] - wrest) < tol
-                    if mt.sum() == 0:
-                        newi.append(jj)
-                # Append
-                '''
-                full_table = vstack([full_table, table])
-            # Save to avoid repeating
-            all_func.append(func)
-
-    # Save
-    _fulltable = full_table.copy()
+        if func in all_func:
+            continue
+        # Read
+        table = func()
+
+        # Check keys
+        for key in table.keys():
+            if key not in tkeys:
+                raise ValueError('load_datasets: Unexpected column {:s} from {:s}'.format(
+                    key, func.__name__))
+
+        # Unique values
+        if unique and (len(tables) > 0):
+            wrest = np.concatenate([np.ma.filled(np.ma.asarray(itable['wrest'], dtype=float), np.nan)
+                                    for itable in tables])
+            idup, _ = match_wrest(table['wrest'], wrest, tol)
+            table = table[np.setdiff1d(np.arange(len(table)), idup)]
+        tables.append(table)
+        # Save to avoid repeating
+        all_func.append(func)
+
+    # Stack (once)
+    if len(tables) == 1:
+        _fulltable = tables[0].copy()
+    else:
+        _fulltable = vstack(tables)
 
     # Update wavelength values
     if flag_wrest:
@@ -1033,21 +1073,109 @@ def load_datasets(datasets, tol=1e-3):
     return _fulltable
 
 
-def _write_ref_table(outfile=None):
-    """ Write a reference table enabling faster I/O for *all* line lists
-    For developer use only.
+def _md5(filename):
+    """ md5 checksum of a file
+    """
+    with open(filename, 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def write_npz(table, outfile, source=None):
+    """ Write a Table of transitions to a binary .npz file
+
+    The file is read back (see read_npz) several times faster
+    than the ECSV, with the same columns, masks, units, formats and meta.
 
-    Note that after running this, you need to manually copy the table
-    produced to linetools/data/lines/ISM_table.fits inside the github
-    repository, and then check it in.
+    Parameters
+    ----------
+    table : Table
+    outfile : str
+    source : str, optional
+      File the table was read from;  its checksum is recorded so
+      that read_npz can reject a binary file gone stale
+    """
+    header = dict(colnames=table.colnames, meta=dict(table.meta), columns={})
+    arrays = {}
+    for ii, key in enumerate(table.colnames):
+        col = table[key]
+        arrays['data{:d}'.format(ii)] = np.ma.getdata(col)
+        masked = isinstance(col, MaskedColumn)
+        if masked:
+            arrays['mask{:d}'.format(ii)] = np.ma.getmaskarray(col)
+        header['columns'][key] = dict(
+            masked=masked, format=col.format, description=col.description,
+            unit=None if col.unit is None else col.unit.to_string())
+    if source is not None:
+        header['source_md5'] = _md5(source)
+    arrays['header'] = np.array(json.dumps(header))
+    with open(outfile, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+
+def read_npz(infile, source=None):
+    """ Read a Table of transitions written by write_npz
+
+    Parameters
+    ----------
+    infile : str
+    source : str, optional
+      Require the table to have been written from this file,
+      in its current state
+
+    Returns
+    -------
+    table : Table
+    """
+    with np.load(infile, allow_pickle=False) as npz:
+        header = json.loads(str(npz['header']), object_pairs_hook=OrderedDict)
+        if source is not None:
+            if header.get('source_md5') != _md5(source):
+                raise IOError('{:s} was not written from {:s}'.format(str(infile), str(source)))
+        clms = []
+        for ii, key in enumerate(header['colnames']):
+            cdict = header['columns'][key]
+            unit = None if cdict['unit'] is None else u.Unit(cdict['unit'])
+            if cdict['masked']:
+                clm = MaskedColumn(npz['data{:d}'.format(ii)], mask=npz['mask{:d}'.format(ii)],
+                                   name=key, unit=unit)
+            else:
+                clm = Column(npz['data{:d}'.format(ii)], name=key, unit=unit)
+            clms.append(clm)
+    table = Table(clms, meta=header['meta'], copy=False)
+    # Set afterwards, as the ECSV reader does
+    for key in header['colnames']:
+        table[key].format = header['columns'][key]['format']
+        table[key].description = header['columns'][key]['description']
+    return table
+
+
+def build_linelist(outfile=None, npz=True, overwrite=False):
+    """ Build the full table of transitions read by LineList
+    (linetools/data/lines/linelist.ascii) from the individual datasets
+
+    For developer use only.  Writes the ECSV table and, with npz=True,
+    the binary copy (.npz, see write_npz) LineList reads by default.
+
+    Parameters
+    ----------
+    outfile : str, optional
+      ECSV file;  defaults to the one in linetools/data/lines
+    npz : bool, optional
+      Also write the binary copy, next to the ECSV file
+    overwrite : bool, optional
+
+    Returns
+    -------
+    full_table : Table
     """
-    import warnings
     import datetime
     import getpass
     date = str(datetime.date.today().strftime('%Y-%b-%d'))
     user = getpass.getuser()
     if outfile is None:
-        outfile = importlib_resources.file('linetools.data.lines')/'linelist.ascii'
+        outfile = str(importlib_resources.files('linetools.data.lines')/'linelist.ascii')
+    if os.path.isfile(outfile) and not overwrite:
+        raise IOError('{:s} exists;  use overwrite=True'.format(outfile))
 
     # Define datasets: In order of Priority
     datasets = [parse_morton03, parse_morton00, parse_verner96,
@@ -1058,9 +1186,6 @@ def _write_ref_table(outfile=None):
     # Load
     full_table = load_datasets(datasets)
 
-    # Check the sets file
-    #set_data = read_sets()
-
     # Meta
     full_table.meta['Creator'] = user
     full_table.meta['CreationDate'] = date
@@ -1068,10 +1193,12 @@ def _write_ref_table(outfile=None):
     # Formatting (to insure enough precision)
     full_table['f'].format = '{:9.4e}'
     # Write
-    warnings.warn("About to overwrite: {:s}".format(outfile))
-    warnings.warn("Proceed only if you know what you are doing!")
-    pdb.set_trace()
     full_table.write(outfile, format='ascii.ecsv', overwrite=True)
+    if npz:
+        # From the ECSV, i.e. exactly what is read from it
+        write_npz(Table.read(outfile, format='ascii.ecsv'),
+                  os.path.splitext(outfile)[0]+'.npz', source=outfile)
+    return full_table
 
 
 if __name__ == '__main__':
@@ -1080,5 +1207,5 @@ if __name__ == '__main__':
     # ISM
     #_write_ref_ISM_table()
     # Full table
-    _write_ref_table()
+    build_linelist(overwrite=True)
 
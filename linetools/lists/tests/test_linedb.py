@@ -0,0 +1,75 @@
+# Module to run tests on the on-disk LineDB
+
+from __future__ import print_function, absolute_import, division, unicode_literals
+
+import pytest
+import numpy as np
+
+from astropy import units as u
+from astropy.table import Table
+
+from linetools.lists.linelist import LineList
+from linetools.lists.linedb import LineDB, write_linedb
+from linetools.spectralline import AbsLine
+
+
+@pytest.fixture(scope='module')
+def db_file(tmpdir_factory):
+    db_file = str(tmpdir_factory.mktemp('linedb').join('ism.db'))
+    ism = LineList('ISM')
+    # Write in two chunks
+    nline = write_linedb([ism._data[:200], ism._data[200:]], db_file)
+    assert nline == len(ism._data)
+    return db_file
+
+
+def test_query(db_file):
+    ism = LineList('ISM')
+    db = LineDB(db_file)
+    assert len(db) == len(ism._data)
+    # Wavelength
+    data = db.query(wvlims=[1200., 1600.]*u.AA)
+    gd = (ism._data['wrest'] >= 1200.) & (ism._data['wrest'] <= 1600.)
+    assert sorted(data['name']) == sorted(ism._data['name'][gd])
+    assert np.all(np.diff(data['wrest']) >= 0.)
+    assert data['wrest'].unit == u.AA
+    # Ion and strength
+    data = db.query(Zion=(6, 4))
+    assert list(data['name']) == ['CIV 1548', 'CIV 1550']
+    data = db.query(min_strength=3.)
+    assert np.all(np.log10(data['wrest']*data['f']) >= 3.)
+    data = db.query(names=['HI 1215', 'NotALine'])
+    assert len(data) == 1
+    np.testing.assert_allclose(data['f'][0], ism['HI 1215']['f'])
+    db.close()
+    # Errors
+    with pytest.raises(IOError):
+        write_linedb(Table(), db_file)
+    with pytest.raises(IOError):
+        LineDB(db_file + '.none')
+
+
+def test_linelist_from_db(db_file):
+    llist = LineList.from_db(db_file, wvlims=[1000., 2000.]*u.AA)
+    assert np.all((llist.wrest >= 1000*u.AA) & (llist.wrest <= 2000*u.AA))
+    np.testing.assert_allclose(llist['CIV 1548']['wrest'], 1548.204*u.AA)
+    civ = AbsLine('CIV 1548', linelist=llist, z=1.)
+    np.testing.assert_allclose(civ.data['f'], 0.1899)
+    # Extra columns as for the built-in lists
+    ism = LineList('ISM')
+    np.testing.assert_allclose(llist._extra_table['rel_strength'][llist.name == 'CIV 1548'],
+                               ism._extra_table['rel_strength'][ism.name == 'CIV 1548'])
+    transitions = llist.available_transitions([1200., 1600.]*u.AA, n_max_tuple=1)
+    assert transitions['name'][0] == 'HI 1215'
+    # Row numbers;  the database id is kept apart
+    np.testing.assert_array_equal(llist._data['Id'], np.arange(len(llist._data)))
+    with LineDB(db_file) as db:
+        assert np.all(db.query(names=['CIV 1548'])['Id'] == llist._data['db_id'][llist.name == 'CIV 1548'])
+    civ = llist.strongest_transitions('CIV', [1000., 2000.]*u.AA)
+    assert list(civ['name']) == list(ism.strongest_transitions('CIV', [1000., 2000.]*u.AA)['name'])
+    # Subsets (and sorted lists) keep the atomic methods
+    sub = llist.subset_lines(['CIV 1548', 'CIV 1550', 'HI 1215', 'SiII 1260'])
+    assert list(sub.strongest_transitions('CIV', [1000., 2000.]*u.AA)['name']) == list(civ['name'])
+    assert sub.available_transitions([1200., 1600.]*u.AA, n_max_tuple=1) is not None
+    llist.sortdata('name')
+    assert list(llist.strongest_transitions('CIV', [1000., 2000.]*u.AA)['name']) == list(civ['name'])
@@ -5,7 +5,9 @@
 
 import pdb
 import pytest
+import importlib_resources
 from astropy import units as u
+from astropy.table import Table
 import numpy as np
 
 from linetools.lists import parse
@@ -40,3 +42,41 @@ def test_verner96():
 
 def test_galaxy_lines():
     glx = parse.grab_galaxy_linelists()
+
+def test_match_wrest():
+    idx1, idx2 = parse.match_wrest([1215.67, 1548.2, 2000.],
+                                   [1548.20005, 1215.67, 1215.6701, 1548.3]*u.AA, 1e-3)
+    np.testing.assert_array_equal(idx1, [0, 0, 1])
+    np.testing.assert_array_equal(idx2, [1, 2, 0])
+
+def test_load_datasets_unique():
+    m03 = parse.parse_morton03()
+    full = parse.load_datasets([parse.parse_morton03, parse.parse_morton00], unique=True)
+    # Morton 2000 lines within 1mA of Morton 2003 are dropped
+    i1, i2 = parse.match_wrest(full['wrest'][len(m03):], m03['wrest'], 1e-3)
+    assert len(i1) == 0
+    assert len(full) > len(m03)
+
+def test_build_linelist(tmpdir):
+    outfile = str(tmpdir.join('linelist.ascii'))
+    full = parse.build_linelist(outfile)
+    shipped = Table.read(importlib_resources.files('linetools.data.lines')/'linelist.ascii',
+                         format='ascii.ecsv')
+    assert full.colnames == shipped.colnames
+    assert list(full['name']) == list(shipped['name'])
+    np.testing.assert_allclose(full['wrest'], shipped['wrest'])
+    # Binary copy
+    ecsv = Table.read(outfile, format='ascii.ecsv')
+    npz = parse.read_npz(outfile.replace('.ascii', '.npz'), source=outfile)
+    assert npz.meta == ecsv.meta
+    for key in ecsv.colnames:
+        assert npz[key].unit == ecsv[key].unit
+        assert npz[key].format == ecsv[key].format
+        np.testing.assert_array_equal(np.ma.getmaskarray(npz[key]), np.ma.getmaskarray(ecsv[key]))
+        np.testing.assert_array_equal(np.ma.filled(npz[key]), np.ma.filled(ecsv[key]))
+    with pytest.raises(IOError):
+        parse.build_linelist(outfile)
+    # Stale binary copy
+    ecsv[:10].write(outfile, format='ascii.ecsv', overwrite=True)
+    with pytest.raises(IOError):
+        parse.read_npz(outfile.replace('.ascii', '.npz'), source=outfile)
@@ -50,6 +50,16 @@ def test_subset():
     assert ism._data['name'][0] == 'HI 1215'
     np.testing.assert_allclose(ism['HI 1215']['wrest'], 1215.6700*u.AA, rtol=1e-7)
 
+    # Extra columns follow the subset;  the full table is shared
+    full = LineList('ISM')
+    sub = full.subset_lines(['CIV 1548', 'HI 1215', 'SiII 1260', 'CIV 1550', 'NotALine'],
+                            sort_by='rel_strength')
+    assert len(sub._data) == 4
+    assert sub._fulltable is full._fulltable
+    np.testing.assert_array_equal(sub._extra_table['Id_ex'], sub._data['Id'])
+    assert np.all(np.diff(sub._extra_table['rel_strength']) >= 0.)
+    assert sub._data['name'][-1] == 'HI 1215'
+
 
 def test_closest():
     ism = LineList('ISM')
@@ -117,6 +127,14 @@ def test_strongest_transitions():
     transitions = ism.strongest_transitions('HI',wvlims/(1+z),n_max=5)
     assert transitions is None, error_msg
 
+    # Sorted lists and subsets
+    wvlims = (1000,2000)*u.AA
+    siII = ism.strongest_transitions('SiII', wvlims)
+    ism_name = LineList('ISM', sort_by='name')
+    assert list(ism_name.strongest_transitions('SiII', wvlims)['name']) == list(siII['name'])
+    sub = ism.subset_lines(list(siII['name'][:3]) + ['HI 1215'])
+    assert list(sub.strongest_transitions('SiII', wvlims)['name']) == list(siII['name'][:3])
+
 
 def test_available_transitions():
     error_msg = 'Something is wrong in available_transitions()'
@@ -151,6 +169,23 @@ def test_available_transitions():
     assert isinstance(transitions,dict), error_msg
 
 
+def test_available_transitions_batch():
+    ism = LineList('ISM')
+    wvlims = (1200,1800)*u.AA
+    z = np.array([0.1, 0.5, 1.5])
+    batch = ism.available_transitions_batch(wvlims, z=z, n_max_tuple=2)
+    for ii, iz in enumerate(z):
+        transitions = ism.available_transitions(wvlims/(1+iz), n_max_tuple=2)
+        assert list(batch['name'][batch['iwin'] == ii]) == list(transitions['name'])
+    np.testing.assert_allclose(np.unique(batch['z']), z)
+    # Index is rebuilt when the lines are re-sorted
+    ism.sortdata('name')
+    transitions = ism.available_transitions(wvlims/(1+z[1]), n_max_tuple=2)
+    assert list(batch['name'][batch['iwin'] == 1]) == list(transitions['name'])
+    # Rest-frame windows;  nothing found
+    assert ism.available_transitions_batch([[1,2], [3,4]]*u.AA) is None
+
+
 def test_sortdata():  # With extras
     error_msg = 'Something is wrong in sortdata()'
     ism = LineList('ISM', sort_by='name')
@@ -161,5 +196,19 @@ def test_sortdata():  # With extras
     assert ism.name[0] == 'HI 1215', error_msg
     ism.sortdata(['rel_strength'])
     assert ism.name[0] == 'CI** 1123b', error_msg
+    # Unknown keys raise ValueError, as astropy does
+    with pytest.raises(ValueError):
+        ism.sortdata('junk')
+
+
+def test_extra_table_cache():
+    ism = LineList('ISM', sort_by='as_given')
+    ism2 = LineList('ISM', sort_by='as_given')
+    assert ism._extra_table is ism2._extra_table
+    # Redo with other options does not touch the shared table
+    ism2.make_extra_table(abundance_type='none', redo=True)
+    assert np.all(ism2._extra_table['abundance'] == 0.)
+    assert ism._extra_table['abundance'][ism.name == 'CIV 1548'][0] > 0.
+    assert LineList('ISM', sort_by='as_given')._extra_table is ism._extra_table
 
 
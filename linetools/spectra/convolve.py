@@ -5,7 +5,6 @@
 from __future__ import print_function, absolute_import, division, unicode_literals
 
 import numpy as np
-from astropy.convolution import convolve, Gaussian1DKernel, CustomKernel
 
 #Updated functions using astropy.convolution
 def convolve_psf(array, fwhm, boundary='fill', fill_value=0.,
@@ -47,6 +46,7 @@ def convolve_psf(array, fwhm, boundary='fill', fill_value=0.,
     -----
     This function uses astropy.convolution 
     """
+    from astropy.convolution import convolve, Gaussian1DKernel
 
     const2   = 2.354820046             # 2*sqrt(2*ln(2))
     const100 = 3.034854259             # sqrt(2*ln(100))
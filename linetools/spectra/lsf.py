@@ -3,8 +3,6 @@ Module for dealing with LSFs of various astronomical instruments.
 """
 
 import numpy as np
-from scipy.interpolate import interp1d
-from scipy.stats import norm
 from astropy.io import fits, ascii
 from astropy.units import Quantity
 import astropy.units as u
@@ -400,6 +398,7 @@ class LSF(object):
         Note: The instrument configuration requires 'pixel_scale' and 'FWHM' keys
         in units of Angstrom/px and Angstrom, respectively.
         """
+        from scipy.stats import norm
 
         try:
             pixel_scale = self.instr_config['pixel_scale'] * u.AA
@@ -488,6 +487,7 @@ class LSF(object):
             The interpolated lsf at wv0. This table has two 
             columns: 'wv' and 'kernel'
         """
+        from scipy.interpolate import interp1d
 
         if len(self._data.colnames) == 2:
             raise ValueError('LSF has only one kernel. '
@@ -606,6 +606,7 @@ class LSF(object):
             is equal to `wv_array` by construction.)
 
         """
+        from scipy.interpolate import interp1d
         # Check correct format
         if not ((isinstance(wv_array, np.ndarray)) or (isinstance(wv_array, Quantity))):
             raise SyntaxError('`wv_array` must be Quantity numpy.ndarray')
@@ -19,9 +19,6 @@ import linetools.utils as ltu
 from .plotting import get_flux_plotrange
 from .utils import meta_to_disk
 
-from ..analysis.interactive_plot import InteractiveCoFit
-from ..analysis.continuum import prepare_knots
-from ..analysis.continuum import find_continuum
 from ..analysis.interp import AkimaSpline
 eps = np.finfo(float).eps
 
@@ -1408,6 +1405,8 @@ class XSpectrum1D(object):
 
         """
         import matplotlib.pyplot as plt
+        from ..analysis.interactive_plot import InteractiveCoFit
+        from ..analysis.continuum import prepare_knots, find_continuum
         if plt.get_backend() == 'MacOSX':
             warnings.warn("""\
             Looks like you're using the MacOSX matplotlib backend. Switch to the TkAgg
@@ -77,9 +77,14 @@ class SpectralLine(object):
         Analysis inputs (e.g. a spectrum, wavelength limits)
     data : dict
         Line atomic/molecular data (e.g. f-value, A coefficient, Elow)
+        Shared with the other lines of the transition from the same
+        LineList and read-only;  set it to dict(data) to modify it
     limits : zLimits
         Limits including zlim, vlim, wvlim.
     """
+    # Other attributes go to the (lazily created) __dict__
+    __slots__ = ('ltype', 'wrest', 'name', 'data', 'analy', 'attrib', 'limits',
+                 '__dict__', '__weakref__')
 
     @classmethod
     def from_dict(cls, idict, coord=None, warn_only=False, chk_data=True, **kwargs):
@@ -150,8 +155,8 @@ class SpectralLine(object):
                 sline.attrib[key] = ltu.convert_quantity_in_dict(idict['attrib'][key])
             elif key in ['RA','DEC']:
                 if coord is None:
-                    sline.attrib['coord'] = SkyCoord(ra=idict['attrib']['RA']*u.deg,
-                                                  dec=idict['attrib']['DEC']*u.deg)
+                    sline.attrib['coord'] = ltu.intern_coord((idict['attrib']['RA'],
+                                                              idict['attrib']['DEC']))
                 else:
                     sline.attrib['coord'] = coord
             else:
@@ -281,20 +286,19 @@ class SpectralLine(object):
         if flg_list:  # Allow for a list of LineList
             for llist in linelist:
                 llist.closest = closest
-                newline = llist[trans]
+                newline = llist.record(trans)
                 if newline is not None:
                     break
         else:
-            newline = llist[trans]
+            newline = llist.record(trans)
 
         # Success?
         if newline is None:
             print("Transition {} not found in LineList {:s}".format(trans, llist.list))
             raise ValueError("You may need to set clear_CACHE_LLIST=True")
-        try:
-            self.data.update(newline)  # Expected to be a LineList dict object
-        except TypeError:
+        if not isinstance(newline, dict):  # Expected to be a LineList dict object
             raise TypeError("Probably should not be here")
+        self.data = newline
 
 
         # Update
@@ -368,7 +372,7 @@ class SpectralLine(object):
         if (coord is not None) or (RADec is not None):
             if coord is None:
                 coord = SkyCoord(ra=RADec[0], dec=RADec[1])
-            answer = (answer & (coord.separation(self.attrib['coord']) < 0.1*u.arcsec))
+            answer = (answer & ltu.same_sky(coord, self.attrib['coord'], 0.1*u.arcsec))
 
         # Return
         return answer
@@ -613,6 +617,8 @@ class AbsLine(SpectralLine):
         str -- Name of transition (e.g. 'CIV 1548'). For an
         unknown transition use string 'unknown'.
     """
+    __slots__ = ()
+
     def __init__(self, trans, **kwargs):
         # Generate with type
 
@@ -839,6 +845,37 @@ class AbsLine(SpectralLine):
             raise NotImplementedError('AbsLine {} has not set its oscillator strength.'.format(self.__repr__))
         return laa.N_from_Wr(Wr, self.wrest, fosc)
 
+    def get_logN_from_Wr_b(self, Wr, b):
+        """It returns the column density for a given rest-frame equivalent
+        width and Doppler parameter, by inverting the exact curve of growth
+        of the transition tabulated on a (logN, b) grid. The grid is cached
+        for the transition, so repeated (and vectorized) calls are fast.
+
+        Parameters
+        ----------
+        Wr : Quantity or Quantity array
+            Rest-frame equivalent width of the AbsLine
+        b : Quantity or Quantity array
+            Doppler parameter
+
+        Returns
+        -------
+        logN : float or ndarray
+            log10 column density;  NaN if outside the grid
+
+        Notes
+        -----
+        This is a wrapper to linetools.analysis.cog_grid.WrGrid.logN_from_Wr()
+        """
+        from linetools.analysis.cog_grid import WrGrid
+        try:
+            fosc = self.data['f']
+            gamma = self.data['gamma']
+        except KeyError:
+            raise NotImplementedError('AbsLine {} has not set its oscillator strength or gamma value.'.format(self.__repr__))
+        grid = WrGrid.from_atomic(self.wrest, fosc, gamma, name=self.name)
+        return grid.logN_from_Wr(Wr, b)
+
     def __repr__(self):
         txt = '<{:s}:'.format(self.__class__.__name__)
         # Name
@@ -869,6 +906,8 @@ class EmLine(SpectralLine):
         str -- Name of transition (e.g. 'CIV 1548'). For an
         unknown transition use string 'unknown'.
     """
+    __slots__ = ()
+
     def __init__(self, trans, **kwargs):
         # Generate with type
         super(EmLine, self).__init__('Em', trans, **kwargs)
@@ -886,35 +925,57 @@ class EmLine(SpectralLine):
         self.attrib.update(emiss_attrib.copy())
 
 
-def many_abslines(all_wrest, llist):
+def many_abslines(all_wrest, llist, z=None, zlim=None):
     """Generate a list of AbsLine objects.
 
     Useful for when you have many lines (>1000) to generate that have
-    similar wrest.  Uses deepcopy.
+    similar wrest.  The LineList is searched once per unique wrest
+    and the lines share their atomic data (see LineList.record).
 
     Parameters
     ----------
-    all_wrest : list of lines
+    all_wrest : list of lines or Quantity array
     llist : LineList
+    z : ndarray, optional
+      Redshifts of the lines;  default is 0.
+    zlim : ndarray (N,2), optional
+      Redshift limits of the lines;  default is [z,z]
 
     Returns
     -------
     abs_lines : list of AbsLine Objects
     """
     # Find unique lines
-    wrestv =  np.array([iwrest.value for iwrest in all_wrest]) 
-    uniq_wrest = np.unique( wrestv )
+    if isinstance(all_wrest, Quantity):
+        wrestv = np.atleast_1d(all_wrest.value)
+        unit = all_wrest.unit
+    else:
+        wrestv = np.array([iwrest.value for iwrest in all_wrest])
+        unit = all_wrest[0].unit
+    uniq_wrest, uidx = np.unique(wrestv, return_inverse=True)
+    if z is None:
+        z = np.zeros(wrestv.size)
+    z = np.asarray(z, dtype=float).tolist()
+    if zlim is None:
+        zlim = np.column_stack([z, z])
+    zlim = np.asarray(zlim, dtype=float).tolist()
 
     # Generate a simple dict
-    adict = {}
-    unit = all_wrest[0].unit
-    for iuni in uniq_wrest:
-        adict[iuni] = AbsLine(iuni*unit,linelist=llist)
+    templates = [AbsLine(iuni*unit, linelist=llist) for iuni in uniq_wrest]
 
     # Copy em up
     abs_lines = []
-    for iwrestv in wrestv:
-        abs_lines.append(copy.deepcopy(adict[iwrestv]))
+    for ii, iu in enumerate(uidx.ravel()):
+        tline = templates[iu]
+        aline = AbsLine.__new__(AbsLine)
+        aline.ltype = tline.ltype
+        aline.wrest = tline.wrest
+        aline.name = tline.name
+        aline.data = tline.data
+        aline.analy = tline.analy.copy()
+        aline.attrib = tline.attrib.copy()
+        aline.limits = zLimits(z[ii], zlim[ii], wrest=tline.wrest)
+        abs_lines.append(aline)
 
     # Return
     return abs_lines
@@ -141,3 +141,14 @@ def test_manyabslines():
     llist = LineList('HI')
     alines = spectralline.many_abslines(lines, llist)
 
+    assert len(alines) == 6
+    assert alines[3].name == alines[0].name
+    # Redshifts and limits;  the atomic data are shared
+    z = np.array([0.5, 1., 2.])
+    zlim = np.column_stack([z-0.001, z+0.001])
+    alines = spectralline.many_abslines([1215.670, 1215.670, 1025.7222]*u.AA, llist, z=z, zlim=zlim)
+    assert alines[1].data is alines[0].data
+    assert alines[1].attrib is not alines[0].attrib
+    np.testing.assert_allclose([aline.z for aline in alines], z)
+    np.testing.assert_allclose(alines[2].limits.zlim, zlim[2])
+    assert alines[2].limits.wvlim[0].unit == u.AA
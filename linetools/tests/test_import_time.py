@@ -0,0 +1,56 @@
+# Import-time budget for the main entry points
+#   Short-lived batch jobs pay the import of linetools every time
+
+import subprocess
+import sys
+
+import pytest
+
+# Main entry points
+ENTRY_POINTS = ['linetools.spectra.xspectrum1d', 'linetools.spectra.io',
+                'linetools.lists.linelist', 'linetools.spectralline',
+                'linetools.isgm.abscomponent', 'linetools.isgm.abssystem',
+                'linetools.analysis.voigt', 'linetools.analysis.cog',
+                'linetools.abund.elements']
+
+# Loaded on first use only
+HEAVY = ['matplotlib', 'astropy.modeling', 'astropy.convolution',
+         'scipy.interpolate', 'scipy.integrate', 'PyQt5', 'PyQt6', 'qtpy']
+
+# Budget for the module code of linetools itself (s);  the
+# dependencies (numpy, astropy) are not included
+BUDGET = 0.5
+
+
+def importtime(module):
+    """ Parse the `python -X importtime` output for importing a module
+
+    Returns
+    -------
+    times : dict
+      Self and cumulative import times (s) of each imported package
+    """
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                         stderr=subprocess.PIPE, stdout=subprocess.PIPE,
+                         universal_newlines=True, check=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumul_us, package = line[len('import time:'):].split('|')
+        times[package.strip()] = (int(self_us)/1e6, int(cumul_us)/1e6)
+    return times
+
+
+@pytest.mark.parametrize('module', ENTRY_POINTS)
+def test_import_time(module):
+    times = importtime(module)
+    assert module in times
+    # Heavy dependencies
+    heavy = [package for package in times
+             if any(package == iheavy or package.startswith(iheavy+'.') for iheavy in HEAVY)]
+    assert len(heavy) == 0, 'import {:s} loads {}'.format(module, sorted(heavy))
+    # Budget
+    lt_time = sum(itime[0] for package, itime in times.items()
+                  if package.split('.')[0] == 'linetools')
+    assert lt_time < BUDGET, 'import {:s} spends {:.2f}s in linetools'.format(module, lt_time)
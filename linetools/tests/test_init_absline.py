@@ -83,3 +83,32 @@ def test_attrib():
     abslin = AbsLine(1215.6700*u.AA)
     ion_name = abslin.ion_name
     assert ion_name == 'HI'
+
+
+def test_shared_data():
+    ism = LineList('ISM')
+    abslin = AbsLine('CIV 1548', linelist=ism)
+    abslin2 = AbsLine('CIV 1548', z=1., linelist=ism)
+    assert abslin.data is abslin2.data
+    # LineList lookups are still copies
+    assert ism['CIV 1548'] is not abslin.data
+    # Other attributes may still be set
+    abslin.junk = 1
+    assert abslin2.attrib is not abslin.attrib
+    # The shared data are read-only, so the LineList cache is safe
+    f = abslin.data['f']
+    with pytest.raises(TypeError):
+        abslin.data['f'] = 99.
+    with pytest.raises(TypeError):
+        abslin.data.update(f=99.)
+    abslin.data = dict(abslin.data)
+    abslin.data['f'] = 99.
+    assert abslin2.data['f'] == f
+    assert ism['CIV 1548']['f'] == f
+    assert AbsLine('CIV 1548', linelist=ism).data['f'] == f
+    # Copies
+    abslin3 = abslin2.copy()
+    assert abslin3.data['f'] == f
+    lookup = ism['CIV 1548']
+    lookup['f'] = 99.
+    assert ism['CIV 1548']['f'] == f
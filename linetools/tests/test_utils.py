@@ -136,6 +136,35 @@ def test_radeccoord():
     assert np.isclose(gcoord.icrs.dec.value, -69.78267074987376)
 
 
+def test_intern_coord():
+    coord = ltu.intern_coord((123.123, 12.1224))
+    assert ltu.intern_coord(SkyCoord(ra=123.123, dec=12.1224, unit='deg')) is coord
+    assert ltu.intern_coord((123.123*u.deg, 12.1224*u.deg)) is coord
+    assert ltu.intern_coord((123.124, 12.1224)) is not coord
+    # Arrays are passed through
+    coords = ltu.intern_coord([(123.123, 12.1224), (125.123, 32.1224)])
+    assert len(coords) == 2
+    # Sky matching
+    assert ltu.same_sky(coord, ltu.intern_coord((123.123, 12.1224)), 0.1*u.arcsec)
+    for sep in [0.05, 0.5, 30.]:
+        coord2 = SkyCoord(ra=123.123, dec=12.1224 + sep/3600., unit='deg')
+        for tol in [0.1*u.arcsec, 1*u.arcsec, 1*u.arcmin]:
+            assert ltu.same_sky(coord, coord2, tol) == bool(coord.separation(coord2) < tol)
+    np.testing.assert_allclose(np.sum(ltu.coord_unit_vector(coords)**2, axis=1), 1.)
+    # Input objects are not modified (nor their unit vectors cached)
+    coord3 = SkyCoord(ra=10.5, dec=-3.2, unit='deg')
+    icoord3 = ltu.intern_coord(coord3)
+    assert icoord3 is not coord3
+    assert ltu.intern_coord(coord3) is icoord3
+    assert len([key for key in coord3.__dict__ if key.startswith('_ltu')]) == 0
+    # Arrays edited in place
+    coords = SkyCoord(ra=[10., 20.], dec=[0., 0.], unit='deg')
+    assert np.all(ltu.same_sky(icoord3, coords, 1*u.deg) == (icoord3.separation(coords) < 1*u.deg))
+    coords[0] = SkyCoord(ra=10.5, dec=-3.2, unit='deg')
+    assert np.all(ltu.same_sky(icoord3, coords, 1*u.deg) == (icoord3.separation(coords) < 1*u.deg))
+    np.testing.assert_allclose(ltu.coord_unit_vector(icoord3), ltu.coord_unit_vector(coord3))
+
+
 def test_overlapping_chunks():
     chunk1 = (1, 2, 3, 4)
     chunk2 = [3, 4, 5, 6]
@@ -5,6 +5,7 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 import json
 import gzip, os
 import warnings
+import weakref
 import pdb
 
 import numpy as np
@@ -17,6 +18,14 @@ try:
 except NameError:  # For Python 3
     basestring = str
 
+c_kms = const.c.to('km/s').value
+kms = u.km/u.s
+
+# Interned sky coordinates, keyed by (RA, DEC);  see intern_coord()
+COORD_CACHE = weakref.WeakValueDictionary()
+# (weakref, unit vector) of the interned coordinates, keyed by id;  see coord_unit_vector()
+COORD_XYZ = {}
+
 
 def between(a, vmin, vmax):
     """ Return a boolean array True where vmin <= a < vmax.
@@ -255,6 +264,125 @@ def radec_to_coord(radec, gal=False):
     return coord
 
 
+def intern_coord(radec, precision=9):
+    """ Shared SkyCoord object for a position on the sky
+
+    Scalar ICRS coordinates with the same RA, DEC (rounded to
+    precision decimals in deg) are mapped onto a single object, so that
+    objects on a given sightline share their coordinate and matching
+    them on the sky is an identity test (see same_sky).  A SkyCoord
+    is only generated for a new position.
+
+    Parameters
+    ----------
+    radec : SkyCoord or tuple or str
+      (RA, DEC) as floats (deg) or Quantity;  other inputs are
+      passed to radec_to_coord()
+    precision : int, optional
+
+    Returns
+    -------
+    coord : SkyCoord
+      Not interned if it is an array, has a distance or
+      is not in the ICRS frame
+    """
+    from astropy.coordinates import SkyCoord, UnitSphericalRepresentation
+    if isinstance(radec, SkyCoord):
+        if _interned(radec):  # Already shared
+            return radec
+        coord = radec
+    elif isinstance(radec, tuple) and (not isinstance(radec[0], basestring)):
+        ra, dec = [val.to('deg').value if isinstance(val, Quantity) else float(val)
+                   for val in radec]
+        key = (round(ra, precision), round(dec, precision))
+        coord = COORD_CACHE.get(key)
+        if coord is None:
+            coord = _intern(SkyCoord(ra=ra, dec=dec, unit='deg'), key)
+        return coord
+    else:
+        coord = radec_to_coord(radec)
+    if (not coord.isscalar) or (coord.frame.name != 'icrs') or (
+            not isinstance(coord.data, UnitSphericalRepresentation)):
+        return coord
+    key = (round(coord.ra.deg, precision), round(coord.dec.deg, precision))
+    icoord = COORD_CACHE.get(key)
+    if icoord is None:
+        # Our own copy, so that the input object is left untouched
+        icoord = _intern(coord.copy(), key)
+    return icoord
+
+
+def _intern(coord, key):
+    """ Add a (new) coordinate to the interned ones
+    """
+    ident = id(coord)
+    COORD_CACHE[key] = coord
+    COORD_XYZ[ident] = (weakref.ref(coord, lambda ref: COORD_XYZ.pop(ident, None)), None)
+    return coord
+
+
+def _interned(coord):
+    """ Whether coord is an interned coordinate (see intern_coord)
+    """
+    entry = COORD_XYZ.get(id(coord))
+    return (entry is not None) and (entry[0]() is coord)
+
+
+def coord_unit_vector(coord):
+    """ Cartesian (ICRS) unit vector(s) of a SkyCoord
+
+    Cached for the interned coordinates (see intern_coord);
+    computed for all others
+
+    Parameters
+    ----------
+    coord : SkyCoord
+
+    Returns
+    -------
+    xyz : ndarray
+      (3,) or (N,3)
+    """
+    interned = _interned(coord)
+    if interned and (COORD_XYZ[id(coord)][1] is not None):
+        return COORD_XYZ[id(coord)][1]
+    icrs = coord.icrs
+    ra = icrs.ra.radian
+    dec = icrs.dec.radian
+    xyz = np.stack([np.cos(dec)*np.cos(ra), np.cos(dec)*np.sin(ra), np.sin(dec)], axis=-1)
+    if interned:
+        COORD_XYZ[id(coord)] = (COORD_XYZ[id(coord)][0], xyz)
+    return xyz
+
+
+def same_sky(coord1, coord2, tol):
+    """ Test whether two coordinates are separated by less than tol
+
+    Equivalent to coord1.separation(coord2) < tol but an
+    identity test for interned coordinates and otherwise a
+    comparison of the chord between their unit vectors
+
+    Parameters
+    ----------
+    coord1 : SkyCoord
+    coord2 : SkyCoord
+      Scalar, or an array to test against a scalar coord1
+    tol : Angle or Quantity
+
+    Returns
+    -------
+    bool or bool ndarray
+    """
+    if coord1 is coord2:
+        return True
+    dxyz = coord_unit_vector(coord1) - coord_unit_vector(coord2)
+    chord2 = np.sum(dxyz**2, axis=-1)
+    test = chord2 < (2*np.sin(tol.to_value(u.radian)/2.))**2
+    if np.ndim(test) == 0:
+        return bool(test)
+    return test
+
+
 def scipy_rebin(aa, *args):
     """ Simple script to rebin an input array to a new shape.
 
@@ -568,12 +696,10 @@ def dz_from_dv(dv, zref, rel=True):
 
     zref = np.array(zref)
 
-    beta = dv / const.c
-    beta = beta.decompose()
-    # check dimensionless
-    if beta.unit != u.dimensionless_unscaled:
+    try:
+        beta = dv.to_value(kms) / c_kms
+    except u.UnitConversionError:
         raise IOError('dv must have velocity units.')
-    beta = beta.value  # beta is dimensionless
 
     if rel:
         aux = np.sqrt((1. + beta) / (1. - beta))